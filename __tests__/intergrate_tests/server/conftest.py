@@ -8,18 +8,24 @@ from pathlib import Path
 
 
 @pytest.fixture
-def db_mock_var():
-    db_controller = DBController()
+def db_controller(tmp_path):
+    db_controller = DBController(wal_path=tmp_path / "dbcsv.wal")
+    yield db_controller
+    db_controller.close()
+
+
+@pytest.fixture
+def db_mock_var(db_controller):
     con = db_controller.connect()
     yield db_controller, con
 
 
 @pytest.fixture
-def mock_db_controller():
-    db_controller = DBController()
-    db_controller.connect()
+def mock_db_controller(db_controller):
+    con = db_controller.connect()
     yield db_controller
-    db_controller.disconnect()
+    if not con.closed:
+        db_controller.disconnect(con.id)
 
 
 @pytest.fixture
@@ -83,10 +89,11 @@ def mock_create_table():
     rm_rf(Path() / "TEST_DATABASE")
 
 
-from dbcsv_server.server import app
+from dbcsv_server.server import app, WAL_PATH_ENV
 from fastapi.testclient import TestClient
 
 @pytest.fixture
-def mock_client():
-    client = TestClient(app)
-    return client
\ No newline at end of file
+def mock_client(tmp_path, monkeypatch):
+    monkeypatch.setenv(WAL_PATH_ENV, str(tmp_path / "dbcsv.wal"))
+    with TestClient(app) as client:
+        yield client
\ No newline at end of file
@@ -1,24 +1,24 @@
 from dbcsv_server.connection import ConnectionIdentity
 from dbcsv_server.db_controller import DBController
+from dbcsv_server.data_storage.partition import PartitionedTable
+from dbcsv_server.query_engine.parser import Parser
+from dbcsv_server.query_engine.planner import split_predicate
 import pytest
 from pathlib import Path
 import pandas as pd
 
 
-def test_return_connection_object_when_call_connect():
-    db_controller = DBController()
+def test_return_connection_object_when_call_connect(db_controller):
     con = db_controller.connect()
     assert con.id
 
 
-def test_status_after_connect():
-    db_controller = DBController()
+def test_status_after_connect(db_controller):
     con = db_controller.connect()
     assert con.closed == False
 
 
-def test_status_after_disconnect():
-    db_controller = DBController()
+def test_status_after_disconnect(db_controller):
     con = db_controller.connect()
     db_controller.disconnect(con.id)
     assert con.closed == True
@@ -71,7 +71,7 @@ def test_create_table(db_mock_var):
             "SELECT * FROM TEST_DATABASE.TEST_TABLE WHERE col2 >= 2 AND col3 <= 100",
             ("A", 2, 3),
         ),
-        ("SELECT 'b', 'c', 'd'", ("B", "C", "D")),
+        ("SELECT 'b', 'C', 'd'", ("b", "C", "d")),
     ],
 )
 def test_select_query_return_expect_result(
@@ -135,3 +135,66 @@ def test_fetch_next_return_data_and_description(
     assert row_result
     assert row_result["data"]
     assert row_result["description"]
+
+
+def test_insert_written_on_commit_only(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    db_controller = DBController(checkpoint_interval=60)
+    con = db_controller.connect()
+    db_controller.execute_query(con.id, "CREATE TABLE DB.T (COL1 STRING, COL2 INT)")
+    db_controller.execute_query(con.id, "INSERT INTO DB.T VALUES ('a', 1)")
+    db_controller.rollback(con.id)
+    db_controller.execute_query(con.id, "INSERT INTO DB.T VALUES ('b', 2), ('c', 3)")
+    assert (tmp_path / "DB" / "T.csv").read_text() == "COL1,COL2\n"
+    db_controller.commit(con.id)
+    assert (tmp_path / "dbcsv.wal").stat().st_size > 0
+    query_id = db_controller.execute_query(con.id, "SELECT COL2 FROM DB.T")
+    rows = list(con.query_result[query_id]["result"])
+    assert [row[0] for row in rows] == [2, 3]
+    assert (tmp_path / "dbcsv.wal").stat().st_size == 0
+    db_controller.close()
+
+
+@pytest.mark.parametrize(
+    "where_clause", ["COL1 = 'x'", "COL1 IN ('x')", "COL1 = 'x' OR COL2 = 100", "COL1 <> 'X'"]
+)
+def test_lowercase_literal_round_trip(tmp_path, monkeypatch, where_clause):
+    monkeypatch.chdir(tmp_path)
+    db_controller = DBController(checkpoint_interval=60)
+    con = db_controller.connect()
+    db_controller.execute_query(con.id, "CREATE TABLE DB.T (COL1 STRING, COL2 INT)")
+    db_controller.execute_query(con.id, "INSERT INTO DB.T VALUES ('x', 1), ('X', 2)")
+    db_controller.commit(con.id)
+    query_id = db_controller.execute_query(con.id, f"SELECT COL1, COL2 FROM DB.T WHERE {where_clause}")
+    assert next(con.query_result[query_id]["result"]) == ("x", 1)
+    db_controller.close()
+
+
+@pytest.mark.parametrize(
+    "where_clause, expected, partitions",
+    [("D = 'd1'", [1], ["d1"]), ("D IN ('d2')", [2], ["d2"]), ("D = 'D1'", [3], ["D1"])],
+)
+def test_prune_partitions_with_lowercase_values(
+    tmp_path, monkeypatch, where_clause, expected, partitions
+):
+    monkeypatch.chdir(tmp_path)
+    db_controller = DBController(checkpoint_interval=60)
+    con = db_controller.connect()
+    db_controller.execute_query(con.id, "CREATE TABLE DB.T (D STRING, V INT) PARTITION BY (D)")
+    db_controller.execute_query(con.id, "INSERT INTO DB.T VALUES ('d1', 1), ('d2', 2), ('D1', 3)")
+    db_controller.commit(con.id)
+    query_id = db_controller.execute_query(con.id, f"SELECT V FROM DB.T WHERE {where_clause}")
+    assert [row[0] for row in con.query_result[query_id]["result"]] == expected
+    where = Parser(f"SELECT V FROM DB.T WHERE {where_clause}").parse().nodes.where_clause
+    filters, _ = split_predicate(where.expr)
+    part_paths = PartitionedTable(tmp_path / "DB" / "T").prune(filters, "STRING")
+    assert [path.parent.name for path in part_paths] == [f"D={value}" for value in partitions]
+    db_controller.close()
+
+
+def test_contradictory_where_clause_does_not_read_table(db_mock_var):
+    db_controller, con = db_mock_var
+    query_id = db_controller.execute_query(
+        con.id, "SELECT * FROM MISSING_DATABASE.MISSING_TABLE WHERE 1 = 2 * 1 AND col1 = 'A'"
+    )
+    assert next(con.query_result[query_id]["result"]) == ()
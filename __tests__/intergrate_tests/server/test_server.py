@@ -1,3 +1,4 @@
+import json
 import pytest
 
 
@@ -30,4 +31,38 @@ def test_return_400_when_not_provide_qeury():
     pass
 
 def test_return_400_when_not_provide_connection_id():
-    pass
\ No newline at end of file
+    pass
+
+
+def test_copy_upload_stream(mock_client, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    connect_id = json.loads(mock_client.get("http://127.0.0.1:8000/connect").content.decode())["connection_id"]
+    mock_client.post("http://127.0.0.1:8000/query", json={"connection_id": connect_id, "query": "CREATE TABLE TEST_DATABASE.TEST_LOAD (COL1 STRING, COL2 INT)"})
+    copy_res = mock_client.post(
+        "http://127.0.0.1:8000/copy/test_database/test_load",
+        params={"connection_id": connect_id},
+        content=iter([b"COL1,COL2\nA,", b"1\nB,2\n"]),
+    )
+    assert copy_res.status_code == 200
+    assert (tmp_path / "TEST_DATABASE" / "TEST_LOAD.csv").read_text() == "COL1,COL2\nA,1\nB,2\n"
+
+
+def test_database_opened_at_startup_with_configured_wal(tmp_path, monkeypatch):
+    from fastapi.testclient import TestClient
+    from dbcsv_server import server
+
+    monkeypatch.chdir(tmp_path)
+    wal_path = tmp_path / "logs" / "commits.wal"
+    wal_path.parent.mkdir()
+    monkeypatch.setenv(server.WAL_PATH_ENV, str(wal_path))
+    assert server.db_controller is None
+    with TestClient(server.app) as client:
+        connect_id = json.loads(client.get("http://127.0.0.1:8000/connect").content.decode())["connection_id"]
+        client.post("http://127.0.0.1:8000/query", json={"connection_id": connect_id, "query": "CREATE TABLE TEST_DATABASE.TEST_WAL (COL1 STRING)"})
+        client.post("http://127.0.0.1:8000/query", json={"connection_id": connect_id, "query": "INSERT INTO TEST_DATABASE.TEST_WAL VALUES ('a')"})
+        client.post("http://127.0.0.1:8000/commit", json={"connection_id": connect_id})
+        assert server.db_controller.wal.path == wal_path and wal_path.exists()
+    # Commits are applied on shutdown
+    assert server.db_controller is None
+    assert (tmp_path / "TEST_DATABASE" / "TEST_WAL.csv").read_text() == "COL1\na\n"
+    assert not (tmp_path / "dbcsv.wal").exists()
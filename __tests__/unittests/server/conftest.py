@@ -28,4 +28,23 @@ def caller():
     class Caller:
         data: any
         
-    return Caller(data=dict(A=1))
\ No newline at end of file
+    return Caller(data=dict(A=1))
+
+@pytest.fixture
+def mock_table(tmp_path, monkeypatch):
+    """
+    A TEST_DATABASE.TEST_TABLE of 25 rows in a temporary working directory
+    """
+    monkeypatch.chdir(tmp_path)
+    database = tmp_path / "TEST_DATABASE"
+    database.mkdir()
+    with open(database / "TEST_TABLE.csv", "w") as r:
+        r.write("COL1,COL2,COL3\n")
+        for i in range(25):
+            r.write(f"R{i},{i},{i * 1.5}\n")
+    with open(database / "meta.TEST_TABLE.csv", "w") as r:
+        r.write("column_name,column_type\n")
+        r.write("COL1,STRING\n")
+        r.write("COL2,INT\n")
+        r.write("COL3,FLOAT\n")
+    return database
@@ -0,0 +1,743 @@
+import os
+import time
+from pathlib import Path
+import pytest
+import numpy as np
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from dbcsv_server.connection import ConnectionIdentity
+from dbcsv_server.data_storage import FileManager, ScanFilter, Catalog
+from dbcsv_server.data_storage.index import load_index
+from dbcsv_server.data_storage.parallel_scan import byte_ranges
+from dbcsv_server.data_storage.block_storage import BlockStorage
+from dbcsv_server.data_storage.group_commit import GroupCommitWriter
+from dbcsv_server.data_storage.write_ahead_log import WriteAheadLog
+from dbcsv_server.data_storage.partition import PartitionedTable
+from dbcsv_server.data_storage.mmap_reader import _field_bytes
+from dbcsv_server.data_storage.buffer_pool import BufferPool
+from dbcsv_server.data_storage.shards import scan_shards
+
+
+def commit_insert(file_manager, con, database, table_name, rows, column_names=None):
+    """
+    INSERT committed to the write ahead log then checkpointed, the write path of the server
+    """
+    file_manager.wal.commit(
+        [file_manager.prepare_insert(con, database, table_name, column_names, rows)]
+    )
+    file_manager.checkpoint()
+
+
+def test_scan_file_return_fixed_size_batches(mock_table):
+    file_manager = FileManager(chunk_size=10)
+    batches = list(file_manager.scan_file(ConnectionIdentity(), "TEST_DATABASE", "TEST_TABLE"))
+    assert [len(batch) for batch in batches] == [10, 10, 5]
+
+
+def test_chunk_memory_bound_rows_per_batch(mock_table):
+    file_manager = FileManager(chunk_memory=30)
+    batches = file_manager.scan_file(ConnectionIdentity(), "TEST_DATABASE", "TEST_TABLE")
+    assert all(len(batch) <= 3 for batch in batches)
+
+
+def test_select_file_is_lazy(mock_table):
+    file_manager = FileManager(chunk_size=10)
+    rows = file_manager.select_file(ConnectionIdentity(), "TEST_DATABASE", "TEST_TABLE")
+    assert next(rows) == {"COL1": "R0", "COL2": 0, "COL3": 0.0}
+    assert len(list(rows)) == 24
+
+
+def test_scan_not_exists_table_raise_error(mock_table):
+    with pytest.raises(FileNotFoundError):
+        FileManager().scan_file(ConnectionIdentity(), "TEST_DATABASE", "NOT_EXISTS")
+
+
+def test_column_cache_built_on_first_scan(mock_table):
+    file_manager = FileManager(chunk_size=10)
+    rows = list(file_manager.select_file(ConnectionIdentity(), "TEST_DATABASE", "TEST_TABLE"))
+    assert (mock_table / "TEST_TABLE.cache" / "manifest.json").exists()
+    cached_rows = list(file_manager.select_file(ConnectionIdentity(), "TEST_DATABASE", "TEST_TABLE"))
+    assert cached_rows == rows
+
+
+def test_column_cache_invalid_after_csv_changed(mock_table):
+    file_manager = FileManager(chunk_size=10)
+    list(file_manager.select_file(ConnectionIdentity(), "TEST_DATABASE", "TEST_TABLE"))
+    with open(mock_table / "TEST_TABLE.csv", "a") as r:
+        r.write("NEW,100,1.0\n")
+    assert file_manager.column_cache.load(mock_table / "TEST_TABLE.csv") is None
+    rows = list(file_manager.select_file(ConnectionIdentity(), "TEST_DATABASE", "TEST_TABLE"))
+    assert rows[-1] == {"COL1": "NEW", "COL2": 100, "COL3": 1.0}
+
+
+@pytest.mark.parametrize("column_cache", [True, False])
+def test_scan_filters_pushed_down(mock_table, column_cache):
+    file_manager = FileManager(chunk_size=10, column_cache=column_cache)
+    filters = [ScanFilter("COL2", ">=", 12), ScanFilter("COL2", "<", 14)]
+    rows = list(
+        file_manager.select_file(ConnectionIdentity(), "TEST_DATABASE", "TEST_TABLE", filters)
+    )
+    assert [row["COL1"] for row in rows] == ["R12", "R13"]
+
+
+@pytest.mark.parametrize("column_cache", [True, False])
+@pytest.mark.parametrize(
+    "scan_filter",
+    [ScanFilter("COL3", "<>", 1.5), ScanFilter("COL1", "<>", "R0"), ScanFilter("COL2", "<>", 0)],
+)
+def test_scan_filter_never_match_null(mock_table, column_cache, scan_filter):
+    with open(mock_table / "TEST_TABLE.csv", "a") as r:
+        r.write(",,\n")
+    file_manager = FileManager(chunk_size=10, column_cache=column_cache)
+    rows = list(
+        file_manager.select_file(
+            ConnectionIdentity(), "TEST_DATABASE", "TEST_TABLE", [scan_filter]
+        )
+    )
+    assert len(rows) == 24
+    assert all(row[scan_filter.column] is not None for row in rows)
+
+
+@pytest.mark.parametrize("column_cache", [True, False])
+def test_scan_only_referenced_columns(mock_table, column_cache):
+    file_manager = FileManager(chunk_size=10, column_cache=column_cache)
+    rows = list(
+        file_manager.select_file(
+            ConnectionIdentity(),
+            "TEST_DATABASE",
+            "TEST_TABLE",
+            [ScanFilter("COL2", "=", 3)],
+            ["COL1"],
+        )
+    )
+    assert rows == [{"COL1": "R3", "COL2": 3}]
+
+
+def test_scan_not_exists_column_raise_error(mock_table):
+    with pytest.raises(ValueError):
+        FileManager().scan_file(
+            ConnectionIdentity(), "TEST_DATABASE", "TEST_TABLE", columns=["NOT_EXISTS"]
+        )
+
+
+def test_table_schema_read_from_meta_file(mock_table):
+    schema = FileManager().table_schema("TEST_DATABASE", "TEST_TABLE")
+    assert schema == {"COL1": "STRING", "COL2": "INT", "COL3": "FLOAT"}
+
+
+@pytest.mark.parametrize(
+    "column_cache, reader", [(True, "pandas"), (False, "pandas"), (False, "mmap")]
+)
+def test_scan_report_value_mismatch_column_type(mock_table, column_cache, reader):
+    with open(mock_table / "TEST_TABLE.csv", "a") as r:
+        r.write("BAD,abc,1.0\n")
+    file_manager = FileManager(chunk_size=10, column_cache=column_cache, reader=reader)
+    with pytest.raises(ValueError, match="Column COL2 expects INT got 'abc' at row 26"):
+        list(file_manager.select_file(ConnectionIdentity(), "TEST_DATABASE", "TEST_TABLE"))
+
+
+def test_catalog_serve_schema_from_memory(mock_table):
+    catalog = Catalog(ttl=60)
+    assert catalog.schema("TEST_DATABASE", "TEST_TABLE")["COL2"] == "INT"
+    with open(mock_table / "meta.TEST_TABLE.csv", "a") as r:
+        r.write("COL4,STRING\n")
+    assert "COL4" not in catalog.schema("TEST_DATABASE", "TEST_TABLE")
+    catalog.invalidate("TEST_DATABASE", "TEST_TABLE")
+    assert catalog.schema("TEST_DATABASE", "TEST_TABLE")["COL4"] == "STRING"
+
+
+def test_catalog_refresh_entry_when_file_changed(mock_table):
+    catalog = Catalog(ttl=0)
+    assert not catalog.exists("TEST_DATABASE", "NEW_TABLE")
+    (mock_table / "NEW_TABLE.csv").write_text("COL1\n")
+    assert catalog.exists("TEST_DATABASE", "NEW_TABLE")
+    entry = catalog.table("TEST_DATABASE", "TEST_TABLE")
+    with open(mock_table / "TEST_TABLE.csv", "a") as r:
+        r.write("NEW,100,1.0\n")
+    assert catalog.table("TEST_DATABASE", "TEST_TABLE").size > entry.size
+
+
+def test_zone_map_skip_blocks_out_of_range(mock_table):
+    file_manager = FileManager(chunk_size=100, block_rows=5)
+    list(file_manager.scan_file(ConnectionIdentity(), "TEST_DATABASE", "TEST_TABLE"))
+    cached_table = file_manager.column_cache.load(mock_table / "TEST_TABLE.csv")
+    assert cached_table.zone_map.zones["COL2"][1] == [5, 9, 0]
+    assert cached_table.zone_map.candidate_ranges([ScanFilter("COL2", ">", 17)]) == [(15, 25)]
+    batches = list(
+        file_manager.scan_file(
+            ConnectionIdentity(), "TEST_DATABASE", "TEST_TABLE", [ScanFilter("COL2", "=", 7)]
+        )
+    )
+    assert [len(batch) for batch in batches] == [1]
+
+
+def test_hash_index_answer_equality_filter(mock_table):
+    file_manager = FileManager(chunk_size=10)
+    con = ConnectionIdentity()
+    file_manager.create_index(con, "TEST_DATABASE", "TEST_TABLE", "IDX_COL2", "COL2")
+    assert (mock_table / "TEST_TABLE.index" / "IDX_COL2.json").exists()
+    filters = [ScanFilter("COL2", "=", 7.0), ScanFilter("COL3", ">", 0)]
+    rows = list(file_manager.select_file(con, "TEST_DATABASE", "TEST_TABLE", filters, ["COL1"]))
+    assert rows == [{"COL1": "R7", "COL2": 7, "COL3": 10.5}]
+    with pytest.raises(ValueError):
+        file_manager.create_index(con, "TEST_DATABASE", "TEST_TABLE", "IDX_COL2", "COL2")
+
+
+def test_hash_index_stored_as_arrays(mock_table):
+    file_manager = FileManager(chunk_size=10)
+    con = ConnectionIdentity()
+    with open(mock_table / "TEST_TABLE.csv", "a") as r:
+        r.write("R3,3,\n,30,\n")
+    file_manager.create_index(con, "TEST_DATABASE", "TEST_TABLE", "IDX_COL1", "COL1")
+    index = load_index(mock_table / "TEST_TABLE.index" / "IDX_COL1.json")
+    assert isinstance(index.keys.data, np.memmap) and len(index.keys) == 25
+    assert list(index.offsets[:2]) == [0, 1] and index.offsets[-1] == 26
+    assert list(index.rows([ScanFilter("COL1", "=", "R3")])) == [3, 25]
+    assert len(index.rows([ScanFilter("COL1", "=", "R99")])) == 0
+    assert len(index.rows([ScanFilter("COL1", "=", 3.0)])) == 0
+    # Open addressing table at most half full, one slot per key
+    assert isinstance(index.slots, np.memmap) and len(index.slots) == 64
+    assert sorted(index.slots[index.slots >= 0]) == list(range(25))
+    for array_file in (mock_table / "TEST_TABLE.index").glob("IDX_COL1.*/*.npy"):
+        np.load(array_file, allow_pickle=False)
+
+
+def test_hash_index_probes_every_key(mock_table):
+    file_manager = FileManager(chunk_size=100)
+    con = ConnectionIdentity()
+    with open(mock_table / "TEST_TABLE.csv", "a") as r:
+        r.writelines(f"R{i},{i % 3000},1.0\n" for i in range(25, 3025))
+    file_manager.create_index(con, "TEST_DATABASE", "TEST_TABLE", "IDX_COL2", "COL2")
+    index = load_index(mock_table / "TEST_TABLE.index" / "IDX_COL2.json")
+    for value in range(3000):
+        positions = index.rows([ScanFilter("COL2", "=", value)])
+        assert len(positions) == (2 if value < 25 else 1)
+    assert len(index.rows([ScanFilter("COL2", "=", 7.0)])) == 2
+    assert len(index.rows([ScanFilter("COL2", "=", 7.5)])) == 0
+    assert len(index.rows([ScanFilter("COL2", "=", "7")])) == 0
+
+
+def test_column_cache_size_of_wide_strings(mock_table):
+    file_manager = FileManager(chunk_size=10)
+    con = ConnectionIdentity()
+    wide = "é" * 100_000
+    with open(mock_table / "TEST_TABLE.csv", "a") as r:
+        r.write(f"{wide},25,\n")
+        r.writelines(f"R{i},{i},1.0\n" for i in range(26, 2000))
+    file_manager.create_index(con, "TEST_DATABASE", "TEST_TABLE", "IDX_COL1", "COL1")
+    csv_size = (mock_table / "TEST_TABLE.csv").stat().st_size
+    for folder in ("TEST_TABLE.cache", "TEST_TABLE.index"):
+        size = sum(p.stat().st_size for p in (mock_table / folder).rglob("*") if p.is_file())
+        assert size < 4 * csv_size
+    with open(mock_table / "TEST_TABLE.csv", "a") as r:
+        r.write(f"{wide}!,2000,\n")
+    filters = [ScanFilter("COL1", "=", wide)]
+    rows = list(file_manager.select_file(con, "TEST_DATABASE", "TEST_TABLE", filters))
+    assert [row["COL2"] for row in rows] == [25]
+    filters = [ScanFilter("COL2", ">", 1998)]
+    rows = list(file_manager.select_file(con, "TEST_DATABASE", "TEST_TABLE", filters))
+    assert [row["COL1"] for row in rows] == ["R1999", f"{wide}!"]
+
+
+def test_hash_index_rebuilt_after_csv_changed(mock_table):
+    file_manager = FileManager(chunk_size=10)
+    con = ConnectionIdentity()
+    file_manager.create_index(con, "TEST_DATABASE", "TEST_TABLE", "IDX_COL1", "COL1")
+    with open(mock_table / "TEST_TABLE.csv", "a") as r:
+        r.write("R3,100,1.0\n")
+    filters = [ScanFilter("COL1", "=", "R3")]
+    rows = list(FileManager().select_file(con, "TEST_DATABASE", "TEST_TABLE", filters))
+    assert [row["COL2"] for row in rows] == [3, 100]
+
+
+def test_column_cache_extended_with_appended_rows(mock_table):
+    file_manager = FileManager(chunk_size=10, block_rows=10, wal=WriteAheadLog(Path("dbcsv.wal")))
+    con = ConnectionIdentity()
+    file_manager.create_index(con, "TEST_DATABASE", "TEST_TABLE", "IDX_COL2", "COL2", "BTREE")
+    version = file_manager.column_cache.load(mock_table / "TEST_TABLE.csv").columns[0]._values_path.parent
+    commit_insert(
+        file_manager, con, "TEST_DATABASE", "TEST_TABLE", [("R3", 100, None), ("R3", -1, 2.5)]
+    )
+    rows = list(file_manager.select_file(con, "TEST_DATABASE", "TEST_TABLE"))
+    assert [(row["COL1"], row["COL2"]) for row in rows[25:]] == [("R3", 100), ("R3", -1)]
+    assert pd.isna(rows[25]["COL3"]) and rows[26]["COL3"] == 2.5
+    cached_table = file_manager.column_cache.load(mock_table / "TEST_TABLE.csv")
+    # The appended rows go into a new version folder, the previous one is removed
+    assert cached_table.columns[0]._values_path.parent != version
+    assert not version.exists()
+    assert cached_table.zone_map.row_count == 27
+    filters = [ScanFilter("COL2", "<", 1)]
+    rows = list(file_manager.select_file(con, "TEST_DATABASE", "TEST_TABLE", filters))
+    assert [row["COL2"] for row in rows] == [0, -1]
+    index = file_manager.indexes.indexes(mock_table / "TEST_TABLE.csv")["IDX_COL2"]
+    assert list(index.positions[:2]) == [26, 0] and index.keys[-1] == 100
+    # A rewritten prefix is not an append, the cache is built again
+    (mock_table / "TEST_TABLE.csv").write_text("COL1,COL2,COL3\nX,1,1.0\nY,2,2.0\nZ,3,3.0\n")
+    rows = list(FileManager().select_file(con, "TEST_DATABASE", "TEST_TABLE"))
+    assert [row["COL1"] for row in rows] == ["X", "Y", "Z"]
+
+
+def test_column_cache_rebuilt_after_rewrite_then_append(mock_table):
+    csv_path = mock_table / "TEST_TABLE.csv"
+    csv_path.write_text(
+        "COL1,COL2,COL3\n" + "".join(f"R{i},{i},{i * 1.5}\n" for i in range(1000, 3000))
+    )
+    file_manager = FileManager(chunk_size=100, wal=WriteAheadLog(Path("dbcsv.wal")))
+    con = ConnectionIdentity()
+    list(file_manager.select_file(con, "TEST_DATABASE", "TEST_TABLE"))
+    # A middle row rewritten in place outside of the server, size and ends of the csv are kept
+    csv_path.write_text(csv_path.read_text().replace("R2000,2000,", "R2000,9999,"))
+    commit_insert(file_manager, con, "TEST_DATABASE", "TEST_TABLE", [("R3000", 3000, 1.0)])
+    filters = [ScanFilter("COL2", "=", 9999)]
+    rows = list(file_manager.select_file(con, "TEST_DATABASE", "TEST_TABLE", filters))
+    assert [row["COL1"] for row in rows] == ["R2000"]
+
+
+def test_sorted_index_answer_range_filters(mock_table):
+    file_manager = FileManager(chunk_size=10)
+    con = ConnectionIdentity()
+    file_manager.create_index(con, "TEST_DATABASE", "TEST_TABLE", "IDX_COL3", "COL3", "BTREE")
+    index = file_manager.indexes.indexes(mock_table / "TEST_TABLE.csv")["IDX_COL3"]
+    filters = [ScanFilter("COL3", ">", 3.0), ScanFilter("COL3", "<=", 9.0)]
+    assert sorted(index.rows(filters)) == [3, 4, 5, 6]
+    filters = [ScanFilter("COL3", ">=", 33.0), ScanFilter("COL2", "<>", 23)]
+    rows = list(file_manager.select_file(con, "TEST_DATABASE", "TEST_TABLE", filters))
+    assert [row["COL2"] for row in rows] == [22, 24]
+    # Not selective enough, the scan is used
+    filters = [ScanFilter("COL3", ">", 0)]
+    assert file_manager.indexes.lookup(
+        mock_table / "TEST_TABLE.csv",
+        file_manager.column_cache.load(mock_table / "TEST_TABLE.csv"),
+        filters,
+        index.size,
+        index.mtime_ns,
+    ) is None
+
+
+def test_sorted_index_scan_ordered(mock_table):
+    file_manager = FileManager(chunk_size=10)
+    con = ConnectionIdentity()
+    assert file_manager.scan_ordered(con, "TEST_DATABASE", "TEST_TABLE", "COL1") is None
+    file_manager.create_index(con, "TEST_DATABASE", "TEST_TABLE", "IDX_COL1", "COL1", "BTREE")
+    batches = file_manager.scan_ordered(
+        con, "TEST_DATABASE", "TEST_TABLE", "COL1", descending=True, columns=["COL1"]
+    )
+    values = [value for batch in batches for value in batch["COL1"]]
+    assert values == sorted(f"R{i}" for i in range(25))[::-1]
+
+
+def test_byte_ranges_aligned_on_lines(mock_table):
+    file_path = mock_table / "TEST_TABLE.csv"
+    header_size, ranges = byte_ranges(file_path, 20)
+    content = file_path.read_bytes()
+    assert content[:header_size] == b"COL1,COL2,COL3\n"
+    assert ranges[0][0] == header_size and ranges[-1][1] == len(content)
+    assert all(content[stop - 1 : stop] == b"\n" for _, stop in ranges)
+    assert all(a[1] == b[0] for a, b in zip(ranges, ranges[1:]))
+
+
+@pytest.mark.parametrize("column_cache", [True, False])
+def test_parallel_scan_match_serial_scan(mock_table, column_cache):
+    file_manager = FileManager(chunk_size=4, column_cache=column_cache, parallel_degree=2)
+    con = ConnectionIdentity()
+    filters = [ScanFilter("COL2", ">", 5)]
+    try:
+        rows = list(file_manager.select_file(con, "TEST_DATABASE", "TEST_TABLE", filters))
+        unordered = list(
+            file_manager.select_file(
+                con, "TEST_DATABASE", "TEST_TABLE", filters, ordered=False
+            )
+        )
+    finally:
+        file_manager.close()
+    serial = FileManager(column_cache=False)
+    assert rows == list(serial.select_file(con, "TEST_DATABASE", "TEST_TABLE", filters))
+    assert sorted(unordered, key=lambda row: row["COL2"]) == rows
+
+
+@pytest.mark.parametrize(
+    "filters, columns",
+    [
+        (None, None),
+        ([ScanFilter("COL2", ">=", 20)], ["COL1"]),
+        ([ScanFilter("COL1", "=", "R3"), ScanFilter("COL3", "<", 5)], ["COL2"]),
+    ],
+)
+def test_mmap_reader_match_pandas_reader(mock_table, filters, columns):
+    with open(mock_table / "TEST_TABLE.csv", "a") as r:
+        r.write("\nR25,,\r\nR26,26,39.0")
+    con = ConnectionIdentity()
+    expected = FileManager(chunk_size=10, column_cache=False).select_file(
+        con, "TEST_DATABASE", "TEST_TABLE", filters, columns
+    )
+    rows = FileManager(chunk_size=10, column_cache=False, reader="mmap").select_file(
+        con, "TEST_DATABASE", "TEST_TABLE", filters, columns
+    )
+    assert str(list(rows)) == str(list(expected))
+
+
+@pytest.mark.parametrize("filters", [None, [ScanFilter("COL1", "<>", "R3")]])
+def test_mmap_reader_gather_wide_fields_one_by_one(mock_table, filters):
+    wide = "é" * 100_000
+    with open(mock_table / "TEST_TABLE.csv", "a") as r:
+        r.write(f"{wide},{10 ** 12},1.5\n")
+    buffer = np.frombuffer((mock_table / "TEST_TABLE.csv").read_bytes(), dtype=np.uint8)
+    starts, ends = np.array([0] * 10 + [5]), np.array([4] * 10 + [len(buffer)])
+    values, _ = _field_bytes(buffer, starts, ends)
+    assert values.dtype == object and values[0] == b"COL1" and len(values[-1]) == len(buffer) - 5
+    con = ConnectionIdentity()
+    expected = FileManager(chunk_size=30, column_cache=False).select_file(
+        con, "TEST_DATABASE", "TEST_TABLE", filters
+    )
+    rows = FileManager(chunk_size=30, column_cache=False, reader="mmap").select_file(
+        con, "TEST_DATABASE", "TEST_TABLE", filters
+    )
+    assert str(list(rows)) == str(list(expected))
+
+
+@pytest.mark.parametrize("parallel_degree", [1, 3])
+def test_compressed_table_scan_only_matching_blocks(mock_table, parallel_degree):
+    file_manager = FileManager(block_rows=5)
+    con = ConnectionIdentity()
+    cols_def = [
+        {"column_name": "COL1", "column_type": "STRING"},
+        {"column_name": "COL2", "column_type": "INT"},
+    ]
+    file_path = file_manager.create_table_file(con, "TEST_DATABASE", "PACKED", cols_def, "ZLIB")
+    assert file_path.name == "PACKED.blocks"
+    block_storage = BlockStorage(file_path)
+    block_storage.append(
+        pd.DataFrame({"COL1": [f"R{i}" for i in range(23)], "COL2": range(23)}),
+        block_rows=5,
+        dtype={"COL2": "Int64"},
+    )
+    assert len(block_storage.load_index()["blocks"]) == 5
+    filters = [ScanFilter("COL2", ">=", 8), ScanFilter("COL2", "<", 12)]
+    assert len(block_storage.candidate_blocks(filters)) == 2
+    rows = list(
+        file_manager.select_file(
+            con, "TEST_DATABASE", "PACKED", filters, parallel_degree=parallel_degree
+        )
+    )
+    assert rows == [{"COL1": f"R{i}", "COL2": i} for i in range(8, 12)]
+    all_rows = list(
+        file_manager.select_file(con, "TEST_DATABASE", "PACKED", parallel_degree=parallel_degree)
+    )
+    assert [row["COL2"] for row in all_rows] == list(range(23))
+
+
+def test_buffer_pool_shares_decoded_blocks(mock_table):
+    buffer_pool = BufferPool()
+    file_manager = FileManager(
+        block_rows=5, buffer_pool=buffer_pool, wal=WriteAheadLog(Path("dbcsv.wal"))
+    )
+    con = ConnectionIdentity()
+    cols_def = [
+        {"column_name": "COL1", "column_type": "STRING"},
+        {"column_name": "COL2", "column_type": "INT"},
+    ]
+    file_manager.create_table_file(con, "TEST_DATABASE", "PACKED", cols_def, "ZLIB")
+    commit_insert(file_manager, con, "TEST_DATABASE", "PACKED", [(f"R{i}", i) for i in range(12)])
+    filters = [ScanFilter("COL2", ">=", 8)]
+    rows = list(file_manager.select_file(con, "TEST_DATABASE", "PACKED", filters, ["COL2"]))
+    assert buffer_pool.stats()["misses"] == 2
+    assert list(file_manager.select_file(con, "TEST_DATABASE", "PACKED", filters, ["COL2"])) == rows
+    assert buffer_pool.stats()["hits"] == 2
+    all_rows = list(file_manager.select_file(con, "TEST_DATABASE", "PACKED"))
+    assert all_rows == [{"COL1": f"R{i}", "COL2": i} for i in range(12)]
+    assert buffer_pool.stats()["blocks"] == 6
+
+
+def test_buffer_pool_evicts_least_recently_used_unpinned():
+    buffer_pool = BufferPool(capacity=20)
+    buffer_pool.put(("T", "A", 0), "a", 10)
+    buffer_pool.unpin(buffer_pool.put(("T", "A", 1), "b", 10))
+    buffer_pool.unpin(buffer_pool.put(("T", "A", 2), "c", 10))
+    # Block 0 is still pinned, the least recently used unpinned block goes
+    assert buffer_pool.get(("T", "A", 1)) is None
+    assert buffer_pool.get(("T", "A", 0)).value == "a"
+    assert buffer_pool.put(("T", "A", 3), "d", 30) is None
+    buffer_pool.invalidate("T")
+    # Block 0 is pinned twice, its bytes are counted until it is released
+    stats = buffer_pool.stats()
+    assert stats["size"] == 10 and stats["blocks"] == 0
+
+
+def test_buffer_pool_invalidate_then_reuse_key():
+    buffer_pool = BufferPool(capacity=100)
+    key = ("T", "A", 0)
+    old = buffer_pool.put(key, "old", 10)
+    buffer_pool.invalidate("T")
+    new = buffer_pool.put(key, "new", 10)
+    assert new is not old and buffer_pool.stats()["size"] == 20
+    # Releasing the old frame leaves the pins of the new one
+    buffer_pool.unpin(old)
+    buffer_pool.unpin(old)
+    assert buffer_pool.stats()["size"] == 10 and new.pins == 1
+    buffer_pool.unpin(new)
+    assert buffer_pool.get(key).value == "new"
+
+
+def test_buffer_pool_invalidate_while_pinned_concurrently():
+    buffer_pool = BufferPool(capacity=1000)
+    key = ("T", "A", 0)
+    values = []
+
+    def read(i):
+        for _ in range(300):
+            frame = buffer_pool.get(key) or buffer_pool.put(key, [i], 10)
+            if i % 2 == 0:
+                buffer_pool.invalidate("T")
+            # An invalidated frame keeps its value for the reader holding it
+            values.append(frame.value[0])
+            buffer_pool.unpin(frame)
+
+    with ThreadPoolExecutor(8) as executor:
+        list(executor.map(read, range(8)))
+    assert len(values) == 2400
+    stats = buffer_pool.stats()
+    assert stats["size"] == 10 * stats["blocks"]
+    buffer_pool.invalidate("T")
+    assert buffer_pool.stats()["size"] == 0
+
+
+def test_committed_insert_append_to_csv(mock_table):
+    file_manager = FileManager(chunk_size=10, wal=WriteAheadLog(Path("dbcsv.wal")))
+    con = ConnectionIdentity()
+    list(file_manager.select_file(con, "TEST_DATABASE", "TEST_TABLE"))
+    # Last line without terminator
+    with open(mock_table / "TEST_TABLE.csv", "rb+") as r:
+        r.truncate(r.seek(0, 2) - 1)
+    commit_insert(
+        file_manager,
+        con,
+        "TEST_DATABASE",
+        "TEST_TABLE",
+        [(25.0, "a,b"), (26, None)],
+        ["COL2", "COL1"],
+    )
+    rows = list(file_manager.select_file(con, "TEST_DATABASE", "TEST_TABLE"))
+    assert len(rows) == 27
+    assert rows[-2]["COL1"] == "a,b" and rows[-2]["COL2"] == 25
+    assert rows[-1]["COL2"] == 26 and pd.isna(rows[-1]["COL1"])
+    with pytest.raises(ValueError, match="Column COL2 expects INT got '1.5'"):
+        file_manager.prepare_insert(con, "TEST_DATABASE", "TEST_TABLE", None, [("x", 1.5, 1)])
+
+
+def test_group_commit_concurrent_table_appends(mock_table):
+    file_manager = FileManager(writer=GroupCommitWriter(max_delay=0.05))
+    flushes = []
+    append_csv = file_manager._append_csv
+
+    def record_flush(entry, items):
+        flushes.append(items)
+        append_csv(entry, items)
+
+    file_manager._append_csv = record_flush
+    entry = file_manager.catalog.table("TEST_DATABASE", "TEST_TABLE")
+    header = file_manager._table_header(entry)
+
+    def append(i):
+        file_manager._write_records(entry, header, [[f"T{i}", i, i]])
+
+    with ThreadPoolExecutor(8) as executor:
+        list(executor.map(append, range(100, 116)))
+    assert sum(len(items) for items in flushes) == 16
+    assert len(flushes) < 16
+    rows = list(file_manager.select_file(ConnectionIdentity(), "TEST_DATABASE", "TEST_TABLE"))
+    assert sorted(row["COL2"] for row in rows[25:]) == list(range(100, 116))
+
+
+def test_write_ahead_log_group_commit_concurrent_commits(mock_table, monkeypatch):
+    wal = WriteAheadLog(Path("dbcsv.wal"), GroupCommitWriter(max_delay=0.05))
+    syncs = []
+    fsync = os.fsync
+    monkeypatch.setattr(os, "fsync", lambda fd: syncs.append(fd) or fsync(fd))
+
+    def commit(i):
+        return wal.commit([("TEST_DATABASE", "TEST_TABLE", [[f"T{i}", i, i]])])
+
+    with ThreadPoolExecutor(8) as executor:
+        lsns = list(executor.map(commit, range(100, 116)))
+    assert sorted(lsns) == list(range(1, 17))
+    assert len(syncs) < 16
+    wal.close()
+    file_manager = FileManager(wal=WriteAheadLog(Path("dbcsv.wal")))
+    assert [lsn for lsn, _ in file_manager.wal.pending()] == list(range(1, 17))
+    rows = list(file_manager.select_file(ConnectionIdentity(), "TEST_DATABASE", "TEST_TABLE"))
+    assert sorted(row["COL2"] for row in rows[25:]) == list(range(100, 116))
+
+
+def test_committed_insert_into_compressed_table(mock_table):
+    file_manager = FileManager(block_rows=2, wal=WriteAheadLog(Path("dbcsv.wal")))
+    con = ConnectionIdentity()
+    cols_def = [
+        {"column_name": "COL1", "column_type": "STRING"},
+        {"column_name": "COL2", "column_type": "INT"},
+    ]
+    file_manager.create_table_file(con, "TEST_DATABASE", "PACKED", cols_def, "LZMA")
+    commit_insert(file_manager, con, "TEST_DATABASE", "PACKED", [("A", 1), ("B", None), ("C", 3)])
+    rows = list(file_manager.select_file(con, "TEST_DATABASE", "PACKED"))
+    assert [row["COL1"] for row in rows] == ["A", "B", "C"]
+    assert rows[1]["COL2"] is None
+
+
+def test_copy_from_validates_then_appends_once(mock_table):
+    file_manager = FileManager(chunk_size=2)
+    con = ConnectionIdentity()
+    file_manager.create_index(con, "TEST_DATABASE", "TEST_TABLE", "IDX_COL2", "COL2", "BTREE")
+    source = mock_table / "load.csv"
+    source.write_text("COL2,COL1\n100,aB\n101,\n102,c\n")
+    assert file_manager.copy_from(con, "TEST_DATABASE", "TEST_TABLE", source) == 3
+    entry = file_manager.catalog.table("TEST_DATABASE", "TEST_TABLE")
+    index = file_manager.indexes.indexes(entry.file_path)["IDX_COL2"]
+    assert not index.is_stale(entry.size, entry.mtime_ns)
+    rows = list(
+        file_manager.select_file(con, "TEST_DATABASE", "TEST_TABLE", [ScanFilter("COL2", ">=", 100)])
+    )
+    assert [row["COL1"] for row in rows[::2]] == ["aB", "c"]
+    assert pd.isna(rows[1]["COL1"]) and pd.isna(rows[1]["COL3"])
+    size = entry.size
+    source.write_text("COL2\n103\n1.5\n")
+    with pytest.raises(ValueError, match="Column COL2 expects INT got '1.5' at row 2"):
+        file_manager.copy_from(con, "TEST_DATABASE", "TEST_TABLE", source)
+    assert file_manager.catalog.table("TEST_DATABASE", "TEST_TABLE").size == size
+    assert not list(mock_table.glob("*.load"))
+
+
+def test_copy_from_into_compressed_table(mock_table):
+    file_manager = FileManager(block_rows=2)
+    con = ConnectionIdentity()
+    cols_def = [
+        {"column_name": "COL1", "column_type": "STRING"},
+        {"column_name": "COL2", "column_type": "INT"},
+    ]
+    file_manager.create_table_file(con, "TEST_DATABASE", "PACKED", cols_def, "ZLIB")
+    source = mock_table / "load.csv"
+    source.write_text("COL1,COL2\nA,1\nB,\nC,3\n")
+    with open(source, "rb") as f:
+        assert file_manager.copy_from(con, "TEST_DATABASE", "PACKED", f) == 3
+    assert len(BlockStorage(mock_table / "PACKED.blocks").candidate_blocks()) == 2
+    rows = list(file_manager.select_file(con, "TEST_DATABASE", "PACKED"))
+    assert [row["COL1"] for row in rows] == ["A", "B", "C"]
+    assert rows[1]["COL2"] is None
+
+
+def test_write_ahead_log_recovery(mock_table):
+    wal_path = mock_table / "dbcsv.wal"
+    wal = WriteAheadLog(wal_path)
+    wal.commit([("TEST_DATABASE", "TEST_TABLE", [["X", 100, 1.0]])])
+    wal.commit([("TEST_DATABASE", "TEST_TABLE", [["Y", 101, None]])])
+    # Crash in the middle of the apply of the first commit
+    size = (mock_table / "TEST_TABLE.csv").stat().st_size
+    wal.begin_apply(1, {"TEST_DATABASE.TEST_TABLE": size})
+    with open(mock_table / "TEST_TABLE.csv", "a") as f:
+        f.write("X,1")
+    wal.close()
+    with open(wal_path, "ab") as f:
+        f.write(b"\x00\x00\x00\x09torn")
+    file_manager = FileManager(wal=WriteAheadLog(wal_path))
+    assert [lsn for lsn, _ in file_manager.wal.pending()] == [1, 2]
+    rows = list(file_manager.select_file(ConnectionIdentity(), "TEST_DATABASE", "TEST_TABLE"))
+    assert [row["COL2"] for row in rows[25:]] == [100, 101]
+    assert not file_manager.wal.has_pending()
+    assert wal_path.stat().st_size == 0
+
+
+def test_partitioned_table_scans_matching_partitions(mock_table):
+    file_manager = FileManager(wal=WriteAheadLog(Path("dbcsv.wal")))
+    con = ConnectionIdentity()
+    cols_def = [
+        {"column_name": "DAY", "column_type": "INT"},
+        {"column_name": "TENANT", "column_type": "STRING"},
+    ]
+    folder = file_manager.create_table_file(
+        con, "TEST_DATABASE", "EVENTS", cols_def, partition_by="TENANT"
+    )
+    commit_insert(file_manager, con, "TEST_DATABASE", "EVENTS", [(1, "a/b"), (2, "c"), (3, None)])
+    source = mock_table / "load.csv"
+    source.write_text("TENANT,DAY\nc,4\nd,5\n")
+    assert file_manager.copy_from(con, "TEST_DATABASE", "EVENTS", source) == 2
+    assert sorted(p.name for p in folder.iterdir() if p.is_dir()) == [
+        "TENANT=__NULL__", "TENANT=a%2Fb", "TENANT=c", "TENANT=d"
+    ]
+    tenant_filter = ScanFilter("TENANT", "IN", ("c", "a/b"))
+    part_paths = PartitionedTable(folder).prune([tenant_filter], "STRING")
+    assert [path.parent.name for path in part_paths] == ["TENANT=a%2Fb", "TENANT=c", "TENANT=c"]
+    rows = list(file_manager.select_file(con, "TEST_DATABASE", "EVENTS", [tenant_filter]))
+    assert sorted(row["DAY"] for row in rows) == [1, 2, 4]
+    assert len(list(file_manager.select_file(con, "TEST_DATABASE", "EVENTS"))) == 5
+
+
+def test_analyze_table_statistics(mock_table):
+    file_manager = FileManager(wal=WriteAheadLog(Path("dbcsv.wal")))
+    con = ConnectionIdentity()
+    statistics = file_manager.analyze_table(con, "TEST_DATABASE", "TEST_TABLE")
+    assert (mock_table / "stats.TEST_TABLE.json").exists()
+    assert statistics.row_count == 25
+    assert statistics.columns["COL2"].distinct == 25
+    assert statistics.columns["COL2"].null_fraction == 0.0
+    assert statistics.estimate_rows([ScanFilter("COL2", "<", 10)]) == 10
+    assert statistics.estimate_rows([ScanFilter("COL2", "=", 3)]) == 1
+    stored = file_manager.table_statistics("TEST_DATABASE", "TEST_TABLE")
+    assert stored.row_count == 25 and stored.columns["COL2"].histogram[-1] == 24
+    commit_insert(file_manager, con, "TEST_DATABASE", "TEST_TABLE", [("X", 100, 1.0)])
+    assert file_manager.table_statistics("TEST_DATABASE", "TEST_TABLE") is None
+
+
+@pytest.mark.parametrize("shard_workers", [1, 3])
+def test_sharded_table_scans_every_shard(mock_table, shard_workers):
+    file_manager = FileManager(
+        chunk_size=2, shard_workers=shard_workers, wal=WriteAheadLog(Path("dbcsv.wal"))
+    )
+    con = ConnectionIdentity()
+    cols_def = [
+        {"column_name": "HOUR", "column_type": "INT"},
+        {"column_name": "VALUE", "column_type": "STRING"},
+    ]
+    folder = file_manager.create_table_file(con, "TEST_DATABASE", "EVENTS", cols_def, "SHARDS")
+    for hour in range(4):
+        rows = "".join(f"v{i},{hour}\n" for i in range(3))
+        (folder / f"hour-{hour}.csv").write_text(f"VALUE,HOUR\n{rows}")
+    (folder / ".hour-4.csv").write_text("VALUE,HOUR\nv0,4\n")
+    commit_insert(file_manager, con, "TEST_DATABASE", "EVENTS", [(5, "v0")])
+    rows = list(file_manager.select_file(con, "TEST_DATABASE", "EVENTS"))
+    assert [row["HOUR"] for row in rows] == [0, 0, 0, 1, 1, 1, 2, 2, 2, 3, 3, 3, 5]
+    filters = [ScanFilter("VALUE", "=", "v1")]
+    batches = file_manager.scan_file(con, "TEST_DATABASE", "EVENTS", filters, ordered=False)
+    assert sorted(hour for batch in batches for hour in batch["HOUR"]) == [0, 1, 2, 3]
+
+
+@pytest.mark.parametrize(
+    "storage, occupied", [("CSV", "BROKEN.csv"), ("SHARDS", "BROKEN"), ("ZLIB", "BROKEN.blocks")]
+)
+def test_create_table_file_raise_error_when_failed(mock_table, storage, occupied):
+    # A directory where the table file goes, a file where the shards folder goes
+    path = Path("TEST_DATABASE") / occupied
+    if storage == "SHARDS":
+        path.write_text("")
+    else:
+        path.mkdir()
+    file_manager = FileManager()
+    cols_def = [{"column_name": "COL1", "column_type": "STRING"}]
+    with pytest.raises(RuntimeError, match="Unable to create table file"):
+        file_manager.create_table_file(ConnectionIdentity(), "TEST_DATABASE", "BROKEN", cols_def, storage)
+    assert not (Path("TEST_DATABASE") / "meta.BROKEN.csv").exists()
+
+
+def test_scan_shards_stops_workers_when_abandoned(tmp_path):
+    scanned = []
+
+    def scan(shard):
+        for i in range(100):
+            scanned.append(shard)
+            yield pd.DataFrame({"SHARD": [shard.name], "I": [i]})
+
+    shards = [tmp_path / f"{i}.csv" for i in range(4)]
+    batches = scan_shards(scan, shards, workers=2)
+    assert next(batches)["SHARD"][0] == "0.csv"
+    batches.close()
+    time.sleep(0.3)
+    count = len(scanned)
+    time.sleep(0.3)
+    assert len(scanned) == count < 400
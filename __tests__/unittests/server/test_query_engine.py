@@ -0,0 +1,311 @@
+import pytest
+import pandas as pd
+from dbcsv_server.query_engine.parser import Parser
+from dbcsv_server.query_engine.planner import (
+    split_predicate, referenced_columns, Insertion, BulkLoad,
+    TableAnalysis, plan_parallel_degree, compile_expression, compile_predicate,
+    compile_batch_expression, compile_batch_predicate, Production, Selection, Projection,
+    Planner, reorder_predicate, plan_index_scan, simplify_predicate,
+)
+from dbcsv_server.query_engine.planner.node_handler.column_list_handler import ColumnListHandler
+from dbcsv_server.data_storage.scan_filter import ScanFilter
+from dbcsv_server.data_storage.statistics import TableStatistics, ColumnStatistics
+
+
+def where_clause(query: str):
+    return Parser(query).parse().nodes.where_clause.expr
+
+
+@pytest.mark.parametrize(
+    "query, expected_filters, has_residual",
+    [
+        ("SELECT * FROM D.T WHERE col1 = 3", [ScanFilter("COL1", "=", 3.0)], False),
+        ("SELECT * FROM D.T WHERE 3 < col1", [ScanFilter("COL1", ">", 3.0)], False),
+        (
+            "SELECT * FROM D.T WHERE col1 >= 1 AND col2 + 1 = 2 AND col3 = 'A'",
+            [ScanFilter("COL1", ">=", 1.0), ScanFilter("COL3", "=", "A")],
+            True,
+        ),
+        ("SELECT * FROM D.T WHERE col1 = 1 OR col2 = 2", [], True),
+        ("SELECT * FROM D.T WHERE NOT col1 = 1", [], True),
+    ],
+)
+def test_split_predicate(query, expected_filters, has_residual):
+    filters, residual = split_predicate(where_clause(query))
+    assert filters == expected_filters
+    assert (residual is not None) == has_residual
+
+
+@pytest.mark.parametrize(
+    "query, expected_columns",
+    [
+        ("SELECT col1 FROM D.T", ["COL1"]),
+        ("SELECT col1, col2 * 2 AS x FROM D.T WHERE col3 = 1 AND col1 > 0", ["COL1", "COL2", "COL3"]),
+        ("SELECT 1 FROM D.T", []),
+        ("SELECT * FROM D.T WHERE col3 = 1", None),
+    ],
+)
+def test_referenced_columns(query, expected_columns):
+    select = Parser(query).parse().nodes
+    assert referenced_columns(select.column_list, select.where_clause) == expected_columns
+
+
+def test_parse_create_index():
+    create_index = Parser("CREATE INDEX idx ON db.t (col1)").parse().nodes
+    assert create_index.type == "CreateIndex"
+    assert create_index.index_name[1] == "IDX"
+    assert create_index.database.expr[1] == "DB"
+    assert create_index.table_name.expr[1] == "T"
+    assert create_index.column_name[1] == "COL1"
+    assert create_index.method is None
+    create_index = Parser("CREATE INDEX idx ON db.t (col1) USING btree").parse().nodes
+    assert create_index.method[1] == "BTREE"
+    for query in ["CREATE INDEX idx ON db.t (col1) col2", "CREATE INDEX idx ON db.t (col1) USING btree x"]:
+        with pytest.raises(ValueError, match="Unexpected token"):
+            Parser(query).parse()
+
+
+def test_parse_create_table_storage():
+    assert Parser("CREATE TABLE db.t (col1 INT)").parse().nodes.storage is None
+    create = Parser("CREATE TABLE db.t (col1 INT, col2 STRING) USING lzma").parse().nodes
+    assert create.storage[1] == "LZMA"
+
+
+def test_parse_insert_keep_string_case():
+    insert = Parser("INSERT INTO db.t (col1, col2) VALUES ('aB', -1), (NULL, 2.5)").parse().nodes
+    assert [column[1] for column in insert.column_names] == ["COL1", "COL2"]
+    assert Insertion(insert).insert_rows == [("aB", -1.0), (None, 2.5)]
+    assert Parser("INSERT INTO db.t VALUES (1)").parse().nodes.column_names is None
+
+
+def test_parse_copy_keep_path_case():
+    copy = Parser("COPY db.t FROM '/Data/Load.csv'").parse().nodes
+    assert BulkLoad(copy).load_table_name == "T"
+    assert str(BulkLoad(copy).load_path) == "/Data/Load.csv"
+    with pytest.raises(ValueError):
+        Parser("COPY db.t FROM t2").parse()
+
+
+def test_parse_partition_by_and_in_predicate():
+    create = Parser("CREATE TABLE db.t (day INT, tenant STRING) PARTITION BY (tenant)").parse().nodes
+    assert create.partition_by[1] == "TENANT"
+    where = Parser("SELECT * FROM db.t WHERE tenant IN ('a', 'b') AND day > 3").parse().nodes.where_clause
+    filters, residual = split_predicate(where.expr)
+    assert filters == [ScanFilter("TENANT", "IN", ("a", "b")), ScanFilter("DAY", ">", 3.0)]
+    assert residual is None
+    assert compile_predicate(where)({"TENANT": "b", "DAY": 4})
+    assert not compile_predicate(where)({"TENANT": "B", "DAY": 4})
+
+
+def test_parse_analyze_and_plan_parallel_degree():
+    analysis = TableAnalysis(Parser("ANALYZE db.t").parse().nodes)
+    assert (analysis.analyze_database, analysis.analyze_table_name) == ("DB", "T")
+    with pytest.raises(ValueError):
+        Parser("ANALYZE db.t extra").parse()
+    assert plan_parallel_degree(None, 4) == 4
+    assert plan_parallel_degree(TableStatistics(10, {}, None), 4) == 1
+    assert plan_parallel_degree(TableStatistics(10**6, {}, None), 4) == 4
+
+
+@pytest.mark.parametrize(
+    "query, expected",
+    [
+        (
+            "SELECT * FROM db.t WHERE a * 3 > b / 2 + 1 OR NOT c = 'X'",
+            lambda a, b, c: a * 3 > b / 2 + 1 or c != "X",
+        ),
+        (
+            "SELECT * FROM db.t WHERE a IN (1, b, 3) AND b <> 4",
+            lambda a, b, c: a in (1, b, 3) and b != 4,
+        ),
+        (
+            "SELECT * FROM db.t WHERE a - b <= 0 AND (c = 'Y' OR a >= 2)",
+            lambda a, b, c: a - b <= 0 and (c == "Y" or a >= 2),
+        ),
+    ],
+)
+def test_compiled_predicate(query, expected):
+    where = Parser(query).parse().nodes.where_clause
+    predicate = compile_predicate(where)
+    rows = [(a, b, c) for a in (1, 2, 3) for b in (0, 4, 6) for c in ("X", "Y")]
+    assert [predicate({"A": a, "B": b, "C": c}) for a, b, c in rows] == [
+        expected(*row) for row in rows
+    ]
+
+
+def test_compiled_expression_errors():
+    column_list = Parser("SELECT a * 2 + 1, 3 FROM db.t").parse().nodes.column_list
+    columns = ColumnListHandler().handle(column_list)
+    expression = compile_expression(columns[0].expr)
+    assert expression({"A": 4}) == 9
+    assert compile_expression(columns[1].expr)(None) == 3
+    with pytest.raises(ValueError, match="Column A does not exists"):
+        expression({"B": 1})
+    with pytest.raises(ValueError, match="Column A does not exists"):
+        expression(None)
+    with pytest.raises(TypeError):
+        expression({"A": None})
+
+
+def outcome(evaluate, batch):
+    try:
+        return evaluate(batch)
+    except Exception as e:
+        return type(e)
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        "SELECT a * 2 + 1, b / 2, c FROM db.t WHERE a * 3 > b / 2 + 1 OR NOT c = 'X'",
+        "SELECT a - b FROM db.t WHERE a IN (1, 3) AND c <> 'Y'",
+        "SELECT b / a FROM db.t WHERE c = 'X' OR b >= 4",
+        "SELECT a / b, c + 'Z' FROM db.t WHERE b = 0",
+    ],
+)
+def test_batch_evaluation_match_rows(query):
+    ast = Parser(query).parse().nodes
+    batch = pd.DataFrame(
+        {
+            "A": pd.array([1, 2, 3, 1, 2, 3, 1, 2, 3], dtype="Int64"),
+            "B": [0.0, 4.0, 6.0, 4.0, 6.0, 0.0, 6.0, 0.0, 4.0],
+            "C": ["X", "Y", None, "Y", None, "X", None, "X", "Y"],
+        }
+    )
+    rows = batch.to_dict(orient="records")
+    predicate = compile_predicate(ast.where_clause)
+    mask = compile_batch_predicate(ast.where_clause)(batch)
+    assert mask.tolist() == [bool(predicate(row)) for row in rows]
+    selected = batch[mask]
+    for column in ColumnListHandler().handle(ast.column_list):
+        expression = compile_expression(column.expr)
+        assert outcome(compile_batch_expression(column.expr), selected) == outcome(
+            lambda rows: [expression(row) for row in rows.to_dict(orient="records")],
+            selected,
+        )
+
+
+@pytest.mark.parametrize(
+    "column, operator, value",
+    [("C", "<>", "X"), ("D", "<>", "X"), ("B", "<>", 4.0), ("B", ">", 0.0), ("A", "<>", 1)],
+)
+def test_pushdown_and_residual_filters_skip_same_nulls(column, operator, value):
+    batch = pd.DataFrame(
+        {
+            "A": pd.array([1, None, 3, 2], dtype="Int64"),
+            "B": [4.0, float("nan"), 6.0, None],
+            "C": ["X", None, "Y", float("nan")],
+            "D": pd.array(["X", None, "Y", None], dtype="str"),
+        }
+    )
+    literal = f"'{value}'" if isinstance(value, str) else value
+    pushed_down = ScanFilter(column, operator, value).mask(batch[column])
+    residual = Parser(
+        f"SELECT * FROM db.t WHERE {column} {operator} {literal} OR A = 100"
+    ).parse().nodes.where_clause
+    rows = batch.to_dict(orient="records")
+    predicate = compile_predicate(residual)
+    assert compile_batch_predicate(residual)(batch).tolist() == pushed_down.tolist()
+    assert [bool(predicate(row)) for row in rows] == pushed_down.tolist()
+    assert not pushed_down[batch[column].isna().to_numpy()].any()
+
+
+def test_operators_stream_batches():
+    closed = []
+
+    def scan(database, table_name, filters, columns):
+        try:
+            for start in range(0, 30, 10):
+                yield pd.DataFrame({"A": range(start, start + 10)})
+        finally:
+            closed.append(table_name)
+
+    ast = Parser("SELECT a * 2, * FROM db.t WHERE a < 5 OR a >= 25").parse().nodes
+    plan = Projection(
+        ast.column_list, Selection(ast.where_clause, Production(ast.from_clause, scan))
+    ).open()
+    batch = plan.next_batch()
+    assert batch.values[1] == [0, 1, 2, 3, 4]
+    assert batch.values[0] == [0, 2, 4, 6, 8]
+    # The middle batch has no selected row
+    assert plan.next_batch().values[1] == [25, 26, 27, 28, 29]
+    assert plan.next_batch() is None
+    plan.close()
+    assert closed == ["T"]
+
+    # Closing an unfinished plan stops the table scan
+    plan = Projection(ast.column_list, Selection(None, Production(ast.from_clause, scan)))
+    assert next(plan)["data"] == (0, 0)
+    plan.close()
+    assert closed == ["T", "T"]
+
+
+def test_planner_rewrites_select():
+    statistics = TableStatistics(
+        1000,
+        {
+            "A": ColumnStatistics(100, 0.0, list(range(0, 101, 10))),
+            "B": ColumnStatistics(2, 0.0, [0, 0, 1, 1]),
+            "C": ColumnStatistics(500, 0.0, ["A", "M", "Z"]),
+        },
+        None,
+    )
+    select = Parser(
+        "SELECT a + 1 FROM db.t WHERE a / 2 > 1 AND b = 1 AND c = 'X' AND a - 1 > 2 AND a > 5"
+    ).parse().nodes
+    plan = Planner(None, None).optimize(select, statistics)
+    assert plan.type == "LogicalProject" and plan.child.type == "LogicalFilter"
+    scan = plan.child.child
+    assert scan.columns == ["A", "B", "C"]
+    # Most selective scan filter first
+    assert [f.column for f in scan.filters] == ["C", "B", "A"]
+    # The residual conditions keep only those the storage can not evaluate, cheapest first
+    residual = plan.child.predicate
+    assert residual == reorder_predicate(
+        Parser("SELECT * FROM db.t WHERE a - 1 > 2 AND a / 2 > 1").parse().nodes.where_clause.expr
+    )
+
+    plan = Planner(None, None).optimize(Parser("SELECT * FROM db.t WHERE a = 1").parse().nodes)
+    assert plan.child.type == "LogicalScan" and plan.child.columns is None
+
+
+def test_plan_index_scan_by_cost():
+    class Index:
+        def __init__(self, column):
+            self.column = column
+
+        def supports(self, scan_filter):
+            return scan_filter.column == self.column
+
+    statistics = TableStatistics(
+        1000, {"A": ColumnStatistics(1000, 0.0, list(range(0, 1001, 100)))}, None
+    )
+    equal, above = ScanFilter("A", "=", 5), ScanFilter("A", ">", 100)
+    assert plan_index_scan(statistics, [equal], [Index("A")]) is True
+    assert plan_index_scan(statistics, [above], [Index("A")]) is False
+    assert plan_index_scan(statistics, [equal], [Index("B")]) is False
+    # Without statistics the storage decides
+    assert plan_index_scan(None, [equal], [Index("A")]) is None
+
+
+@pytest.mark.parametrize(
+    "query, expected",
+    [
+        ("1 = 1 AND col > 2 * 50", "col > 100"),
+        ("NOT (NOT x = 3)", "x = 3"),
+        ("NOT (a = 1 OR 1 = 2)", "NOT a = 1"),
+        ("c = 'x' + 'y' AND (a = 1 AND b = 2)", "c = 'xy' AND a = 1 AND b = 2"),
+        ("a IN (1 + 1, 3) OR 2 > 3", "a IN (2, 3)"),
+        ("a = 1 OR 2 > 1", True),
+        ("1 = 2 AND a = 1", False),
+        ("'a' IN ('b', 'c')", False),
+        # Errors are left for the evaluation
+        ("a / 0 > 1 AND 'x' > 1", "a / 0 > 1 AND 'x' > 1"),
+    ],
+)
+def test_simplify_predicate(query, expected):
+    simplified = simplify_predicate(where_clause(f"SELECT * FROM D.T WHERE {query}"))
+    if isinstance(expected, bool):
+        assert simplified is expected
+    else:
+        assert simplified == where_clause(f"SELECT * FROM D.T WHERE {expected}")
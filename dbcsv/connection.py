@@ -50,15 +50,21 @@ class Connection:
         Note that if the database supports an auto-commit feature,
         this must be initially off. An interface method may be provided to turn it back on.
         Database modules that do not support transactions should implement this method with void functionality.
+        Raises:
+            ProgramingError: On closed connection
+            DatabaseError: when the server could not commit
         """
-        pass
+        self._end_transaction("commit")
 
     def rollback(self):
         """
         This method is optional since not all databases provide transaction support. [3]
         In case a database does provide transactions this method causes the database to roll back to the start of any pending transaction. Closing a connection without committing the changes first will cause an implicit rollback to be performed.
+        Raises:
+            ProgramingError: On closed connection
+            DatabaseError: when the server could not roll back
         """
-        pass
+        self._end_transaction("rollback")
 
     def cursor(self) -> Cursor:
         """
@@ -78,6 +84,16 @@ class Connection:
         data = response.json()
         return data["connection_id"]
 
+    def _end_transaction(self, action: str) -> None:
+        if self._closed == 1:
+            raise ProgramingError("Cannot operate on closed connection.")
+        response = requests.post(
+            f"http://127.0.0.1:8000/{action}",
+            json={"connection_id": self._connection_id},
+        )
+        if response.status_code != 200:
+            raise DatabaseError(f"Server error, cannot {action}.")
+
     def _execute_sql(self, query: str) -> None:
         """
         Call execute query from server
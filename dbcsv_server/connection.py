@@ -13,6 +13,8 @@ class ConnectionIdentity:
         self._id = str(uuid.uuid4())
         self.closed = False
         self.query_result = {}
+        # Rows of the open transaction, written to the log on commit
+        self.pending_writes = []
         self.created_at = datetime.now(tz=timezone.utc)
 
     @property
@@ -0,0 +1,5 @@
+from .file_manager import FileManager, DEFAULT_CHUNK_SIZE, READERS
+from .scan_filter import ScanFilter
+from .catalog import Catalog
+
+__all__ = ["FileManager", "DEFAULT_CHUNK_SIZE", "READERS", "ScanFilter", "Catalog"]
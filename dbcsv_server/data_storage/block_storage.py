@@ -0,0 +1,331 @@
+import gzip
+import io
+import json
+import lzma
+import os
+import zlib
+import pandas as pd
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+from .scan_filter import ScanFilter, filters_mask
+from .zone_map import zone_may_match, DEFAULT_BLOCK_ROWS
+from .buffer_pool import BufferPool
+
+__all__ = ["BlockStorage", "CODECS", "CSV_STORAGE", "BLOCK_STORAGE", "BLOCK_SUFFIX"]
+
+# Compression modules by the name given in `CREATE TABLE ... USING <codec>`
+CODECS = {"ZLIB": zlib, "GZIP": gzip, "LZMA": lzma}
+# Storage of a table: plain csv file or compressed blocks
+CSV_STORAGE = "CSV"
+BLOCK_STORAGE = "BLOCKS"
+BLOCK_SUFFIX = ".blocks"
+BLOCK_INDEX_SUFFIX = ".blocks.json"
+
+
+class BlockStorage:
+    """
+    Table stored as independently compressed blocks of csv lines, without header
+    A scan only reads and decompresses the blocks whose statistics may match its filters
+
+    Layout:
+        `<table>.blocks` compressed blocks one after the other
+        `<table>.blocks.json` block index: codec, columns and for each block its first row,
+            row count, byte offset, byte length and [min, max, null count] of each column
+    Args:
+        file_path (Path): `<table>.blocks` data file
+    """
+
+    def __init__(self, file_path: Path):
+        self.file_path = file_path
+        self.index_path = file_path.with_name(f"{file_path.stem}{BLOCK_INDEX_SUFFIX}")
+
+    @classmethod
+    def create(cls, file_path: Path, codec: str, columns: List[str]) -> "BlockStorage":
+        """
+        Create an empty table
+        Args:
+            file_path (Path): `<table>.blocks` data file
+            codec (str): ZLIB, GZIP or LZMA
+            columns (List[str]): column names
+        Raises:
+            ValueError: if the codec is unknown
+        Returns:
+            BlockStorage
+        """
+        if codec not in CODECS:
+            raise ValueError(f"Unknown compression {codec}")
+        storage = cls(file_path)
+        storage._write_index({"codec": codec, "columns": columns, "blocks": []})
+        file_path.write_bytes(b"")
+        return storage
+
+    def drop(self) -> None:
+        """
+        Remove the data and index files
+        """
+        self.file_path.unlink(missing_ok=True)
+        self.index_path.unlink(missing_ok=True)
+
+    def load_index(self) -> Dict:
+        with open(self.index_path) as f:
+            return json.load(f)
+
+    @property
+    def columns(self) -> List[str]:
+        return self.load_index()["columns"]
+
+    def append(
+        self,
+        df: pd.DataFrame,
+        block_rows: int = DEFAULT_BLOCK_ROWS,
+        dtype: Optional[Dict] = None,
+    ) -> int:
+        """
+        Compress rows into new blocks at the end of the table
+        Args:
+            df (pd.DataFrame): rows with the table columns
+            block_rows (int): rows per block
+            dtype (Dict): declared pandas dtype per column, values are cast before block statistics are computed
+        Raises:
+            ValueError: if the columns do not match the table
+        Returns:
+            int: number of appended rows
+        """
+        return self.append_batches([df], block_rows, dtype)
+
+    def append_batches(
+        self,
+        batches: Iterable[pd.DataFrame],
+        block_rows: int = DEFAULT_BLOCK_ROWS,
+        dtype: Optional[Dict] = None,
+    ) -> int:
+        """
+        Compress batches of rows into new blocks, the data is synced and the block index written once
+        Args:
+            batches (Iterable[pd.DataFrame]): rows with the table columns, a block never spans two batches
+            block_rows (int): rows per block
+            dtype (Dict): declared pandas dtype per column
+        Raises:
+            ValueError: if the columns do not match the table
+        Returns:
+            int: number of appended rows
+        """
+        index = self.load_index()
+        codec = CODECS[index["codec"]]
+        blocks = index["blocks"]
+        first_row = blocks[-1]["row_start"] + blocks[-1]["rows"] if blocks else 0
+        row_start = first_row
+        with open(self.file_path, "ab") as f:
+            # Bytes left by an interrupted append are not referenced and skipped
+            offset = f.seek(0, os.SEEK_END)
+            for df in batches:
+                if list(df.columns) != index["columns"]:
+                    raise ValueError(
+                        f"Expect columns {index['columns']} got {list(df.columns)}"
+                    )
+                if dtype:
+                    df = df.astype(dtype)
+                for start in range(0, len(df), block_rows):
+                    block = df.iloc[start : start + block_rows]
+                    data = codec.compress(
+                        block.to_csv(index=False, header=False).encode("utf-8")
+                    )
+                    f.write(data)
+                    blocks.append(
+                        {
+                            "row_start": row_start,
+                            "rows": len(block),
+                            "offset": offset,
+                            "length": len(data),
+                            "stats": _block_stats(block),
+                        }
+                    )
+                    row_start += len(block)
+                    offset += len(data)
+            f.flush()
+            os.fsync(f.fileno())
+        self._write_index(index)
+        return row_start - first_row
+
+    def truncate(self, block_count: int) -> None:
+        """
+        Forget the blocks after the first `block_count`, their bytes are left unreferenced
+        """
+        index = self.load_index()
+        if len(index["blocks"]) > block_count:
+            index["blocks"] = index["blocks"][:block_count]
+            self._write_index(index)
+
+    def candidate_blocks(self, filters: Optional[List[ScanFilter]] = None) -> List[Dict]:
+        """
+        Blocks that may hold a row satisfying every filter
+        """
+        blocks = self.load_index()["blocks"]
+        if not filters:
+            return blocks
+        return [
+            block
+            for block in blocks
+            if all(_may_match(block["stats"], f) for f in filters)
+        ]
+
+    def batches(
+        self,
+        usecols: Optional[List[str]] = None,
+        dtype: Optional[Dict] = None,
+        filters: Optional[List[ScanFilter]] = None,
+        parallel_degree: int = 1,
+        buffer_pool: Optional[BufferPool] = None,
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Stream the rows of the candidate blocks in table order, one batch per block
+        Args:
+            usecols (List[str]): columns to parse, None for all
+            dtype (Dict): pandas dtype per column
+            filters (List[ScanFilter]): conditions of the scan
+            parallel_degree (int): threads decompressing and parsing blocks
+            buffer_pool (BufferPool): decoded columns of the blocks, only the columns
+                it misses are decompressed and parsed
+        Returns:
+            Iterator[pd.DataFrame]
+        """
+        index = self.load_index()
+        codec = CODECS[index["codec"]]
+        blocks = self.candidate_blocks(filters)
+        args = (codec, index["columns"], usecols, dtype, filters, buffer_pool, str(self.file_path))
+        with open(self.file_path, "rb") as f:
+            fd = f.fileno()
+            if parallel_degree <= 1:
+                for block in blocks:
+                    batch = _read_block(fd, block, *args)
+                    if len(batch):
+                        yield batch
+                return
+            with ThreadPoolExecutor(parallel_degree) as executor:
+                pending = deque()
+                try:
+                    for block in blocks:
+                        pending.append(executor.submit(_read_block, fd, block, *args))
+                        if len(pending) >= parallel_degree * 2:
+                            batch = pending.popleft().result()
+                            if len(batch):
+                                yield batch
+                    while pending:
+                        batch = pending.popleft().result()
+                        if len(batch):
+                            yield batch
+                finally:
+                    for future in pending:
+                        future.cancel()
+
+    def _write_index(self, index: Dict) -> None:
+        # Write then rename so that a reader never loads a partial index
+        tmp_path = self.index_path.with_name(f"{self.index_path.name}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(index, f)
+        os.replace(tmp_path, self.index_path)
+
+
+def _read_block(
+    fd: int,
+    block: Dict,
+    codec,
+    columns: List[str],
+    usecols: Optional[List[str]],
+    dtype: Optional[Dict],
+    filters: Optional[List[ScanFilter]],
+    buffer_pool: Optional[BufferPool] = None,
+    table: Optional[str] = None,
+) -> pd.DataFrame:
+    if buffer_pool is None:
+        batch = _parse_block(fd, block, codec, columns, usecols, dtype)
+    else:
+        batch = _pooled_block(fd, block, codec, columns, usecols, dtype, buffer_pool, table)
+    if filters and len(batch):
+        batch = batch[filters_mask(batch, filters)]
+    return batch
+
+
+def _parse_block(
+    fd: int,
+    block: Dict,
+    codec,
+    columns: List[str],
+    usecols: Optional[List[str]],
+    dtype: Optional[Dict],
+) -> pd.DataFrame:
+    data = codec.decompress(os.pread(fd, block["length"], block["offset"]))
+    return pd.read_csv(
+        io.BytesIO(data), header=None, names=columns, usecols=usecols, dtype=dtype
+    )
+
+
+def _pooled_block(
+    fd: int,
+    block: Dict,
+    codec,
+    columns: List[str],
+    usecols: Optional[List[str]],
+    dtype: Optional[Dict],
+    buffer_pool: BufferPool,
+    table: str,
+) -> pd.DataFrame:
+    """
+    Assemble a block from the buffer pool, the columns it misses are parsed and cached
+    """
+    # A block is never rewritten in place, its position in the data file identifies it
+    block_id = (block["offset"], block["length"])
+    selected = [c for c in columns if usecols is None or c in usecols]
+    pinned, values = [], {}
+    try:
+        for column in selected:
+            frame = buffer_pool.get((table, column, block_id))
+            if frame is not None:
+                pinned.append(frame)
+                values[column] = frame.value
+        missing = [c for c in selected if c not in values]
+        if missing:
+            parsed = _parse_block(fd, block, codec, columns, missing, dtype)
+            for column in missing:
+                series = parsed[column]
+                key = (table, column, block_id)
+                frame = buffer_pool.put(key, series, int(series.memory_usage(deep=True)))
+                if frame is not None:
+                    pinned.append(frame)
+                values[column] = series
+        return pd.DataFrame({column: values[column] for column in selected})
+    finally:
+        for frame in pinned:
+            buffer_pool.unpin(frame)
+
+
+def _may_match(stats: Dict[str, List], scan_filter: ScanFilter) -> bool:
+    if scan_filter.column not in stats:
+        return True
+    minimum, maximum, _ = stats[scan_filter.column]
+    return zone_may_match(minimum, maximum, scan_filter)
+
+
+def _block_stats(block: pd.DataFrame) -> Dict[str, List]:
+    """
+    [min, max, null count] of each column, columns of not comparable values are left out
+    """
+    stats = {}
+    for column in block.columns:
+        values = block[column].dropna()
+        null_count = len(block) - len(values)
+        if len(values) == 0:
+            stats[column] = [None, None, null_count]
+            continue
+        try:
+            minimum, maximum = values.min(), values.max()
+        except TypeError:
+            continue
+        stats[column] = [_native(minimum), _native(maximum), null_count]
+    return stats
+
+
+def _native(value):
+    return value.item() if hasattr(value, "item") else value
@@ -0,0 +1,142 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+__all__ = ["BufferPool", "Frame", "DEFAULT_BUFFER_POOL_SIZE"]
+
+# Bytes of decoded blocks a server keeps in memory
+DEFAULT_BUFFER_POOL_SIZE = 256 * 1024 * 1024
+
+# (table, column, block) a decoded block is cached under
+BlockKey = Tuple[str, str, Hashable]
+
+
+class Frame:
+    """
+    A cached block, the handle `get` and `put` return pinned and `unpin` releases
+    Args:
+        value (Any): decoded block
+        size (int): bytes held by the value
+    """
+
+    def __init__(self, value: Any, size: int):
+        self.value = value
+        self.size = size
+        self.pins = 0
+        # Dropped from the pool by `invalidate`, its bytes are counted until its last unpin
+        self.invalidated = False
+
+
+class BufferPool:
+    """
+    Decoded column blocks shared by every connection of a server, least recently used
+    blocks are evicted once the pool holds more than `capacity` bytes
+    A block is pinned from `get` or `put` until its frame is passed to `unpin`, a pinned block
+    is never evicted so the pool may hold more than its capacity while every block is in use
+    Pins are counted by frame: a block invalidated and cached again under the same key is a new
+    frame, the readers of the old one release it without touching the new one
+    Args:
+        capacity (int): bytes of decoded blocks kept in memory, 0 disables the pool
+    """
+
+    def __init__(self, capacity: int = DEFAULT_BUFFER_POOL_SIZE):
+        if capacity < 0:
+            raise ValueError("Buffer pool size must not be negative")
+        self.capacity = capacity
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._frames: "OrderedDict[BlockKey, Frame]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: BlockKey) -> Optional[Frame]:
+        """
+        Pin and return the frame of a cached block, None on a miss
+        """
+        with self._lock:
+            frame = self._frames.get(key)
+            if frame is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            frame.pins += 1
+            self._frames.move_to_end(key)
+            return frame
+
+    def put(self, key: BlockKey, value: Any, size: int) -> Optional[Frame]:
+        """
+        Cache a decoded block pinned, blocks larger than the pool are not cached
+        Args:
+            key (BlockKey): table, column and block
+            value (Any): decoded block
+            size (int): bytes held by the value
+        Returns:
+            Frame: pinned frame of the block, None when the block was not cached
+        """
+        if size > self.capacity:
+            return None
+        with self._lock:
+            frame = self._frames.get(key)
+            if frame is not None:
+                # Decoded concurrently by another scan, keep the cached one
+                frame.pins += 1
+                return frame
+            frame = Frame(value, size)
+            frame.pins = 1
+            self._frames[key] = frame
+            self.size += size
+            self._evict()
+            return frame
+
+    def unpin(self, frame: Frame) -> None:
+        """
+        Release a frame returned by `get` or `put`
+        """
+        with self._lock:
+            if frame.pins == 0:
+                return
+            frame.pins -= 1
+            if frame.pins > 0:
+                return
+            if frame.invalidated:
+                self.size -= frame.size
+            else:
+                self._evict()
+
+    def invalidate(self, table: str) -> None:
+        """
+        Drop every block of a table, blocks in use stay valid for their current reader
+        and are counted in the pool size until they are unpinned
+        """
+        with self._lock:
+            for key in [key for key in self._frames if key[0] == table]:
+                frame = self._frames.pop(key)
+                if frame.pins > 0:
+                    frame.invalidated = True
+                else:
+                    self.size -= frame.size
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Hit, miss and eviction counters with the bytes in use
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "blocks": len(self._frames),
+                "size": self.size,
+                "capacity": self.capacity,
+            }
+
+    def _evict(self) -> None:
+        if self.size <= self.capacity:
+            return
+        # Only frames still in the pool can go, invalidated ones wait for their readers
+        for key in [key for key, frame in self._frames.items() if frame.pins == 0]:
+            self.size -= self._frames.pop(key).size
+            self.evictions += 1
+            if self.size <= self.capacity:
+                return
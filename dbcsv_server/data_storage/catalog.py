@@ -0,0 +1,175 @@
+import os
+import stat
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+from .schema import load_schema
+from .block_storage import CSV_STORAGE, BLOCK_STORAGE, BLOCK_SUFFIX
+from .partition import PARTITIONED_STORAGE, PARTITION_FILE
+from .shards import SHARDED_STORAGE
+
+__all__ = ["Catalog", "TableEntry"]
+
+# Seconds a catalog entry is trusted before its files are checked again
+DEFAULT_CATALOG_TTL = 0.0
+
+
+@dataclass
+class TableEntry:
+    """
+    Metadata of a table as known by the catalog, `file_path` is the csv file,
+    the `.blocks` file of a compressed table or the folder of a partitioned or sharded table
+    """
+
+    database: str
+    table_name: str
+    file_path: Path
+    meta_path: Path
+    exists: bool
+    schema: Optional[Dict[str, str]]
+    size: int
+    mtime_ns: int
+    meta_size: int
+    meta_mtime_ns: int
+    checked_at: float
+    storage: str = CSV_STORAGE
+
+
+class Catalog:
+    """
+    Server wide in memory catalog of tables metadata
+    An entry is loaded on first lookup and answered from memory afterward,
+    once it is older than `ttl` seconds its files are stat again and the schema is only
+    re-read when the size or mtime of the meta file changed
+    Args:
+        root (Path): data folder, databases are its sub folders
+        ttl (float): seconds an entry is trusted without touching the file system
+    """
+
+    def __init__(self, root: Path = Path(), ttl: float = DEFAULT_CATALOG_TTL):
+        self.root = root
+        self.ttl = ttl
+        self._entries: Dict[Tuple[str, str], TableEntry] = {}
+        self._lock = threading.Lock()
+
+    def table(self, database: str, table_name: str) -> TableEntry:
+        """
+        Return the entry of an existing table
+        Args:
+            database (str): database name
+            table_name (str): table name
+        Raises:
+            FileNotFoundError: if the table does not exists
+        Returns:
+            TableEntry
+        """
+        entry = self.lookup(database, table_name)
+        if not entry.exists:
+            raise FileNotFoundError(f"Table {database}.{table_name} doest exists")
+        return entry
+
+    def exists(self, database: str, table_name: str) -> bool:
+        return self.lookup(database, table_name).exists
+
+    def schema(self, database: str, table_name: str) -> Optional[Dict[str, str]]:
+        return self.table(database, table_name).schema
+
+    def lookup(self, database: str, table_name: str) -> TableEntry:
+        """
+        Return the entry of a table, refreshed when it is older than ttl
+        Args:
+            database (str): database name
+            table_name (str): table name
+        Returns:
+            TableEntry: `exists` is False for a missing table
+        """
+        key = (database, table_name)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry.checked_at < self.ttl:
+                return entry
+        entry = self._refresh(database, table_name, entry, now)
+        with self._lock:
+            self._entries[key] = entry
+        return entry
+
+    def invalidate(self, database: str, table_name: str) -> None:
+        """
+        Drop the entry of a table, called by write paths so the next lookup sees the change
+        """
+        with self._lock:
+            self._entries.pop((database, table_name), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _refresh(
+        self,
+        database: str,
+        table_name: str,
+        entry: Optional[TableEntry],
+        now: float,
+    ) -> TableEntry:
+        file_path = self.root / database / f"{table_name}.csv"
+        meta_path = self.root / database / f"meta.{table_name}.csv"
+        storage = CSV_STORAGE
+        size, mtime_ns = _stat(file_path)
+        if size < 0:
+            block_path = file_path.with_suffix(BLOCK_SUFFIX)
+            block_size, block_mtime_ns = _stat(block_path)
+            if block_size >= 0:
+                file_path, storage = block_path, BLOCK_STORAGE
+                size, mtime_ns = block_size, block_mtime_ns
+        if size < 0:
+            folder = self.root / database / table_name
+            partition_size, partition_mtime_ns = _stat(folder / PARTITION_FILE)
+            if partition_size >= 0:
+                file_path, storage = folder, PARTITIONED_STORAGE
+                size, mtime_ns = partition_size, partition_mtime_ns
+            else:
+                # Any other table folder holds csv shards, added or removed shards change its mtime
+                folder_size, folder_mtime_ns = _stat(folder, stat.S_ISDIR)
+                if folder_size >= 0:
+                    file_path, storage = folder, SHARDED_STORAGE
+                    size, mtime_ns = folder_size, folder_mtime_ns
+        meta_size, meta_mtime_ns = _stat(meta_path)
+        exists = size >= 0
+        if entry is not None and (meta_size, meta_mtime_ns) == (
+            entry.meta_size,
+            entry.meta_mtime_ns,
+        ):
+            schema = entry.schema
+        else:
+            schema = load_schema(meta_path) if meta_size >= 0 else None
+        return TableEntry(
+            database=database,
+            table_name=table_name,
+            file_path=file_path,
+            meta_path=meta_path,
+            exists=exists,
+            schema=schema,
+            size=size,
+            mtime_ns=mtime_ns,
+            meta_size=meta_size,
+            meta_mtime_ns=meta_mtime_ns,
+            checked_at=now,
+            storage=storage,
+        )
+
+
+def _stat(path: Path, is_kind: Callable[[int], bool] = stat.S_ISREG) -> Tuple[int, int]:
+    """
+    Size and mtime of a regular file, or of another kind of file given its `stat` test,
+    (-1, -1) when it does not exists
+    """
+    try:
+        file_stat = os.stat(path)
+    except OSError:
+        return -1, -1
+    if not is_kind(file_stat.st_mode):
+        return -1, -1
+    return file_stat.st_size, file_stat.st_mtime_ns
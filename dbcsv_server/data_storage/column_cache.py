@@ -0,0 +1,713 @@
+import io
+import json
+import os
+import shutil
+import threading
+import uuid
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass
+from pathlib import Path
+from functools import partial
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Union
+from .scan_filter import ScanFilter
+from .schema import SCHEMA_KINDS, schema_dtypes
+from .string_array import StringArray, encode_strings, offsets_path, utf8_size
+from .zone_map import ZoneMap, DEFAULT_BLOCK_ROWS
+
+__all__ = ["ColumnCache", "CachedTable"]
+
+MANIFEST_FILE = "manifest.json"
+ZONE_MAP_FILE = "zonemap.json"
+# Layout version of a cache, a cache of another version is built again
+CACHE_FORMAT = 2
+# Dtype of a string column in the manifest, its values are a `StringArray`
+STRING_DTYPE = "|O"
+# Value stored in place of a null, the null mask tells them apart
+_NULL_FILL = {"int": 0, "bool": False, "string": ""}
+
+
+class CachedColumn:
+    """
+    A column of a cached table, its files are memory mapped on first access
+    Args:
+        name (str): column name
+        values_path (Path): .npy file of the values, the UTF-8 bytes of a string column
+        nulls_path (Path): .npy file of the null mask, None when the column has no null string
+        string (bool): the values are strings with their offsets in `<i>.offsets.npy`
+    """
+
+    def __init__(
+        self,
+        name: str,
+        values_path: Path,
+        nulls_path: Optional[Path] = None,
+        string: bool = False,
+    ):
+        self.name = name
+        self._values_path = values_path
+        self._nulls_path = nulls_path
+        self._string = string
+        self._values = None
+        self._nulls = None
+
+    @property
+    def values(self) -> Union[np.ndarray, StringArray]:
+        if self._values is None:
+            self._values = _load_values(self._values_path, self._string)
+        return self._values
+
+    @property
+    def nulls(self) -> Optional[np.ndarray]:
+        if self._nulls is None and self._nulls_path is not None:
+            self._nulls = np.load(self._nulls_path, mmap_mode="r")
+        return self._nulls
+
+    def slice(self, start: int, stop: int):
+        """
+        Return values of rows [start, stop), nulls of an int column are returned as a nullable
+        integer array and nulls of a string column as None
+        """
+        return self.take(slice(start, stop))
+
+    def take(self, rows):
+        """
+        Return values of the selected rows
+        Args:
+            rows (slice | np.ndarray): a slice or an array of row positions
+        """
+        values = self.values[rows]
+        if self.nulls is None:
+            return values
+        nulls = self.nulls[rows]
+        if values.dtype.kind == "i":
+            return pd.arrays.IntegerArray(np.array(values), np.array(nulls))
+        return np.where(nulls, None, values.astype(object))
+
+
+@dataclass
+class CachedTable:
+    """
+    Columns of a table loaded from its sidecar cache
+    """
+
+    row_count: int
+    columns: List[CachedColumn]
+    zone_map_path: Optional[Path] = None
+    _zone_map: Optional[ZoneMap] = None
+    # [size, mtime_ns, row_count] of every state of the csv the cache was extended from
+    prefixes: Optional[List[List[int]]] = None
+
+    def prefix_rows(self, size: int, mtime_ns: int) -> Optional[int]:
+        """
+        Rows the csv had when its size and mtime were the given ones, None when the cache
+        did not grow from that state and the rows may differ
+        """
+        for prefix_size, prefix_mtime_ns, row_count in self.prefixes or []:
+            if (prefix_size, prefix_mtime_ns) == (size, mtime_ns):
+                return row_count
+        return None
+
+    @property
+    def zone_map(self) -> Optional[ZoneMap]:
+        if self._zone_map is None and self.zone_map_path is not None:
+            self._zone_map = ZoneMap.load(self.zone_map_path)
+        return self._zone_map
+
+    @property
+    def column_names(self) -> List[str]:
+        return [column.name for column in self.columns]
+
+    def column(self, name: str) -> CachedColumn:
+        for column in self.columns:
+            if column.name == name:
+                return column
+        raise ValueError(f"Column {name} does not exists")
+
+    def batches(
+        self,
+        chunk_size: int,
+        filters: Optional[List[ScanFilter]] = None,
+        columns: Optional[List[str]] = None,
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Slice the columns in batches of `chunk_size` rows
+        Blocks the zone map excludes are skipped, filters are then evaluated on the
+        mapped arrays first and only matched rows are copied
+        Args:
+            chunk_size (int): rows per batch
+            filters (List[ScanFilter]): conditions to apply
+            columns (List[str]): columns to return, None for all, only those files are mapped
+        """
+        selected = self.columns if columns is None else [self.column(c) for c in columns]
+        for start, stop in self._slices(chunk_size, filters):
+            mask = self._mask(slice(start, stop), filters) if filters else None
+            if mask is None:
+                yield pd.DataFrame(
+                    {column.name: column.slice(start, stop) for column in selected}
+                )
+                continue
+            index = np.flatnonzero(mask)
+            if len(index) == 0:
+                continue
+            yield pd.DataFrame(
+                {column.name: column.slice(start, stop)[index] for column in selected}
+            )
+
+    def take_batches(
+        self,
+        rows: np.ndarray,
+        chunk_size: int,
+        filters: Optional[List[ScanFilter]] = None,
+        columns: Optional[List[str]] = None,
+        keep_order: bool = False,
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Fetch the given rows in batches of `chunk_size` rows, in table order
+        Args:
+            rows (np.ndarray): row positions, for example returned by an index
+            chunk_size (int): rows per batch
+            filters (List[ScanFilter]): remaining conditions to apply on the fetched rows
+            columns (List[str]): columns to return, None for all
+            keep_order (bool): return rows in the order of `rows` instead of table order
+        """
+        selected = self.columns if columns is None else [self.column(c) for c in columns]
+        rows = np.asarray(rows, dtype=np.int64)
+        if not keep_order:
+            rows = np.sort(rows)
+        for start in range(0, len(rows), chunk_size):
+            positions = rows[start : start + chunk_size]
+            if filters:
+                positions = positions[self._mask(positions, filters)]
+                if len(positions) == 0:
+                    continue
+            yield pd.DataFrame({column.name: column.take(positions) for column in selected})
+
+    def _slices(
+        self, chunk_size: int, filters: Optional[List[ScanFilter]]
+    ) -> Iterator[Tuple[int, int]]:
+        ranges = [(0, self.row_count)]
+        if filters and self.zone_map is not None:
+            ranges = self.zone_map.candidate_ranges(filters)
+        for range_start, range_stop in ranges:
+            # A zone map extended by a later append may cover more rows than this table
+            range_stop = min(range_stop, self.row_count)
+            for start in range(range_start, range_stop, chunk_size):
+                yield start, min(start + chunk_size, range_stop)
+
+    def _mask(self, rows, filters: List[ScanFilter]) -> np.ndarray:
+        mask = None
+        for scan_filter in filters:
+            column = self.column(scan_filter.column)
+            column_mask = scan_filter.mask(column.values[rows])
+            if column.nulls is not None:
+                # Null never satisfies a comparison
+                column_mask &= ~column.nulls[rows]
+            mask = column_mask if mask is None else mask & column_mask
+            if not mask.any():
+                break
+        return mask
+
+
+class ColumnCache:
+    """
+    Columnar binary sidecar of a csv table, one .npy file per column, a string column is
+    its UTF-8 bytes and the offset of each value so it takes the size of its text
+    kept in `<database>/<table>.cache/` and reused while the csv size and mtime are unchanged
+    When the csv only grew by appends of the server, recorded with `appended`, the rows appended
+    since are parsed and added to the column files in place instead of building the cache again,
+    any other change of the csv builds the cache again
+
+    Layout:
+        `<table>.cache/manifest.json` describes the csv it was built from and points to a version folder
+        `<table>.cache/<version>/<i>.npy` values of column i, bytes of a string column
+        `<table>.cache/<version>/<i>.offsets.npy` offset of every value of a string column i
+        `<table>.cache/<version>/<i>.null.npy` null mask of column i, only for non float columns with nulls
+        `<table>.cache/<version>/zonemap.json` min, max and null count of each column per block
+    Args:
+        block_rows (int): rows per zone map block
+    """
+
+    def __init__(self, block_rows: int = DEFAULT_BLOCK_ROWS):
+        if block_rows < 1:
+            raise ValueError("Block rows must be a positive integer")
+        self.block_rows = block_rows
+        self._extend_lock = threading.Lock()
+        # csv -> (size, mtime_ns) before an append of the server -> (size, mtime_ns) after it
+        self._appends: Dict[Path, Dict[Tuple[int, int], Tuple[int, int]]] = {}
+
+    def cache_folder(self, file_path: Path) -> Path:
+        return file_path.with_name(f"{file_path.stem}.cache")
+
+    def load(
+        self,
+        file_path: Path,
+        size: Optional[int] = None,
+        mtime_ns: Optional[int] = None,
+    ) -> Optional[CachedTable]:
+        """
+        Memory map the cache of a csv file
+        Args:
+            file_path (Path): csv data file
+            size (int): known size of the csv, stat when not given
+            mtime_ns (int): known mtime of the csv, stat when not given
+        Returns:
+            CachedTable: None when no cache exists or the csv changed since it was built
+        """
+        cache_folder = self.cache_folder(file_path)
+        manifest = self._read_manifest(cache_folder)
+        if manifest is None or manifest.get("format") != CACHE_FORMAT:
+            return None
+        if size is None or mtime_ns is None:
+            stat = file_path.stat()
+            size, mtime_ns = stat.st_size, stat.st_mtime_ns
+        if manifest["size"] != size or manifest["mtime_ns"] != mtime_ns:
+            return None
+        version_folder = cache_folder / manifest["version"]
+        if not version_folder.is_dir():
+            return None
+        columns = [
+            CachedColumn(
+                column["name"],
+                version_folder / f"{i}.npy",
+                version_folder / f"{i}.null.npy" if column["nulls"] else None,
+                column["dtype"] == STRING_DTYPE,
+            )
+            for i, column in enumerate(manifest["columns"])
+        ]
+        return CachedTable(
+            row_count=manifest["row_count"],
+            columns=columns,
+            zone_map_path=version_folder / ZONE_MAP_FILE,
+            prefixes=manifest.get("prefixes"),
+        )
+
+    def appended(
+        self, file_path: Path, before: Tuple[int, int], after: Tuple[int, int]
+    ) -> None:
+        """
+        Record that the server appended rows to a csv, the only change a cache is extended with
+        Args:
+            file_path (Path): csv data file
+            before (Tuple[int, int]): size and mtime of the csv before the append
+            after (Tuple[int, int]): size and mtime of the csv after the append
+        """
+        with self._extend_lock:
+            self._appends.setdefault(file_path, {})[tuple(before)] = tuple(after)
+
+    def extend(
+        self,
+        file_path: Path,
+        size: int,
+        mtime_ns: int,
+        schema: Optional[Dict[str, str]] = None,
+    ) -> Optional[CachedTable]:
+        """
+        Add to the cache the rows appended to the csv since it was built or last extended,
+        only the appended bytes are parsed, the cached columns are copied with them into a new
+        version folder and the manifest is switched to it once complete, as a build does,
+        so a reader of the previous version never sees a column change
+        Args:
+            file_path (Path): csv data file
+            size (int): size of the csv to cache
+            mtime_ns (int): mtime of the csv to cache
+            schema (Dict[str, str]): declared columns type
+        Returns:
+            CachedTable: None when the csv changed otherwise than by appends of the server
+                or the appended values do not fit the cached column types, the cache has to be
+                built again
+        """
+        with self._extend_lock:
+            cache_folder = self.cache_folder(file_path)
+            manifest = self._read_manifest(cache_folder)
+            if manifest is None or manifest.get("format") != CACHE_FORMAT:
+                return None
+            if (manifest["size"], manifest["mtime_ns"]) == (size, mtime_ns):
+                # Extended by a concurrent scan
+                return self.load(file_path, size, mtime_ns)
+            cached_size, row_count = manifest["size"], manifest["row_count"]
+            version_folder = cache_folder / manifest["version"]
+            if size <= cached_size or not version_folder.is_dir():
+                return None
+            if not self._appended_since(
+                file_path, (cached_size, manifest["mtime_ns"]), (size, mtime_ns)
+            ):
+                return None
+            try:
+                with open(file_path, "rb") as f:
+                    f.seek(cached_size - 1)
+                    if f.read(1) != b"\n":
+                        return None
+                    tail = f.read(size - cached_size)
+                    if len(tail) != size - cached_size:
+                        return None
+                names = [column["name"] for column in manifest["columns"]]
+                appended = pd.read_csv(
+                    io.BytesIO(tail), header=None, names=names, dtype=schema_dtypes(schema)
+                )
+            except (OSError, ValueError, TypeError):
+                return None
+            arrays = _appended_arrays(appended, manifest["columns"], schema or {})
+            if arrays is None:
+                return None
+            new_row_count = row_count + len(appended)
+            version = uuid.uuid4().hex
+            new_version_folder = cache_folder / version
+            new_version_folder.mkdir()
+            try:
+                for i, column in enumerate(manifest["columns"]):
+                    values, nulls = arrays[i]
+                    if column["dtype"] == STRING_DTYPE:
+                        _extend_strings(
+                            version_folder / f"{i}.npy",
+                            new_version_folder / f"{i}.npy",
+                            values,
+                            row_count,
+                        )
+                    else:
+                        _extend_npy(
+                            np.load(version_folder / f"{i}.npy", mmap_mode="r"),
+                            new_version_folder / f"{i}.npy",
+                            values,
+                            row_count,
+                        )
+                    if nulls is None:
+                        continue
+                    if column["nulls"]:
+                        cached_nulls = np.load(version_folder / f"{i}.null.npy", mmap_mode="r")
+                    else:
+                        # First nulls of the column, the cached rows have none
+                        cached_nulls = np.zeros(row_count, dtype=bool)
+                        column["nulls"] = True
+                    _extend_npy(cached_nulls, new_version_folder / f"{i}.null.npy", nulls, row_count)
+                self._extend_zone_map(
+                    version_folder, new_version_folder, row_count, new_row_count, manifest["columns"]
+                )
+            except Exception:
+                shutil.rmtree(new_version_folder, ignore_errors=True)
+                raise
+            manifest["prefixes"].append([size, mtime_ns, new_row_count])
+            manifest.update(version=version, size=size, mtime_ns=mtime_ns, row_count=new_row_count)
+            self._write_manifest(cache_folder, manifest)
+            self._remove_stale_versions(cache_folder, version)
+            return self.load(file_path, size, mtime_ns)
+
+    def build(
+        self,
+        file_path: Path,
+        chunk_size: int,
+        schema: Optional[Dict[str, str]] = None,
+        read_chunks: Optional[Callable[[], Iterator[pd.DataFrame]]] = None,
+    ) -> Optional[CachedTable]:
+        """
+        Build the cache of a csv file with two bounded memory passes,
+        the first one resolves row count and column types, the second one fills the columns
+        Args:
+            file_path (Path): csv data file
+            chunk_size (int): number of rows parsed at a time
+            schema (Dict[str, str]): declared columns type, columns out of the schema are inferred
+            read_chunks (Callable): return a fresh iterator of parsed chunks, plain pandas chunks by default
+        Returns:
+            CachedTable: None for an empty table
+        """
+        if read_chunks is None:
+            read_chunks = partial(_read_chunks, file_path, chunk_size)
+        stat = file_path.stat()
+        row_count, columns = self._describe(read_chunks, schema or {})
+        if row_count == 0:
+            return None
+        cache_folder = self.cache_folder(file_path)
+        version = uuid.uuid4().hex
+        version_folder = cache_folder / version
+        version_folder.mkdir(parents=True)
+        try:
+            self._fill(version_folder, read_chunks, row_count, columns)
+            self._build_zone_map(version_folder, row_count, columns)
+        except Exception:
+            shutil.rmtree(version_folder, ignore_errors=True)
+            raise
+        with self._extend_lock:
+            # Appends before the build are part of it, those during the build extend it
+            appends = self._appends.get(file_path, {})
+            for state in [state for state in appends if state[0] < stat.st_size]:
+                del appends[state]
+        manifest = {
+            "format": CACHE_FORMAT,
+            "version": version,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "prefixes": [[stat.st_size, stat.st_mtime_ns, row_count]],
+            "row_count": row_count,
+            "columns": [
+                {"name": c["name"], "dtype": c["dtype"], "nulls": c["nulls"]} for c in columns
+            ],
+        }
+        self._write_manifest(cache_folder, manifest)
+        self._remove_stale_versions(cache_folder, version)
+        return self.load(file_path)
+
+    def _appended_since(
+        self, file_path: Path, state: Tuple[int, int], current: Tuple[int, int]
+    ) -> bool:
+        """
+        True when the csv went from `state` to `current` only by appends of the server,
+        the appends walked through are forgotten
+        """
+        appends = self._appends.get(file_path, {})
+        walked = []
+        while state != current:
+            if state not in appends:
+                return False
+            walked.append(state)
+            state = appends[state]
+        for state in walked:
+            del appends[state]
+        return True
+
+    @staticmethod
+    def _fill(
+        version_folder: Path, read_chunks: Callable, row_count: int, columns: List[Dict]
+    ) -> None:
+        arrays = [
+            np.lib.format.open_memmap(
+                version_folder / f"{i}.npy",
+                mode="w+",
+                dtype=np.uint8 if column["kind"] == "string" else column["dtype"],
+                shape=(column["bytes"] if column["kind"] == "string" else row_count,),
+            )
+            for i, column in enumerate(columns)
+        ]
+        offsets = {
+            i: np.lib.format.open_memmap(
+                offsets_path(version_folder / f"{i}.npy"),
+                mode="w+",
+                dtype=np.int64,
+                shape=(row_count + 1,),
+            )
+            for i, column in enumerate(columns)
+            if column["kind"] == "string"
+        }
+        nulls = {
+            i: np.lib.format.open_memmap(
+                version_folder / f"{i}.null.npy", mode="w+", dtype=bool, shape=(row_count,)
+            )
+            for i, column in enumerate(columns)
+            if column["nulls"]
+        }
+        start = 0
+        for chunk in read_chunks():
+            stop = start + len(chunk)
+            for i, column in enumerate(columns):
+                series = chunk.iloc[:, i]
+                if i in nulls:
+                    nulls[i][start:stop] = series.isna().to_numpy()
+                    series = series.fillna(_NULL_FILL[column["kind"]])
+                if column["kind"] == "string":
+                    byte_start = int(offsets[i][start])
+                    data, chunk_offsets = encode_strings(series.astype(str).tolist(), byte_start)
+                    offsets[i][start : stop + 1] = chunk_offsets
+                    if byte_start + len(data) > len(arrays[i]):
+                        raise ValueError("The csv changed while its cache was built")
+                    arrays[i][byte_start : byte_start + len(data)] = data
+                    continue
+                arrays[i][start:stop] = series.to_numpy(dtype=arrays[i].dtype)
+            start = stop
+        for array in [*arrays, *nulls.values(), *offsets.values()]:
+            array.flush()
+
+    def _build_zone_map(
+        self, version_folder: Path, row_count: int, columns: List[Dict]
+    ) -> None:
+        arrays = _mapped_arrays(version_folder, columns)
+        zone_map = ZoneMap.build(row_count, self.block_rows, arrays)
+        zone_map.save(version_folder / ZONE_MAP_FILE)
+
+    def _extend_zone_map(
+        self,
+        version_folder: Path,
+        new_version_folder: Path,
+        row_count: int,
+        new_row_count: int,
+        columns: List[Dict],
+    ) -> None:
+        zone_map = ZoneMap.load(version_folder / ZONE_MAP_FILE)
+        if zone_map is None or zone_map.row_count != row_count:
+            self._build_zone_map(new_version_folder, new_row_count, columns)
+            return
+        arrays = _mapped_arrays(new_version_folder, columns)
+        zone_map.extend(new_row_count, arrays).save(new_version_folder / ZONE_MAP_FILE)
+
+    def invalidate(self, file_path: Path) -> None:
+        """
+        Remove the cache of a csv file
+        """
+        shutil.rmtree(self.cache_folder(file_path), ignore_errors=True)
+
+    @staticmethod
+    def _describe(read_chunks: Callable, schema: Dict[str, str]):
+        row_count = 0
+        columns: List[Dict] = []
+        for chunk in read_chunks():
+            if not columns:
+                columns = [
+                    {
+                        "name": str(name),
+                        "kind": SCHEMA_KINDS.get(schema.get(str(name))),
+                        "declared": str(name) in schema,
+                        "bytes": 0,
+                        "nulls": False,
+                    }
+                    for name in chunk.columns
+                ]
+            row_count += len(chunk)
+            for i, column in enumerate(columns):
+                series = chunk.iloc[:, i]
+                if not column["declared"]:
+                    column["kind"] = _merge_kind(column["kind"], _kind(series))
+                column["nulls"] = column["nulls"] or bool(series.isna().any())
+                # A column may only turn to string in a later chunk so its size is always tracked
+                if not column["declared"] or column["kind"] == "string":
+                    column["bytes"] += utf8_size(series.dropna().astype(str).tolist())
+        for column in columns:
+            # Nulls of float columns are kept as NaN in the values
+            column["nulls"] = column["nulls"] and column["kind"] != "float"
+            match column["kind"]:
+                case "int":
+                    column["dtype"] = "<i8"
+                case "float":
+                    column["dtype"] = "<f8"
+                case "bool":
+                    column["dtype"] = "|b1"
+                case _:
+                    column["kind"] = "string"
+                    column["dtype"] = STRING_DTYPE
+        return row_count, columns
+
+    @staticmethod
+    def _read_manifest(cache_folder: Path) -> Optional[Dict]:
+        try:
+            with open(cache_folder / MANIFEST_FILE) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _write_manifest(cache_folder: Path, manifest: Dict) -> None:
+        tmp_file = cache_folder / f"{MANIFEST_FILE}.{uuid.uuid4().hex}"
+        with open(tmp_file, "w") as f:
+            json.dump(manifest, f)
+        os.replace(tmp_file, cache_folder / MANIFEST_FILE)
+
+    @staticmethod
+    def _remove_stale_versions(cache_folder: Path, version: str) -> None:
+        for item in cache_folder.iterdir():
+            if item.is_dir() and item.name != version:
+                shutil.rmtree(item, ignore_errors=True)
+
+
+def _read_chunks(file_path: Path, chunk_size: int) -> Iterator[pd.DataFrame]:
+    with pd.read_csv(file_path, chunksize=chunk_size) as reader:
+        for chunk in reader:
+            yield chunk
+
+
+def _load_values(path: Path, string: bool) -> Union[np.ndarray, StringArray]:
+    if string:
+        return StringArray(
+            np.load(path, mmap_mode="r"), np.load(offsets_path(path), mmap_mode="r")
+        )
+    return np.load(path, mmap_mode="r")
+
+
+def _mapped_arrays(version_folder: Path, columns: List[Dict]) -> Dict:
+    return {
+        column["name"]: (
+            _load_values(version_folder / f"{i}.npy", column["dtype"] == STRING_DTYPE),
+            np.load(version_folder / f"{i}.null.npy", mmap_mode="r")
+            if column["nulls"]
+            else None,
+        )
+        for i, column in enumerate(columns)
+    }
+
+
+def _appended_arrays(
+    appended: pd.DataFrame, columns: List[Dict], schema: Dict[str, str]
+) -> Optional[List[Tuple[np.ndarray, Optional[np.ndarray]]]]:
+    """
+    Values and null mask of every column of appended rows in the cached dtypes,
+    None when a value does not fit the type of its cached column
+    """
+    arrays = []
+    for i, column in enumerate(columns):
+        series = appended.iloc[:, i]
+        dtype = np.dtype(column["dtype"])
+        kind = _dtype_kind(dtype)
+        values = series.dropna()
+        # Same rule as a build, an undeclared column whose new values need another type is rebuilt
+        if column["name"] not in schema and _merge_kind(kind, _kind(series)) != kind:
+            return None
+        nulls = None
+        if kind != "float" and (column["nulls"] or len(values) < len(series)):
+            nulls = series.isna().to_numpy()
+            series = series.fillna(_NULL_FILL[kind])
+        if kind == "string":
+            series = series.astype(str)
+        try:
+            arrays.append((series.to_numpy(dtype=dtype), nulls))
+        except (ValueError, TypeError):
+            return None
+    return arrays
+
+
+def _extend_npy(cached: np.ndarray, path: Path, values: np.ndarray, row_count: int) -> None:
+    """
+    Write a .npy file of the first `row_count` cached rows followed by `values`
+    """
+    array = np.lib.format.open_memmap(
+        path, mode="w+", dtype=values.dtype, shape=(row_count + len(values),)
+    )
+    array[:row_count] = cached[:row_count]
+    array[row_count:] = values
+    array.flush()
+
+
+def _extend_strings(cached_path: Path, path: Path, values: np.ndarray, row_count: int) -> None:
+    """
+    Write a string column of the first `row_count` cached strings followed by `values`
+    """
+    cached_offsets = np.load(offsets_path(cached_path), mmap_mode="r")
+    byte_count = int(cached_offsets[row_count])
+    data, offsets = encode_strings(values, byte_count)
+    _extend_npy(np.load(cached_path, mmap_mode="r"), path, data, byte_count)
+    _extend_npy(cached_offsets, offsets_path(path), offsets[1:], row_count + 1)
+
+
+def _dtype_kind(dtype: np.dtype) -> str:
+    match dtype.kind:
+        case "i":
+            return "int"
+        case "f":
+            return "float"
+        case "b":
+            return "bool"
+    return "string"
+
+
+def _kind(series: pd.Series) -> str:
+    match series.dtype.kind:
+        case "i" | "u":
+            return "int"
+        case "f":
+            return "float"
+        case "b":
+            return "bool"
+    return "string"
+
+
+def _merge_kind(current: Optional[str], new: str) -> str:
+    if current is None or current == new:
+        return new
+    if {current, new} == {"int", "float"}:
+        return "float"
+    return "string"
@@ -0,0 +1,1123 @@
+import csv
+import io
+import os
+import shutil
+import threading
+import uuid
+import pandas as pd
+from dataclasses import replace
+from functools import partial
+from pathlib import Path
+from typing import BinaryIO, List, Dict, Iterator, Optional, Tuple, Union
+from ..connection import ConnectionIdentity
+from .column_cache import ColumnCache, CachedTable
+from .scan_filter import ScanFilter, filters_mask
+from .schema import schema_dtypes, report_schema_mismatch, coerce_value, typed_chunk
+from .catalog import Catalog, TableEntry
+from .zone_map import ZoneMap, DEFAULT_BLOCK_ROWS
+from .index import HashIndex, SortedIndex, IndexManager, INDEX_METHODS, INDEX_SELECTIVITY
+from .parallel_scan import ParallelScanner
+from .mmap_reader import MmapReader
+from .block_storage import (
+    BlockStorage,
+    CODECS,
+    CSV_STORAGE,
+    BLOCK_STORAGE,
+    BLOCK_SUFFIX,
+)
+from .group_commit import GroupCommitWriter
+from .write_ahead_log import WriteAheadLog, Checkpointer
+from .partition import PartitionedTable, PARTITIONED_STORAGE, partition_name
+from .statistics import TableStatistics
+from .buffer_pool import BufferPool
+from .shards import ShardedTable, SHARDED_STORAGE, DEFAULT_SHARD_WORKERS, scan_shards
+
+__all__ = ["FileManager", "DEFAULT_CHUNK_SIZE", "READERS"]
+
+# Default number of rows in a scanned batch
+DEFAULT_CHUNK_SIZE = 10000
+# Bytes read from the head of a file to estimate the width of a row
+ROW_WIDTH_SAMPLE_SIZE = 64 * 1024
+# Csv parsers a FileManager can use
+READERS = ("pandas", "mmap")
+# Suffix of the validated rows of a bulk load waiting to be appended
+STAGING_SUFFIX = ".load"
+# Blocks of a compressed table built from one parsed batch of a bulk load
+BLOCKS_PER_LOAD_BATCH = 16
+
+
+class FileManager:
+    """
+    This class directly interact with server file system
+    Args:
+        chunk_size (int): number of rows in a scanned batch
+        chunk_memory (int): optional upper bound in bytes of a scanned batch,
+            the number of rows is then also bounded by the estimated row width
+        column_cache (bool): keep a columnar binary sidecar of each table to skip csv parsing
+        block_rows (int): rows per zone map block of the column cache and per block of a compressed table
+        catalog (Catalog): tables metadata shared by the server, a private one is created when not given
+        parallel_degree (int): worker processes parsing a csv file, 1 parses in the calling thread
+        reader (str): csv parser of the calling thread, `pandas` or `mmap` to locate fields
+            on a memory map and only decode the values a scan returns
+        writer (GroupCommitWriter): buffer grouping the appends of checkpoints and bulk loads,
+            a private one is created when not given
+        wal (WriteAheadLog): log of committed transactions, its pending commits are applied
+            to the table files by `checkpoint` and before a table is read or rewritten
+        buffer_pool (BufferPool): decoded column blocks of compressed tables shared by every scan,
+            a private one is created when not given
+        shard_workers (int): threads scanning the shards of a sharded table at the same time
+    """
+
+    def __init__(
+        self,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        chunk_memory: Optional[int] = None,
+        column_cache: bool = True,
+        block_rows: int = DEFAULT_BLOCK_ROWS,
+        catalog: Optional[Catalog] = None,
+        parallel_degree: int = 1,
+        reader: str = "pandas",
+        writer: Optional[GroupCommitWriter] = None,
+        wal: Optional[WriteAheadLog] = None,
+        buffer_pool: Optional[BufferPool] = None,
+        shard_workers: int = DEFAULT_SHARD_WORKERS,
+    ):
+        if chunk_size < 1:
+            raise ValueError("Chunk size must be a positive integer")
+        if chunk_memory is not None and chunk_memory < 1:
+            raise ValueError("Chunk memory must be a positive integer")
+        if parallel_degree < 1:
+            raise ValueError("Parallel degree must be a positive integer")
+        if reader not in READERS:
+            raise ValueError(f"Unknown reader {reader}")
+        if shard_workers < 1:
+            raise ValueError("Shard workers must be a positive integer")
+        self.chunk_size = chunk_size
+        self.chunk_memory = chunk_memory
+        self.block_rows = block_rows
+        self.column_cache = ColumnCache(block_rows) if column_cache else None
+        self.catalog = catalog or Catalog()
+        self.indexes = IndexManager()
+        self.parallel_degree = parallel_degree
+        self.parallel_scanner = ParallelScanner()
+        self.reader = reader
+        self.writer = writer or GroupCommitWriter()
+        self.wal = wal
+        self.buffer_pool = buffer_pool or BufferPool()
+        self.shard_workers = shard_workers
+        self._apply_lock = threading.Lock()
+
+    def create_table_file(
+        self,
+        con: ConnectionIdentity,
+        database: str,
+        table_name: str,
+        cols_def: List,
+        storage: str = CSV_STORAGE,
+        partition_by: Optional[str] = None,
+    ) -> Path:
+        """
+        Create a data file
+
+        Args:
+            con (ConnectionIdentity): current client connection
+            database (str): database name
+            table_name (str): table name
+            cols_def (list): columns definition
+            storage (str): CSV for a plain csv file, ZLIB, GZIP or LZMA for compressed blocks,
+                SHARDS for a folder of csv files
+            partition_by (str): column whose values split a csv table into one folder per value
+
+        Raises:
+            ValueError: when the storage is unknown or the partition column is invalid
+            RuntimeError: when failed to create file
+
+        Returns:
+            Path: file location
+        """
+        if storage not in (CSV_STORAGE, SHARDED_STORAGE) and storage not in CODECS:
+            raise ValueError(f"Unknown table storage {storage}")
+        if partition_by is not None:
+            if partition_by not in [d["column_name"] for d in cols_def]:
+                raise ValueError(f"Column {partition_by} does not exists")
+            if storage != CSV_STORAGE:
+                raise ValueError("A partitioned table is stored as csv files")
+        self._apply_log()
+        file_folder = Path() / database
+        # Check folder exists
+        if not file_folder.exists():
+            file_folder.mkdir(parents=True)
+        columns = [d["column_name"] for d in cols_def]
+        df = pd.DataFrame(data=[], columns=columns)
+        meta_df = pd.DataFrame(data=cols_def)
+        csv_path = file_folder / f"{table_name}.csv"
+        block_storage = BlockStorage(csv_path.with_suffix(BLOCK_SUFFIX))
+        partitioned_table = PartitionedTable(file_folder / table_name)
+        file_path = csv_path
+        try:
+            if partition_by is not None:
+                file_path = PartitionedTable.create(
+                    partitioned_table.folder, partition_by
+                ).folder
+                csv_path.unlink(missing_ok=True)
+                block_storage.drop()
+            elif storage == CSV_STORAGE:
+                df.to_csv(csv_path, index=False)
+                block_storage.drop()
+                partitioned_table.drop()
+            elif storage == SHARDED_STORAGE:
+                file_path = ShardedTable.create(partitioned_table.folder).folder
+                csv_path.unlink(missing_ok=True)
+                block_storage.drop()
+            else:
+                file_path = BlockStorage.create(
+                    block_storage.file_path, storage, columns
+                ).file_path
+                csv_path.unlink(missing_ok=True)
+                partitioned_table.drop()
+            if self.column_cache:
+                self.column_cache.invalidate(csv_path)
+            self.indexes.drop_table(csv_path)
+            # A new blocks file reuses the positions the blocks of the dropped one were cached by
+            self.buffer_pool.invalidate(str(block_storage.file_path))
+            meta_df.to_csv(file_folder / f"meta.{table_name}.csv", index=False)
+            self.statistics_path(database, table_name).unlink(missing_ok=True)
+            self.catalog.invalidate(database, table_name)
+        except Exception as e:
+            raise RuntimeError(f"Unable to create table file {e}")
+        return file_path
+
+    def prepare_insert(
+        self,
+        con: ConnectionIdentity,
+        database: str,
+        table_name: str,
+        column_names: Optional[List[str]],
+        rows: List[Tuple],
+    ) -> Tuple[str, str, List[List]]:
+        """
+        Validate the rows of an INSERT of a transaction, they are written once the transaction
+        is committed to the write ahead log and checkpointed
+        Args:
+            con (ConnectionIdentity): current client connection
+            database (str): database name
+            table_name (str): table name
+            column_names (List[str]): columns of the values, None for every column in table order
+            rows (List[Tuple]): values of each row
+
+        Raises:
+            FileNotFoundError: if data file not found
+            ValueError: if a column does not exists or a value does not match its column type
+
+        Returns:
+            (str, str, List[List]): database, table name and full rows in table column order
+        """
+        entry = self.catalog.table(database, table_name)
+        header = self._table_header(entry)
+        return database, table_name, self._table_records(
+            header, entry.schema or {}, column_names, rows
+        )
+
+    def checkpoint(self) -> None:
+        """
+        Apply the pending commits of the write ahead log to the table files, in commit order
+        The csv size or blocks count of each written table is logged before it is changed,
+        a commit interrupted by a crash is undone to these marks and applied again
+
+        Raises:
+            RuntimeError: when a commit could not be applied, it stays pending
+        """
+        if self.wal is None:
+            return
+        with self._apply_lock:
+            for lsn, writes in self.wal.pending():
+                # Rows of a table dropped since the commit are discarded
+                writes = [w for w in writes if self.catalog.exists(w[0], w[1])]
+                try:
+                    marks = self.wal.interrupted(lsn)
+                    if marks is not None:
+                        self._restore_marks(marks)
+                    else:
+                        tables = {(database, table_name) for database, table_name, _ in writes}
+                        marks = {
+                            f"{database}.{table_name}": self._table_mark(database, table_name)
+                            for database, table_name in sorted(tables)
+                        }
+                        self.wal.begin_apply(lsn, marks)
+                    for database, table_name, records in writes:
+                        entry = self.catalog.table(database, table_name)
+                        self._write_records(entry, self._table_header(entry), records)
+                except Exception as e:
+                    raise RuntimeError(f"Unable to apply commit {lsn}: {e}") from e
+                self.wal.applied(lsn)
+
+    def copy_from(
+        self,
+        con: ConnectionIdentity,
+        database: str,
+        table_name: str,
+        source: Union[Path, BinaryIO],
+    ) -> int:
+        """
+        Bulk load a csv file into a table
+        The source is validated against the declared column types chunk by chunk into a staging file
+        next to the table, then appended in one write and one sync, the column cache and indexes
+        are rebuilt once at the end. Nothing is appended when a chunk does not validate
+        Args:
+            con (ConnectionIdentity): current client connection
+            database (str): database name
+            table_name (str): table name
+            source (Path | BinaryIO): csv with a header, its columns are a subset of the table columns
+                in any order, missing columns are null
+
+        Raises:
+            FileNotFoundError: if data file or source not found
+            ValueError: if a column does not exists or a value does not match its column type
+            RuntimeError: when the rows could not be written
+
+        Returns:
+            int: number of loaded rows
+        """
+        self._apply_log()
+        entry = self.catalog.table(database, table_name)
+        compressed = entry.storage == BLOCK_STORAGE
+        header = self._table_header(entry)
+        schema = entry.schema or {}
+        staging_path = entry.file_path.with_name(
+            f".{entry.file_path.name}.{uuid.uuid4().hex}{STAGING_SUFFIX}"
+        )
+        try:
+            row_count = self._stage_rows(source, staging_path, header, schema)
+            if row_count and entry.storage == PARTITIONED_STORAGE:
+                self._load_partitions(entry, header, staging_path)
+            elif row_count and entry.storage == SHARDED_STORAGE:
+                self._load_shard(entry, header, staging_path)
+            elif row_count:
+                flush = partial(
+                    self._append_blocks if compressed else self._append_csv, entry
+                )
+                # Serialized with the checkpoints writing the table, so that their
+                # table marks stay exact
+                with self._apply_lock:
+                    self.writer.append(entry.file_path, staging_path, 0, flush)
+        finally:
+            staging_path.unlink(missing_ok=True)
+        if row_count and entry.storage == CSV_STORAGE:
+            self._refresh_sidecars(database, table_name)
+        return row_count
+
+    def create_index(
+        self,
+        con: ConnectionIdentity,
+        database: str,
+        table_name: str,
+        index_name: str,
+        column_name: str,
+        method: str = HashIndex.method,
+    ) -> Path:
+        """
+        Create an index on a column, a HASH index serves equality filters,
+        a BTREE index serves equality and range filters and ordered scans
+        Args:
+            con (ConnectionIdentity): current client connection
+            database (str): database name
+            table_name (str): table name
+            index_name (str): index name
+            column_name (str): indexed column
+            method (str): HASH or BTREE
+
+        Raises:
+            FileNotFoundError: if data file not found
+            ValueError: if the column does not exists, the index already exists or the method is unknown
+            RuntimeError: when the column cache is disabled
+
+        Returns:
+            Path: index location
+        """
+        if self.column_cache is None:
+            raise RuntimeError("Indexes require the column cache")
+        self._apply_log()
+        entry = self.catalog.table(database, table_name)
+        if entry.storage == BLOCK_STORAGE:
+            raise ValueError(f"Compressed table {database}.{table_name} can not be indexed")
+        if entry.storage == PARTITIONED_STORAGE:
+            raise ValueError(f"Partitioned table {database}.{table_name} can not be indexed")
+        if entry.storage == SHARDED_STORAGE:
+            raise ValueError(f"Sharded table {database}.{table_name} can not be indexed")
+        if column_name not in self._read_header(entry.file_path):
+            raise ValueError(f"Column {column_name} does not exists")
+        cached_table = self._cached_table(entry, self.rows_per_chunk(entry.file_path))
+        self.indexes.create(
+            entry.file_path,
+            index_name,
+            column_name,
+            cached_table,
+            entry.size,
+            entry.mtime_ns,
+            method,
+        )
+        return self.indexes.index_path(entry.file_path, index_name)
+
+    def scan_file(
+        self,
+        con: ConnectionIdentity,
+        database: str,
+        table_name: str,
+        filters: Optional[List[ScanFilter]] = None,
+        columns: Optional[List[str]] = None,
+        parallel_degree: Optional[int] = None,
+        ordered: bool = True,
+        use_index: Optional[bool] = None,
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Stream file content as batches of rows, only one batch is held in memory
+        Columns are parsed with the types declared in `meta.<table>.csv`
+        Batches are sliced from the column cache when it is enabled, the cache is built on first scan
+        A selective filter on an indexed column fetches only the matching rows from the cache
+        With a parallel degree above 1 the csv is parsed by worker processes, one byte range each
+        A compressed table only decompresses the blocks whose statistics may match the filters,
+        a partitioned table only reads the partitions whose value may match them,
+        the shards of a sharded table are scanned by `shard_workers` threads
+        Args:
+            con (ConnectionIdentity): connection
+            database (str): database name
+            table_name (str): table name
+            filters (List[ScanFilter]): conditions pushed down from the where clause,
+                evaluated on each batch columns before rows are returned
+            columns (List[str]): columns referenced by the query, only those are parsed,
+                None reads every column
+            parallel_degree (int): worker processes for this scan, the server setting when None
+            ordered (bool): keep file order, else parallel batches are returned as they are parsed
+            use_index (bool): whether the filters may be answered by an index,
+                None decides with the statistics of the table
+
+        Raises:
+            FileNotFoundError: if data file not found
+            ValueError: if a referenced column does not exists or a value does not match its column type
+
+        Returns:
+            Iterator[pd.DataFrame]: batches of at most `rows_per_chunk` rows
+        """
+        self._apply_log()
+        entry = self.catalog.table(database, table_name)
+        parallel_degree = parallel_degree or self.parallel_degree
+        if entry.storage == BLOCK_STORAGE:
+            return self._scan_blocks(entry, filters, columns, parallel_degree)
+        if entry.storage == PARTITIONED_STORAGE:
+            return self._scan_partitions(entry, filters, columns, parallel_degree, ordered)
+        if entry.storage == SHARDED_STORAGE:
+            return self._scan_shards(entry, filters, columns, parallel_degree, ordered)
+        return self._scan_csv(entry, filters, columns, parallel_degree, ordered, use_index)
+
+    def _scan_csv(
+        self,
+        entry: TableEntry,
+        filters: Optional[List[ScanFilter]],
+        columns: Optional[List[str]],
+        parallel_degree: int,
+        ordered: bool,
+        use_index: Optional[bool] = None,
+    ) -> Iterator[pd.DataFrame]:
+        file_path, schema = entry.file_path, entry.schema
+        chunk_size = self.rows_per_chunk(file_path)
+        cached_table = self._cached_table(entry, chunk_size, parallel_degree)
+        if cached_table is not None:
+            usecols = self._resolve_columns(cached_table.column_names, columns, filters)
+            indexed = (
+                self.indexes.lookup(
+                    file_path, cached_table, filters, entry.size, entry.mtime_ns
+                )
+                if filters
+                and (self._index_may_help(entry, filters) if use_index is None else use_index)
+                else None
+            )
+            if indexed is not None:
+                rows, filters = indexed
+                return cached_table.take_batches(rows, chunk_size, filters, usecols)
+            return cached_table.batches(chunk_size, filters, usecols)
+        usecols = self._resolve_columns(self._read_header(file_path), columns, filters)
+        return self._parse_chunks(
+            file_path, chunk_size, usecols, schema, filters, parallel_degree, ordered
+        )
+
+    def scan_ordered(
+        self,
+        con: ConnectionIdentity,
+        database: str,
+        table_name: str,
+        order_by: str,
+        descending: bool = False,
+        columns: Optional[List[str]] = None,
+    ) -> Optional[Iterator[pd.DataFrame]]:
+        """
+        Stream file content ordered by a column using its BTREE index, no sort is done
+        Args:
+            con (ConnectionIdentity): connection
+            database (str): database name
+            table_name (str): table name
+            order_by (str): column to order by
+            descending (bool): descending order, nulls first
+            columns (List[str]): columns referenced by the query, None for all
+
+        Raises:
+            FileNotFoundError: if data file not found
+
+        Returns:
+            Iterator[pd.DataFrame]: None when the column has no BTREE index
+        """
+        self._apply_log()
+        entry = self.catalog.table(database, table_name)
+        if entry.storage != CSV_STORAGE:
+            return None
+        chunk_size = self.rows_per_chunk(entry.file_path)
+        cached_table = self._cached_table(entry, chunk_size)
+        if cached_table is None:
+            return None
+        index = self.indexes.ordered(
+            entry.file_path, cached_table, order_by, entry.size, entry.mtime_ns
+        )
+        if index is None:
+            return None
+        usecols = self._resolve_columns(cached_table.column_names, columns, None)
+        rows = index.ordered_rows(cached_table.row_count, descending)
+        return cached_table.take_batches(rows, chunk_size, None, usecols, keep_order=True)
+
+    def select_file(
+        self,
+        con: ConnectionIdentity,
+        database: str,
+        table_name: str,
+        filters: Optional[List[ScanFilter]] = None,
+        columns: Optional[List[str]] = None,
+        parallel_degree: Optional[int] = None,
+        ordered: bool = True,
+    ) -> Iterator[Dict]:
+        """
+        Return file content row by row, rows are read lazily batch by batch
+        Args:
+            con (ConnectionIdentity): connection
+            database (str): database name
+            table_name (str): table name
+            filters (List[ScanFilter]): conditions pushed down from the where clause
+            columns (List[str]): columns referenced by the query, None for all
+            parallel_degree (int): worker processes for this scan, the server setting when None
+            ordered (bool): keep file order
+
+        Raises:
+            FileNotFoundError: if data file not found
+
+        Returns:
+            Iterator[Dict]
+        """
+        batches = self.scan_file(
+            con, database, table_name, filters, columns, parallel_degree, ordered
+        )
+        return (row for batch in batches for row in batch.to_dict(orient="records"))
+
+    def analyze_table(
+        self, con: ConnectionIdentity, database: str, table_name: str
+    ) -> TableStatistics:
+        """
+        Compute and store the statistics of a table: row count, and per column an estimate
+        of the distinct values, the null fraction and an equi-depth histogram
+        Args:
+            con (ConnectionIdentity): current client connection
+            database (str): database name
+            table_name (str): table name
+
+        Raises:
+            FileNotFoundError: if data file not found
+
+        Returns:
+            TableStatistics
+        """
+        self._apply_log()
+        entry = self.catalog.table(database, table_name)
+        version = self._data_version(entry)
+        statistics = TableStatistics.collect(
+            self.scan_file(con, database, table_name, ordered=False), version
+        )
+        statistics.save(self.statistics_path(database, table_name))
+        return statistics
+
+    def table_statistics(self, database: str, table_name: str) -> Optional[TableStatistics]:
+        """
+        Statistics of a table computed by ANALYZE, None when there are none
+        or the table changed since they were computed
+        """
+        entry = self.catalog.table(database, table_name)
+        statistics = TableStatistics.load(self.statistics_path(database, table_name))
+        if statistics is None or statistics.version != self._data_version(entry):
+            return None
+        return statistics
+
+    def table_indexes(self, database: str, table_name: str) -> List[HashIndex]:
+        """
+        Indexes of a table, only plain csv tables are indexed
+        Raises:
+            FileNotFoundError: if data file not found
+        """
+        entry = self.catalog.table(database, table_name)
+        if entry.storage != CSV_STORAGE:
+            return []
+        return list(self.indexes.indexes(entry.file_path).values())
+
+    def statistics_path(self, database: str, table_name: str) -> Path:
+        return self.catalog.root / database / f"stats.{table_name}.json"
+
+    def table_schema(self, database: str, table_name: str) -> Optional[Dict[str, str]]:
+        """
+        Declared columns type of a table, answered by the catalog
+        Args:
+            database (str): database name
+            table_name (str): table name
+        Raises:
+            FileNotFoundError: if data file not found
+        Returns:
+            Dict[str, str]: column name -> INT | FLOAT | STRING, None without meta file
+        """
+        return self.catalog.schema(database, table_name)
+
+    def rows_per_chunk(self, file_path: Path) -> int:
+        """
+        Number of rows in a batch, bounded by `chunk_memory` when it is set
+        Args:
+            file_path (Path): data file
+        Returns:
+            int
+        """
+        if self.chunk_memory is None:
+            return self.chunk_size
+        return max(min(self.chunk_memory // self._row_width(file_path), self.chunk_size), 1)
+
+    def close(self) -> None:
+        """
+        Stop the worker processes of parallel scans
+        """
+        self.parallel_scanner.close()
+
+    def _apply_log(self) -> None:
+        """
+        Apply pending commits before a table is read or rewritten, so that every committed row is seen
+        """
+        if self.wal is not None and self.wal.has_pending():
+            self.checkpoint()
+
+    def _data_version(self, entry: TableEntry):
+        """
+        State of the data files of a table, as stored with its statistics
+        """
+        if entry.storage == PARTITIONED_STORAGE:
+            return PartitionedTable(entry.file_path).marks()
+        if entry.storage == SHARDED_STORAGE:
+            return {
+                shard.name: [shard.stat().st_size, shard.stat().st_mtime_ns]
+                for shard in ShardedTable(entry.file_path).shards()
+            }
+        return [entry.size, entry.mtime_ns]
+
+    def _index_may_help(self, entry: TableEntry, filters: List[ScanFilter]) -> bool:
+        """
+        False when the statistics of the table expect the filters to keep too many rows
+        for an index, so that a stale index is not rebuilt for nothing
+        """
+        if not self.indexes.indexes(entry.file_path):
+            return False
+        statistics = self.table_statistics(entry.database, entry.table_name)
+        return statistics is None or statistics.selectivity(filters) <= INDEX_SELECTIVITY
+
+    def _table_mark(self, database: str, table_name: str) -> Union[int, Dict[str, int]]:
+        entry = self.catalog.table(database, table_name)
+        if entry.storage == BLOCK_STORAGE:
+            return len(BlockStorage(entry.file_path).load_index()["blocks"])
+        if entry.storage == PARTITIONED_STORAGE:
+            return PartitionedTable(entry.file_path).marks()
+        if entry.storage == SHARDED_STORAGE:
+            return ShardedTable(entry.file_path).mark()
+        return entry.size
+
+    def _restore_marks(self, marks: Dict[str, Union[int, Dict[str, int]]]) -> None:
+        """
+        Undo the part of an interrupted apply that reached the table files
+        """
+        for key, mark in marks.items():
+            database, table_name = key.split(".", 1)
+            entry = self.catalog.table(database, table_name)
+            if entry.storage == BLOCK_STORAGE:
+                BlockStorage(entry.file_path).truncate(mark)
+            elif entry.storage == PARTITIONED_STORAGE:
+                PartitionedTable(entry.file_path).restore(mark)
+            elif entry.storage == SHARDED_STORAGE:
+                ShardedTable(entry.file_path).restore(mark)
+            elif entry.size > mark:
+                with open(entry.file_path, "r+b") as f:
+                    f.truncate(mark)
+                    os.fsync(f.fileno())
+            self.catalog.invalidate(database, table_name)
+
+    def _table_header(self, entry: TableEntry) -> List[str]:
+        if entry.storage == BLOCK_STORAGE:
+            return BlockStorage(entry.file_path).columns
+        if entry.storage == PARTITIONED_STORAGE:
+            # Part files hold the columns in declaration order
+            return list(entry.schema)
+        if entry.storage == SHARDED_STORAGE:
+            if entry.schema:
+                return list(entry.schema)
+            shards = ShardedTable(entry.file_path).shards()
+            if not shards:
+                raise ValueError(f"Sharded table {entry.table_name} has no schema nor shard")
+            return self._read_header(shards[0])
+        return self._read_header(entry.file_path)
+
+    def _write_records(self, entry: TableEntry, header: List[str], records: List[List]) -> None:
+        """
+        Append full table rows through the group commit writer
+        """
+        if not records:
+            return
+        if entry.storage == PARTITIONED_STORAGE:
+            partitioned_table = PartitionedTable(entry.file_path)
+            position = header.index(partitioned_table.column)
+            partitions: Dict[str, List[List]] = {}
+            for record in records:
+                partitions.setdefault(partition_name(record[position]), []).append(record)
+            for part_records in partitions.values():
+                part_path = partitioned_table.append_path(part_records[0][position], header)
+                self._write_records(
+                    replace(entry, file_path=part_path, storage=CSV_STORAGE),
+                    header,
+                    part_records,
+                )
+            return
+        if entry.storage == SHARDED_STORAGE:
+            shard_path = ShardedTable(entry.file_path).append_path(header)
+            self._write_records(
+                replace(entry, file_path=shard_path, storage=CSV_STORAGE), header, records
+            )
+            return
+        if entry.storage == BLOCK_STORAGE:
+            item = pd.DataFrame(records, columns=header)
+            size = item.memory_usage(deep=True).sum()
+            flush = partial(self._append_blocks, entry)
+        else:
+            text = io.StringIO()
+            csv.writer(text, lineterminator="\n").writerows(records)
+            item = text.getvalue().encode("utf-8")
+            size = len(item)
+            flush = partial(self._append_csv, entry)
+        self.writer.append(entry.file_path, item, size, flush)
+
+    @staticmethod
+    def _table_records(
+        header: List[str],
+        schema: Dict[str, str],
+        column_names: Optional[List[str]],
+        rows: List[Tuple],
+    ) -> List[List]:
+        """
+        Full table rows in header order, values converted to the declared column types
+        """
+        column_names = header if column_names is None else column_names
+        for column_name in column_names:
+            if column_name not in header:
+                raise ValueError(f"Column {column_name} does not exists")
+        if len(set(column_names)) != len(column_names):
+            raise ValueError("A column is given more than once")
+        records = []
+        for row in rows:
+            if len(row) != len(column_names):
+                raise ValueError(f"Expect {len(column_names)} values got {len(row)}")
+            values = dict(zip(column_names, row))
+            records.append(
+                [
+                    coerce_value(column, schema.get(column), values.get(column))
+                    for column in header
+                ]
+            )
+        return records
+
+    def _stage_rows(
+        self,
+        source: Union[Path, BinaryIO],
+        staging_path: Path,
+        header: List[str],
+        schema: Dict[str, str],
+    ) -> int:
+        """
+        Validate the source chunk by chunk and write its rows in table order, without header
+        """
+        row_count = 0
+        try:
+            reader = pd.read_csv(source, chunksize=self.chunk_size, dtype=str)
+        except pd.errors.EmptyDataError:
+            raise ValueError("Source has no header")
+        with reader, open(staging_path, "w", newline="") as f:
+            for chunk in reader:
+                for column_name in chunk.columns:
+                    if column_name not in header:
+                        raise ValueError(f"Column {column_name} does not exists")
+                chunk = typed_chunk(chunk, schema, row_count).reindex(columns=header)
+                chunk.to_csv(f, header=False, index=False, lineterminator="\n")
+                row_count += len(chunk)
+        return row_count
+
+    def _refresh_sidecars(self, database: str, table_name: str) -> None:
+        """
+        Bring the column cache and the indexes of a table up to date after a bulk load
+        """
+        if self.column_cache is None:
+            return
+        entry = self.catalog.table(database, table_name)
+        had_cache = self.column_cache.cache_folder(entry.file_path).is_dir()
+        if not had_cache and not self.indexes.indexes(entry.file_path):
+            return
+        cached_table = self._cached_table(entry, self.rows_per_chunk(entry.file_path))
+        self.indexes.refresh(entry.file_path, cached_table, entry.size, entry.mtime_ns)
+
+    def _append_csv(self, entry: TableEntry, items: List[Union[bytes, Path]]) -> None:
+        """
+        Write the encoded rows of inserts and the staging files of bulk loads, then sync once
+        """
+        fd = os.open(entry.file_path, os.O_WRONLY | os.O_APPEND)
+        try:
+            before = os.fstat(fd)
+            size = before.st_size
+            with open(entry.file_path, "rb") as f:
+                f.seek(max(size - 1, 0))
+                if size and f.read(1) != b"\n":
+                    # The last line has no line terminator
+                    os.write(fd, b"\n")
+            with os.fdopen(os.dup(fd), "wb") as out:
+                for item in items:
+                    if isinstance(item, Path):
+                        with open(item, "rb") as f:
+                            shutil.copyfileobj(f, out)
+                    else:
+                        out.write(item)
+            os.fsync(fd)
+            if self.column_cache:
+                after = os.fstat(fd)
+                self.column_cache.appended(
+                    entry.file_path,
+                    (before.st_size, before.st_mtime_ns),
+                    (after.st_size, after.st_mtime_ns),
+                )
+        finally:
+            os.close(fd)
+            self.catalog.invalidate(entry.database, entry.table_name)
+
+    def _append_blocks(
+        self, entry: TableEntry, items: List[Union[pd.DataFrame, Path]]
+    ) -> None:
+        header = BlockStorage(entry.file_path).columns
+        dtype = schema_dtypes(entry.schema)
+
+        def batches():
+            # Consecutive inserts share blocks, append order is kept
+            rows = []
+            for item in items:
+                if isinstance(item, pd.DataFrame):
+                    rows.append(item)
+                    continue
+                if rows:
+                    yield pd.concat(rows, ignore_index=True)
+                    rows = []
+                with pd.read_csv(
+                    item,
+                    header=None,
+                    names=header,
+                    dtype=dtype,
+                    chunksize=self.block_rows * BLOCKS_PER_LOAD_BATCH,
+                ) as reader:
+                    yield from reader
+            if rows:
+                yield pd.concat(rows, ignore_index=True)
+
+        try:
+            BlockStorage(entry.file_path).append_batches(
+                batches(), self.block_rows, dtype
+            )
+        finally:
+            self.catalog.invalidate(entry.database, entry.table_name)
+
+    def _scan_partitions(
+        self,
+        entry: TableEntry,
+        filters: Optional[List[ScanFilter]],
+        columns: Optional[List[str]],
+        parallel_degree: int,
+        ordered: bool,
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Scan the part files of the partitions left by the filters, each like a csv table
+        """
+        self._resolve_columns(list(entry.schema), columns, filters)
+        partitioned_table = PartitionedTable(entry.file_path)
+        column_type = entry.schema.get(partitioned_table.column)
+        part_paths = partitioned_table.prune(filters, column_type)
+        for part_path in part_paths:
+            part_stat = part_path.stat()
+            part_entry = replace(
+                entry,
+                file_path=part_path,
+                size=part_stat.st_size,
+                mtime_ns=part_stat.st_mtime_ns,
+                storage=CSV_STORAGE,
+            )
+            yield from self._scan_csv(part_entry, filters, columns, parallel_degree, ordered)
+
+    def _scan_shards(
+        self,
+        entry: TableEntry,
+        filters: Optional[List[ScanFilter]],
+        columns: Optional[List[str]],
+        parallel_degree: int,
+        ordered: bool,
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Scan every shard like a csv table, `shard_workers` shards at the same time
+        """
+        if entry.schema:
+            self._resolve_columns(list(entry.schema), columns, filters)
+
+        def scan(shard_path: Path) -> Iterator[pd.DataFrame]:
+            shard_stat = shard_path.stat()
+            shard_entry = replace(
+                entry,
+                file_path=shard_path,
+                size=shard_stat.st_size,
+                mtime_ns=shard_stat.st_mtime_ns,
+                storage=CSV_STORAGE,
+            )
+            return self._scan_csv(shard_entry, filters, columns, parallel_degree, ordered)
+
+        shards = ShardedTable(entry.file_path).shards()
+        return scan_shards(scan, shards, self.shard_workers, ordered)
+
+    def _load_shard(self, entry: TableEntry, header: List[str], staging_path: Path) -> None:
+        """
+        Turn validated rows into a new shard, written under a hidden name and renamed once synced
+        """
+        shard_name = f"part-{uuid.uuid4().hex}.csv"
+        hidden_path = entry.file_path / f".{shard_name}"
+        try:
+            with open(hidden_path, "wb") as f:
+                f.write((",".join(header) + "\n").encode("utf-8"))
+                with open(staging_path, "rb") as staged:
+                    shutil.copyfileobj(staged, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(hidden_path, entry.file_path / shard_name)
+        finally:
+            hidden_path.unlink(missing_ok=True)
+            self.catalog.invalidate(entry.database, entry.table_name)
+
+    def _load_partitions(
+        self, entry: TableEntry, header: List[str], staging_path: Path
+    ) -> None:
+        """
+        Split validated rows into a new part file per partition, the part files
+        are written under a hidden name and renamed once all of them are synced
+        """
+        partitioned_table = PartitionedTable(entry.file_path)
+        column = partitioned_table.column
+        part_name = f"part-{uuid.uuid4().hex}.csv"
+        hidden_paths: Dict[Path, Path] = {}
+        try:
+            with pd.read_csv(
+                staging_path,
+                header=None,
+                names=header,
+                dtype=schema_dtypes(entry.schema),
+                chunksize=self.chunk_size,
+            ) as reader:
+                for chunk in reader:
+                    for _, rows in chunk.groupby(column, dropna=False, sort=False):
+                        folder = partitioned_table.partition_folder(rows[column].iloc[0])
+                        hidden_path = folder / f".{part_name}"
+                        folder.mkdir(exist_ok=True)
+                        rows.to_csv(
+                            hidden_path,
+                            mode="a",
+                            header=folder not in hidden_paths,
+                            index=False,
+                            lineterminator="\n",
+                        )
+                        hidden_paths[folder] = hidden_path
+            for hidden_path in hidden_paths.values():
+                with open(hidden_path, "rb") as f:
+                    os.fsync(f.fileno())
+            with self._apply_lock:
+                for folder, hidden_path in hidden_paths.items():
+                    os.replace(hidden_path, folder / part_name)
+        finally:
+            for hidden_path in hidden_paths.values():
+                hidden_path.unlink(missing_ok=True)
+            self.catalog.invalidate(entry.database, entry.table_name)
+
+    def _scan_blocks(
+        self,
+        entry: TableEntry,
+        filters: Optional[List[ScanFilter]],
+        columns: Optional[List[str]],
+        parallel_degree: int,
+    ) -> Iterator[pd.DataFrame]:
+        block_storage = BlockStorage(entry.file_path)
+        usecols = self._resolve_columns(block_storage.columns, columns, filters)
+        dtype = schema_dtypes(entry.schema, usecols)
+        return block_storage.batches(
+            usecols, dtype, filters, parallel_degree, self.buffer_pool
+        )
+
+    def _cached_table(
+        self, entry: TableEntry, chunk_size: int, parallel_degree: Optional[int] = None
+    ) -> Optional[CachedTable]:
+        if self.column_cache is None:
+            return None
+        file_path, schema = entry.file_path, entry.schema
+        cached_table = self.column_cache.load(file_path, entry.size, entry.mtime_ns)
+        if cached_table is not None:
+            return cached_table
+        try:
+            cached_table = self.column_cache.extend(
+                file_path, entry.size, entry.mtime_ns, schema
+            )
+            if cached_table is not None:
+                return cached_table
+            return self.column_cache.build(
+                file_path,
+                chunk_size,
+                schema,
+                partial(
+                    self._parse_chunks,
+                    file_path,
+                    chunk_size,
+                    schema=schema,
+                    parallel_degree=parallel_degree or self.parallel_degree,
+                ),
+            )
+        except OSError:
+            # Read only data folder, keep serving from the csv
+            return None
+
+    @staticmethod
+    def _resolve_columns(
+        header: List[str],
+        columns: Optional[List[str]],
+        filters: Optional[List[ScanFilter]],
+    ) -> Optional[List[str]]:
+        """
+        Columns to read in file order, referenced columns plus filters columns
+        A query that references no column still reads the first one to keep its row count
+        """
+        if columns is None:
+            return None
+        wanted = set(columns) | {f.column for f in filters or []}
+        for column in wanted:
+            if column not in header:
+                raise ValueError(f"Column {column} does not exists")
+        return [column for column in header if column in wanted] or header[:1]
+
+    @staticmethod
+    def _row_width(file_path: Path) -> int:
+        """
+        Average bytes of a line, estimated from the head of the file
+        """
+        with open(file_path, "rb") as f:
+            sample = f.read(ROW_WIDTH_SAMPLE_SIZE)
+        line_count = max(sample.count(b"\n"), 1)
+        return max(len(sample) // line_count, 1)
+
+    @staticmethod
+    def _read_header(file_path: Path) -> List[str]:
+        return [str(column) for column in pd.read_csv(file_path, nrows=0).columns]
+
+    def _parse_chunks(
+        self,
+        file_path: Path,
+        chunk_size: int,
+        usecols: Optional[List[str]] = None,
+        schema: Optional[Dict[str, str]] = None,
+        filters: Optional[List[ScanFilter]] = None,
+        parallel_degree: int = 1,
+        ordered: bool = True,
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Parse and filter a csv file in the calling thread or with worker processes
+        """
+        if parallel_degree <= 1 and self.reader == "mmap":
+            mmap_reader = MmapReader(file_path, schema)
+            if mmap_reader.supported():
+                return self._read_mmap(mmap_reader, chunk_size, usecols, filters)
+        if parallel_degree <= 1:
+            batches = self._read_chunks(file_path, chunk_size, usecols, schema)
+            if filters:
+                return self._filter_batches(batches, filters)
+            return batches
+        return self._read_parallel(
+            file_path, chunk_size, usecols, schema, filters, parallel_degree, ordered
+        )
+
+    @staticmethod
+    def _read_mmap(
+        mmap_reader: MmapReader,
+        chunk_size: int,
+        usecols: Optional[List[str]],
+        filters: Optional[List[ScanFilter]],
+    ) -> Iterator[pd.DataFrame]:
+        return report_schema_mismatch(
+            mmap_reader.batches(chunk_size, usecols, filters),
+            mmap_reader.file_path,
+            mmap_reader.schema,
+            chunk_size,
+        )
+
+    def _read_parallel(
+        self,
+        file_path: Path,
+        chunk_size: int,
+        usecols: Optional[List[str]],
+        schema: Optional[Dict[str, str]],
+        filters: Optional[List[ScanFilter]],
+        parallel_degree: int,
+        ordered: bool,
+    ) -> Iterator[pd.DataFrame]:
+        def batches() -> Iterator[pd.DataFrame]:
+            yield from self.parallel_scanner.scan(
+                file_path,
+                chunk_size * self._row_width(file_path),
+                parallel_degree,
+                self._read_header(file_path),
+                usecols,
+                schema_dtypes(schema, usecols),
+                filters,
+                ordered,
+            )
+
+        return report_schema_mismatch(batches(), file_path, schema, chunk_size)
+
+    @staticmethod
+    def _read_chunks(
+        file_path: Path,
+        chunk_size: int,
+        usecols: Optional[List[str]] = None,
+        schema: Optional[Dict[str, str]] = None,
+    ) -> Iterator[pd.DataFrame]:
+        def chunks() -> Iterator[pd.DataFrame]:
+            dtype = schema_dtypes(schema, usecols)
+            with pd.read_csv(
+                file_path, chunksize=chunk_size, usecols=usecols, dtype=dtype
+            ) as reader:
+                yield from reader
+
+        return report_schema_mismatch(chunks(), file_path, schema, chunk_size)
+
+    @staticmethod
+    def _filter_batches(
+        batches: Iterator[pd.DataFrame], filters: List[ScanFilter]
+    ) -> Iterator[pd.DataFrame]:
+        for batch in batches:
+            mask = filters_mask(batch, filters)
+            if mask.any():
+                yield batch[mask]
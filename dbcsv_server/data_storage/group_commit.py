@@ -0,0 +1,119 @@
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, List
+
+__all__ = ["GroupCommitWriter", "DEFAULT_COMMIT_BYTES", "DEFAULT_COMMIT_DELAY"]
+
+# A group is written as soon as it holds this many bytes
+DEFAULT_COMMIT_BYTES = 1024 * 1024
+# Seconds the first writer of a group waits for others to join it
+DEFAULT_COMMIT_DELAY = 0.002
+
+
+class _Group:
+    """
+    Appends written and synced together
+    """
+
+    def __init__(self):
+        self.items: List[Any] = []
+        self.size = 0
+        self.done = False
+        self.error = None
+
+
+class _TableBuffer:
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.group = _Group()
+        self.flushing = False
+
+
+class GroupCommitWriter:
+    """
+    Per table write buffer shared by every connection
+    Appends to a table join the open group of the table, the first writer of a group becomes
+    its leader: it waits up to `max_delay` seconds or until the group holds `max_bytes`,
+    then writes the whole group with one call of the flush function (one fsync)
+    while the other writers wait for the result. A new group opens as soon as one is sealed,
+    so writes keep being collected while the previous group is being synced
+    Args:
+        max_bytes (int): size that seals a group without waiting the delay
+        max_delay (float): seconds a group stays open
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = DEFAULT_COMMIT_BYTES,
+        max_delay: float = DEFAULT_COMMIT_DELAY,
+    ):
+        if max_bytes < 1:
+            raise ValueError("Commit bytes must be a positive integer")
+        if max_delay < 0:
+            raise ValueError("Commit delay must not be negative")
+        self.max_bytes = max_bytes
+        self.max_delay = max_delay
+        self._buffers: Dict[Hashable, _TableBuffer] = {}
+        self._lock = threading.Lock()
+
+    def append(
+        self,
+        key: Hashable,
+        item: Any,
+        size: int,
+        flush: Callable[[List[Any]], None],
+    ) -> None:
+        """
+        Add an item to the open group of a table and wait until the group is durable
+        Args:
+            key (Hashable): table the item belongs to
+            item (Any): data handed to `flush`
+            size (int): bytes of the item
+            flush (Callable): write and sync a list of items of the table, in append order
+        Raises:
+            RuntimeError: when the group could not be written
+        """
+        buffer = self._buffer(key)
+        with buffer.condition:
+            group = buffer.group
+            group.items.append(item)
+            group.size += size
+            if group.size >= self.max_bytes:
+                buffer.condition.notify_all()
+            while not group.done:
+                if buffer.flushing:
+                    buffer.condition.wait()
+                else:
+                    self._lead(buffer, group, flush)
+        if group.error is not None:
+            raise RuntimeError(f"Unable to write: {group.error}") from group.error
+
+    def _lead(self, buffer: _TableBuffer, group: _Group, flush: Callable) -> None:
+        """
+        Seal and write the open group, called with the buffer condition held
+        """
+        buffer.flushing = True
+        deadline = time.monotonic() + self.max_delay
+        while group.size < self.max_bytes:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            buffer.condition.wait(remaining)
+        buffer.group = _Group()
+        buffer.condition.release()
+        try:
+            flush(group.items)
+        except Exception as e:
+            group.error = e
+        finally:
+            buffer.condition.acquire()
+            group.done = True
+            buffer.flushing = False
+            buffer.condition.notify_all()
+
+    def _buffer(self, key: Hashable) -> _TableBuffer:
+        with self._lock:
+            buffer = self._buffers.get(key)
+            if buffer is None:
+                buffer = self._buffers[key] = _TableBuffer()
+            return buffer
@@ -0,0 +1,648 @@
+import os
+import json
+import uuid
+import zlib
+import shutil
+import threading
+import numpy as np
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+from .column_cache import CachedTable
+from .scan_filter import ScanFilter
+from .string_array import StringArray, save_strings, load_strings, offsets_path, search_strings
+
+__all__ = ["HashIndex", "SortedIndex", "IndexManager", "INDEX_METHODS"]
+
+# `<index_name>.json` describes an index and points to its `<index_name>.<version>` array folder
+INDEX_SUFFIX = ".json"
+# An index is only used when it selects at most this fraction of the table,
+# above it a zone map pruned scan reads less scattered data
+INDEX_SELECTIVITY = 0.25
+
+
+class HashIndex:
+    """
+    Equality index of a column: value -> positions of the rows holding it
+    Stored as the distinct values with the positions of each one in a single array,
+    the positions of `keys[i]` are `positions[offsets[i]:offsets[i + 1]]` in table order
+    Values are found through an open addressing table: `slots` holds a key number or -1,
+    a value is looked for from the slot of its hash on, one slot after the other, until its key
+    or an empty slot. The table is at most half full so a lookup probes O(1) slots
+    Arrays are saved as .npy files and memory mapped, a lookup only reads the probed slots,
+    the compared keys and the positions of the found key
+    Positions are row numbers of the column cache, nulls are not indexed
+    Args:
+        name (str): index name
+        column (str): indexed column
+        size (int): size of the csv the index was built from
+        mtime_ns (int): mtime of the csv the index was built from
+        keys (np.ndarray): sorted distinct values
+        offsets (np.ndarray): start of the positions of each key, then the number of positions
+        positions (np.ndarray): row positions grouped by key
+        slots (np.ndarray): open addressing table of key numbers, its size is a power of two
+    """
+
+    method = "HASH"
+    operators = ("=",)
+    # Arrays of the index, one .npy file each
+    arrays = ("keys", "offsets", "positions", "slots")
+
+    def __init__(
+        self,
+        name: str,
+        column: str,
+        size: int,
+        mtime_ns: int,
+        keys: np.ndarray,
+        offsets: np.ndarray,
+        positions: np.ndarray,
+        slots: np.ndarray,
+    ):
+        self.name = name
+        self.column = column
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.keys = keys
+        self.offsets = offsets
+        self.positions = positions
+        self.slots = slots
+
+    @classmethod
+    def build(
+        cls,
+        name: str,
+        column: str,
+        cached_table: Optional[CachedTable],
+        size: int,
+        mtime_ns: int,
+    ) -> "HashIndex":
+        """
+        Group the row positions of a cached column by value and hash the values
+        Args:
+            name (str): index name
+            column (str): indexed column
+            cached_table (CachedTable): column cache of the table, None for an empty table
+            size (int): size of the csv
+            mtime_ns (int): mtime of the csv
+        Returns:
+            HashIndex
+        """
+        if cached_table is None:
+            values, positions = np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        else:
+            values, positions = _indexed_values(cached_table, column)
+        return cls(name, column, size, mtime_ns, *_hash_table(values, positions))
+
+    @classmethod
+    def from_payload(cls, data: Dict) -> "HashIndex":
+        return cls(
+            data["name"],
+            data["column"],
+            data["size"],
+            data["mtime_ns"],
+            data["keys"],
+            data["offsets"],
+            data["positions"],
+            data["slots"],
+        )
+
+    def payload(self) -> Dict:
+        return {
+            "keys": self.keys,
+            "offsets": self.offsets,
+            "positions": self.positions,
+            "slots": self.slots,
+        }
+
+    def save(self, path: Path) -> None:
+        """
+        Write the arrays in a new version folder then point the description file to it,
+        so that a reader never loads a partial index
+        """
+        version = uuid.uuid4().hex
+        version_folder = path.with_name(f"{path.stem}.{version}")
+        version_folder.mkdir()
+        try:
+            for array_name, array in self.payload().items():
+                array_path = version_folder / f"{array_name}.npy"
+                if array.dtype.kind in "UO":
+                    # String keys take the size of their text, not of the longest one
+                    save_strings(array_path, array)
+                else:
+                    np.save(array_path, array, allow_pickle=False)
+            tmp_path = path.with_name(f"{path.name}.{version}")
+            with open(tmp_path, "w") as f:
+                json.dump(
+                    {
+                        "method": self.method,
+                        "name": self.name,
+                        "column": self.column,
+                        "size": self.size,
+                        "mtime_ns": self.mtime_ns,
+                        "version": version,
+                    },
+                    f,
+                )
+            os.replace(tmp_path, path)
+        except Exception:
+            shutil.rmtree(version_folder, ignore_errors=True)
+            raise
+        for item in path.parent.glob(f"{path.stem}.*"):
+            if item.is_dir() and item != version_folder:
+                shutil.rmtree(item, ignore_errors=True)
+
+    def extend(
+        self, cached_table: CachedTable, start: int, size: int, mtime_ns: int
+    ) -> "HashIndex":
+        """
+        Index of the table grown by the rows from position `start`, the rows before are unchanged
+        Args:
+            cached_table (CachedTable): column cache of the grown table
+            start (int): first appended row
+            size (int): size of the csv
+            mtime_ns (int): mtime of the csv
+        Returns:
+            HashIndex
+        """
+        values, positions = _indexed_values(cached_table, self.column, start)
+        # Appended positions come after the indexed ones, the stable grouping keeps table order
+        indexed_values = np.repeat(np.asarray(self.keys), np.diff(self.offsets))
+        return type(self)(
+            self.name,
+            self.column,
+            size,
+            mtime_ns,
+            *_hash_table(
+                np.concatenate([indexed_values, values]),
+                np.concatenate([np.asarray(self.positions), positions]),
+            ),
+        )
+
+    def is_stale(self, size: int, mtime_ns: int) -> bool:
+        return (self.size, self.mtime_ns) != (size, mtime_ns)
+
+    def supports(self, scan_filter: ScanFilter) -> bool:
+        return scan_filter.column == self.column and scan_filter.operator in self.operators
+
+    def rows(self, filters: List[ScanFilter]) -> np.ndarray:
+        """
+        Positions of the rows satisfying every filter, all filters must be supported
+        """
+        positions = None
+        for scan_filter in filters:
+            i = self._probe(scan_filter.value)
+            if i < 0:
+                return np.empty(0, dtype=np.int64)
+            matched = self.positions[self.offsets[i] : self.offsets[i + 1]]
+            positions = matched if positions is None else np.intersect1d(positions, matched)
+        return positions
+
+    def estimate(self, filters: List[ScanFilter]) -> int:
+        """
+        Number of rows `rows` would return
+        """
+        return len(self.rows(filters))
+
+    def _probe(self, value) -> int:
+        """
+        Number of the key equal to a value, -1 when no row holds it
+        """
+        try:
+            _check_comparable(self.keys, value)
+        except TypeError:
+            # Value not comparable with the column, nothing can be equal to it
+            return -1
+        mask = len(self.slots) - 1
+        value_array = np.array([value], dtype=object if isinstance(value, str) else np.float64)
+        slot = int(_hash_values(value_array)[0]) & mask
+        while True:
+            i = int(self.slots[slot])
+            if i < 0 or self.keys[i] == value:
+                return i
+            slot = (slot + 1) & mask
+
+
+class SortedIndex(HashIndex):
+    """
+    Ordered index of a column: the non null values sorted with the row position of each value
+    Serves equality and range filters with a binary search, and gives rows in column order
+    Args:
+        name (str): index name
+        column (str): indexed column
+        size (int): size of the csv the index was built from
+        mtime_ns (int): mtime of the csv the index was built from
+        keys (np.ndarray): sorted values
+        positions (np.ndarray): row position of each key
+    """
+
+    method = "BTREE"
+    operators = ("=", ">", ">=", "<", "<=")
+    arrays = ("keys", "positions")
+
+    def __init__(
+        self,
+        name: str,
+        column: str,
+        size: int,
+        mtime_ns: int,
+        keys: np.ndarray,
+        positions: np.ndarray,
+    ):
+        self.name = name
+        self.column = column
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.keys = keys
+        self.positions = positions
+
+    @classmethod
+    def build(
+        cls,
+        name: str,
+        column: str,
+        cached_table: Optional[CachedTable],
+        size: int,
+        mtime_ns: int,
+    ) -> "SortedIndex":
+        """
+        Sort the values of a cached column
+        Args:
+            name (str): index name
+            column (str): indexed column
+            cached_table (CachedTable): column cache of the table, None for an empty table
+            size (int): size of the csv
+            mtime_ns (int): mtime of the csv
+        Returns:
+            SortedIndex
+        """
+        if cached_table is None:
+            empty = np.empty(0, dtype=np.int64)
+            return cls(name, column, size, mtime_ns, empty, empty)
+        values, positions = _indexed_values(cached_table, column)
+        # Stable sort keeps equal keys in table order
+        order = np.argsort(values, kind="stable")
+        return cls(name, column, size, mtime_ns, values[order], positions[order])
+
+    @classmethod
+    def from_payload(cls, data: Dict) -> "SortedIndex":
+        return cls(
+            data["name"],
+            data["column"],
+            data["size"],
+            data["mtime_ns"],
+            data["keys"],
+            data["positions"],
+        )
+
+    def payload(self) -> Dict:
+        return {"keys": self.keys, "positions": self.positions}
+
+    def extend(
+        self, cached_table: CachedTable, start: int, size: int, mtime_ns: int
+    ) -> "SortedIndex":
+        values, positions = _indexed_values(cached_table, self.column, start)
+        order = np.argsort(values, kind="stable")
+        values, positions = values[order], positions[order]
+        # Appended keys go after the equal keys already indexed, keeping equal keys in table order
+        at = np.searchsorted(self.keys, values, side="right")
+        return type(self)(
+            self.name,
+            self.column,
+            size,
+            mtime_ns,
+            np.insert(self.keys, at, values),
+            np.insert(self.positions, at, positions),
+        )
+
+    def rows(self, filters: List[ScanFilter]) -> np.ndarray:
+        start, stop = self._bounds(filters)
+        return self.positions[start:stop]
+
+    def estimate(self, filters: List[ScanFilter]) -> int:
+        start, stop = self._bounds(filters)
+        return stop - start
+
+    def ordered_rows(self, row_count: int, descending: bool = False) -> np.ndarray:
+        """
+        Every row position in the order of the column values,
+        null rows come last in ascending order and first in descending order
+        """
+        null_rows = np.setdiff1d(np.arange(row_count), self.positions, assume_unique=True)
+        if descending:
+            return np.concatenate([null_rows, self.positions[::-1]])
+        return np.concatenate([self.positions, null_rows])
+
+    def _bounds(self, filters: List[ScanFilter]) -> Tuple[int, int]:
+        """
+        [start, stop) range of keys satisfying every filter
+        """
+        start, stop = 0, len(self.keys)
+        try:
+            for scan_filter in filters:
+                value = scan_filter.value
+                match scan_filter.operator:
+                    case "=":
+                        start = max(start, self._search(value, "left"))
+                        stop = min(stop, self._search(value, "right"))
+                    case ">":
+                        start = max(start, self._search(value, "right"))
+                    case ">=":
+                        start = max(start, self._search(value, "left"))
+                    case "<":
+                        stop = min(stop, self._search(value, "left"))
+                    case "<=":
+                        stop = min(stop, self._search(value, "right"))
+        except TypeError:
+            # Value not comparable with the column, nothing can match
+            return 0, 0
+        return start, max(start, stop)
+
+    def _search(self, value, side: str) -> int:
+        return _search(self.keys, value, side)
+
+
+# Index classes by the method name given in `CREATE INDEX ... USING <method>`
+INDEX_METHODS = {index.method: index for index in (HashIndex, SortedIndex)}
+
+
+def load_index(path: Path) -> Optional[HashIndex]:
+    """
+    Index described by a json file with its arrays memory mapped, None when it can not be read
+    """
+    try:
+        with open(path) as f:
+            data = json.load(f)
+        index_class = INDEX_METHODS.get(data.get("method", HashIndex.method))
+        if index_class is None:
+            return None
+        version_folder = path.with_name(f"{path.stem}.{data['version']}")
+        for array_name in index_class.arrays:
+            array_path = version_folder / f"{array_name}.npy"
+            if offsets_path(array_path).exists():
+                data[array_name] = load_strings(array_path)
+            else:
+                data[array_name] = np.load(array_path, mmap_mode="r", allow_pickle=False)
+    except (OSError, ValueError, KeyError):
+        return None
+    return index_class.from_payload(data)
+
+
+class IndexManager:
+    """
+    Secondary indexes of tables, stored in `<database>/<table>.index/<index_name>.json`
+    and the array files of its `<index_name>.<version>` folder
+    Loaded indexes are kept in memory, an index built from an older version of the csv
+    is rebuilt from the column cache on its next use, or only extended with the appended rows
+    when the csv grew from the version it was built from
+    """
+
+    def __init__(self):
+        self._indexes: Dict[Path, Dict[str, HashIndex]] = {}
+        self._lock = threading.Lock()
+
+    def index_folder(self, file_path: Path) -> Path:
+        return file_path.with_name(f"{file_path.stem}.index")
+
+    def index_path(self, file_path: Path, index_name: str) -> Path:
+        return self.index_folder(file_path) / f"{index_name}{INDEX_SUFFIX}"
+
+    def create(
+        self,
+        file_path: Path,
+        index_name: str,
+        column: str,
+        cached_table: Optional[CachedTable],
+        size: int,
+        mtime_ns: int,
+        method: str = HashIndex.method,
+    ) -> HashIndex:
+        """
+        Build and persist a new index
+        Args:
+            file_path (Path): csv data file
+            index_name (str): index name, unique in the table
+            column (str): indexed column
+            cached_table (CachedTable): column cache of the table, None for an empty table
+            size (int): size of the csv
+            mtime_ns (int): mtime of the csv
+            method (str): HASH or BTREE
+        Raises:
+            ValueError: if the index already exists or the method is unknown
+        Returns:
+            HashIndex | SortedIndex
+        """
+        index_class = INDEX_METHODS.get(method)
+        if index_class is None:
+            raise ValueError(f"Unknown index method {method}")
+        indexes = self.indexes(file_path)
+        if index_name in indexes:
+            raise ValueError(f"Index {index_name} already exists")
+        index = index_class.build(index_name, column, cached_table, size, mtime_ns)
+        self.index_folder(file_path).mkdir(parents=True, exist_ok=True)
+        index.save(self.index_path(file_path, index_name))
+        with self._lock:
+            indexes[index_name] = index
+        return index
+
+    def indexes(self, file_path: Path) -> Dict[str, HashIndex]:
+        """
+        Indexes of a table by name, read from disk on first call
+        """
+        with self._lock:
+            indexes = self._indexes.get(file_path)
+            if indexes is not None:
+                return indexes
+        indexes = {}
+        index_folder = self.index_folder(file_path)
+        if index_folder.is_dir():
+            for path in sorted(index_folder.glob(f"*{INDEX_SUFFIX}")):
+                index = load_index(path)
+                if index is not None:
+                    indexes[index.name] = index
+        with self._lock:
+            return self._indexes.setdefault(file_path, indexes)
+
+    def lookup(
+        self,
+        file_path: Path,
+        cached_table: CachedTable,
+        filters: List[ScanFilter],
+        size: int,
+        mtime_ns: int,
+    ) -> Optional[Tuple[np.ndarray, List[ScanFilter]]]:
+        """
+        Answer the filters with the most selective index
+        Args:
+            file_path (Path): csv data file
+            cached_table (CachedTable): up to date column cache of the table
+            filters (List[ScanFilter]): conditions of the scan
+            size (int): current size of the csv
+            mtime_ns (int): current mtime of the csv
+        Returns:
+            (np.ndarray, List[ScanFilter]): matching row positions and the filters left to evaluate,
+                None when no index supports the filters or a scan is expected to be cheaper
+        """
+        best = None
+        for index in list(self.indexes(file_path).values()):
+            supported = [f for f in filters if index.supports(f)]
+            if not supported:
+                continue
+            if index.is_stale(size, mtime_ns):
+                index = self._rebuild(file_path, index, cached_table, size, mtime_ns)
+            estimate = index.estimate(supported)
+            if best is None or estimate < best[0]:
+                best = (estimate, index, supported)
+        if best is None or best[0] > INDEX_SELECTIVITY * cached_table.row_count:
+            return None
+        _, index, supported = best
+        remaining = [f for f in filters if all(f is not s for s in supported)]
+        return index.rows(supported), remaining
+
+    def ordered(
+        self,
+        file_path: Path,
+        cached_table: CachedTable,
+        column: str,
+        size: int,
+        mtime_ns: int,
+    ) -> Optional[SortedIndex]:
+        """
+        Up to date sorted index of a column, None when the column has none
+        """
+        for index in list(self.indexes(file_path).values()):
+            if isinstance(index, SortedIndex) and index.column == column:
+                if index.is_stale(size, mtime_ns):
+                    index = self._rebuild(file_path, index, cached_table, size, mtime_ns)
+                return index
+        return None
+
+    def refresh(
+        self,
+        file_path: Path,
+        cached_table: Optional[CachedTable],
+        size: int,
+        mtime_ns: int,
+    ) -> None:
+        """
+        Rebuild every stale index of a table, called once after a bulk load
+        """
+        for index in list(self.indexes(file_path).values()):
+            if index.is_stale(size, mtime_ns):
+                self._rebuild(file_path, index, cached_table, size, mtime_ns)
+
+    def drop_table(self, file_path: Path) -> None:
+        """
+        Remove every index of a table
+        """
+        with self._lock:
+            self._indexes.pop(file_path, None)
+        shutil.rmtree(self.index_folder(file_path), ignore_errors=True)
+
+    def _rebuild(
+        self,
+        file_path: Path,
+        index: HashIndex,
+        cached_table: CachedTable,
+        size: int,
+        mtime_ns: int,
+    ) -> HashIndex:
+        start = None
+        if cached_table is not None:
+            start = cached_table.prefix_rows(index.size, index.mtime_ns)
+        if start is not None:
+            index = index.extend(cached_table, start, size, mtime_ns)
+        else:
+            index = type(index).build(index.name, index.column, cached_table, size, mtime_ns)
+        try:
+            index.save(self.index_path(file_path, index.name))
+        except OSError:
+            # Read only data folder, keep the rebuilt index in memory only
+            pass
+        with self._lock:
+            self._indexes.setdefault(file_path, {})[index.name] = index
+        return index
+
+
+def _indexed_values(
+    cached_table: CachedTable, column: str, start: int = 0
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Non null values of a cached column from row `start` and their row positions
+    """
+    cached_column = cached_table.column(column)
+    values = np.asarray(cached_column.values[start : cached_table.row_count])
+    keep = np.ones(len(values), dtype=bool)
+    if cached_column.nulls is not None:
+        keep &= ~np.asarray(cached_column.nulls[start : cached_table.row_count])
+    elif values.dtype.kind == "f":
+        keep &= ~np.isnan(values)
+    positions = np.flatnonzero(keep) + start
+    return values[keep], positions
+
+
+def _hash_table(
+    values: np.ndarray, positions: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Distinct values, offsets, positions grouped by value and slots of a `HashIndex`
+    """
+    # Stable sort keeps the positions of a value in table order
+    order = np.argsort(values, kind="stable")
+    values, positions = values[order], positions[order]
+    keys, starts = np.unique(values, return_index=True)
+    offsets = np.append(starts, len(values)).astype(np.int64)
+    return keys, offsets, positions, _slots(_hash_values(keys))
+
+
+def _slots(hashes: np.ndarray) -> np.ndarray:
+    """
+    Linear probing table of the keys with these hashes, at most half full
+    Every key takes the first free slot from the slot of its hash on, all keys move one slot
+    at a time together and a slot several keys reach at once goes to the first of them
+    """
+    capacity = 1 << max(2 * len(hashes) - 1, 0).bit_length()
+    slots = np.full(capacity, -1, dtype=np.int64)
+    pending = np.arange(len(hashes), dtype=np.int64)
+    target = (hashes & np.uint64(capacity - 1)).astype(np.int64)
+    while len(pending):
+        free = np.flatnonzero(slots[target] < 0)
+        claimed, first = np.unique(target[free], return_index=True)
+        slots[claimed] = pending[free[first]]
+        left = np.ones(len(pending), dtype=bool)
+        left[free[first]] = False
+        pending, target = pending[left], (target[left] + 1) & (capacity - 1)
+    return slots
+
+
+def _hash_values(values: np.ndarray) -> np.ndarray:
+    """
+    uint64 hashes of values, stable across processes unlike `hash` of a string
+    A number hashes as its float64 so that an INT column is found with 7.0 as with 7
+    """
+    if values.dtype.kind in "UO":
+        hashes = np.fromiter(
+            (zlib.crc32(value.encode()) for value in values), dtype=np.uint64, count=len(values)
+        )
+    else:
+        # Adding 0.0 turns -0.0 into 0.0, both are equal
+        hashes = (np.asarray(values, dtype=np.float64) + 0.0).view(np.uint64)
+    # splitmix64 finalizer, spreads close values over the whole table
+    hashes = hashes ^ (hashes >> np.uint64(30))
+    hashes = hashes * np.uint64(0xBF58476D1CE4E5B9)
+    hashes = hashes ^ (hashes >> np.uint64(27))
+    hashes = hashes * np.uint64(0x94D049BB133111EB)
+    return hashes ^ (hashes >> np.uint64(31))
+
+
+def _check_comparable(keys: Union[np.ndarray, StringArray], value) -> None:
+    if keys.dtype.kind in "UO" and not isinstance(value, str):
+        raise TypeError(f"Can not compare {value} with a string column")
+    if keys.dtype.kind in "iuf" and isinstance(value, str):
+        raise TypeError(f"Can not compare {value} with a number column")
+
+
+def _search(keys: Union[np.ndarray, StringArray], value, side: str) -> int:
+    _check_comparable(keys, value)
+    if isinstance(keys, StringArray):
+        return search_strings(keys, value, side)
+    return int(np.searchsorted(keys, value, side=side))
@@ -0,0 +1,228 @@
+import mmap
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+from .scan_filter import ScanFilter, filters_mask
+from ..query_engine.token import ReservedWord
+
+__all__ = ["MmapReader"]
+
+NEWLINE = ord("\n")
+CARRIAGE_RETURN = ord("\r")
+COMMA = ord(",")
+QUOTE = b'"'
+# Smallest window searched for line ends
+MIN_WINDOW_SIZE = 64 * 1024
+# Fields are gathered in a fixed width matrix while it is at most this many times the size
+# of the fields, a column with a far longer value is copied field by field
+FIELD_MATRIX_RATIO = 4
+
+
+class MmapReader:
+    """
+    Read a csv file through a memory map without copying lines into Python strings
+    Line and field boundaries are located with numpy on the mapped bytes, a field is only decoded
+    for the columns a scan returns, and columns not used by a filter only for the rows that passed it
+    Files with quoted values are not supported, see `supported`, an empty field is a null
+    Args:
+        file_path (Path): csv data file
+        schema (Dict[str, str]): declared columns type, other columns are inferred per batch
+    """
+
+    def __init__(self, file_path: Path, schema: Optional[Dict[str, str]] = None):
+        self.file_path = file_path
+        self.schema = schema or {}
+
+    def supported(self) -> bool:
+        """
+        False when the file has a quote character, quoted fields need the pandas parser
+        """
+        with open(self.file_path, "rb") as f:
+            if f.seek(0, 2) == 0:
+                return True
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return mm.find(QUOTE) == -1
+
+    def batches(
+        self,
+        chunk_size: int,
+        usecols: Optional[List[str]] = None,
+        filters: Optional[List[ScanFilter]] = None,
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Stream the rows of the file
+        Args:
+            chunk_size (int): lines per batch, a filtered batch can be smaller
+            usecols (List[str]): columns to return, None for all
+            filters (List[ScanFilter]): conditions evaluated before other columns are decoded
+        Raises:
+            ValueError: a line has a wrong number of fields or a value does not match its column type
+        Returns:
+            Iterator[pd.DataFrame]
+        """
+        with open(self.file_path, "rb") as f:
+            if f.seek(0, 2) == 0:
+                return
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            buffer = np.frombuffer(mm, dtype=np.uint8)
+            header_end = mm.find(b"\n")
+            if header_end == -1:
+                return
+            header = bytes(buffer[:header_end]).decode().rstrip("\r").split(",")
+            selected = header if usecols is None else [c for c in header if c in usecols]
+            for starts, ends in self._lines(buffer, header_end + 1, chunk_size):
+                batch = self._batch(buffer, starts, ends, header, selected, filters)
+                if batch is not None:
+                    yield batch
+        finally:
+            # Views must be released before the map can be closed
+            buffer = None
+            try:
+                mm.close()
+            except BufferError:
+                pass
+
+    @staticmethod
+    def _lines(
+        buffer: np.ndarray, position: int, chunk_size: int
+    ) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """
+        [start, end) offsets of at most `chunk_size` lines at a time, without line terminators
+        """
+        size = len(buffer)
+        window_size = MIN_WINDOW_SIZE
+        while position < size:
+            stop = min(position + window_size, size)
+            line_ends = np.flatnonzero(buffer[position:stop] == NEWLINE) + position
+            if stop == size and (len(line_ends) == 0 or line_ends[-1] != size - 1):
+                # Last line without newline
+                line_ends = np.append(line_ends, size)
+            if len(line_ends) < chunk_size and stop < size:
+                # Grow the window until it holds a full batch
+                window_size *= 2
+                continue
+            line_ends = line_ends[:chunk_size]
+            starts = np.concatenate(([position], line_ends[:-1] + 1))
+            ends = line_ends.copy()
+            has_cr = (ends > starts) & (buffer[np.maximum(ends - 1, 0)] == CARRIAGE_RETURN)
+            ends[has_cr] -= 1
+            blank = ends == starts
+            yield starts[~blank], ends[~blank]
+            position = int(line_ends[-1]) + 1
+
+    def _batch(
+        self,
+        buffer: np.ndarray,
+        starts: np.ndarray,
+        ends: np.ndarray,
+        header: List[str],
+        selected: List[str],
+        filters: Optional[List[ScanFilter]],
+    ) -> Optional[pd.DataFrame]:
+        if len(starts) == 0:
+            return None
+        field_count = len(header)
+        region = buffer[starts[0] : ends[-1]]
+        commas = np.flatnonzero(region == COMMA) + starts[0]
+        counts = np.searchsorted(commas, ends) - np.searchsorted(commas, starts)
+        if (counts != field_count - 1).any():
+            line = int(np.flatnonzero(counts != field_count - 1)[0])
+            raise ValueError(
+                f"Expected {field_count} fields got {counts[line] + 1} "
+                f"at byte {int(starts[line])}"
+            )
+        commas = commas.reshape(len(starts), field_count - 1)
+        field_starts = np.hstack((starts[:, None], commas + 1))
+        field_ends = np.hstack((commas, ends[:, None]))
+        position = {column: i for i, column in enumerate(header)}
+
+        def decode(column: str, rows=slice(None)):
+            i = position[column]
+            return self._decode(
+                column, buffer, field_starts[rows, i], field_ends[rows, i]
+            )
+
+        decoded = {}
+        rows = slice(None)
+        if filters:
+            for scan_filter in filters:
+                if scan_filter.column not in position:
+                    raise ValueError(f"Column {scan_filter.column} does not exists")
+                if scan_filter.column not in decoded:
+                    decoded[scan_filter.column] = decode(scan_filter.column)
+            mask = filters_mask(decoded, filters)
+            if not mask.any():
+                return None
+            rows = np.flatnonzero(mask)
+            decoded = {c: v.iloc[rows].reset_index(drop=True) for c, v in decoded.items()}
+        return pd.DataFrame(
+            {
+                column: decoded[column] if column in decoded else decode(column, rows)
+                for column in selected
+            }
+        )
+
+    def _decode(
+        self, column: str, buffer: np.ndarray, starts: np.ndarray, ends: np.ndarray
+    ) -> pd.Series:
+        values, nulls = _field_bytes(buffer, starts, ends)
+        column_type = self.schema.get(column)
+        if column_type == ReservedWord.INT.value:
+            return pd.Series(pd.arrays.IntegerArray(_to_int(values, nulls), nulls))
+        if column_type == ReservedWord.FLOAT.value:
+            return pd.Series(_to_float(values, nulls))
+        if column_type == ReservedWord.STRING.value:
+            return _to_string(values, nulls)
+        # Undeclared column, infer like the csv parser
+        try:
+            numbers = _to_int(values, nulls)
+            if not nulls.any():
+                return pd.Series(numbers)
+        except ValueError:
+            pass
+        try:
+            return pd.Series(_to_float(values, nulls))
+        except ValueError:
+            return _to_string(values, nulls)
+
+
+def _field_bytes(
+    buffer: np.ndarray, starts: np.ndarray, ends: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Gather fields into a fixed width bytes array, only the given fields are copied
+    When one field is much longer than the others the fields are an object array of bytes,
+    so a batch never takes its number of rows times its longest field
+    """
+    lengths = ends - starts
+    width = max(int(lengths.max()) if len(lengths) else 0, 1)
+    if len(lengths) * width > FIELD_MATRIX_RATIO * (int(lengths.sum()) + len(lengths)):
+        values = np.empty(len(lengths), dtype=object)
+        values[:] = [buffer[a:b].tobytes() for a, b in zip(starts.tolist(), ends.tolist())]
+        return values, lengths == 0
+    offsets = np.arange(width)
+    valid = offsets < lengths[:, None]
+    indices = np.where(valid, starts[:, None] + offsets, 0)
+    matrix = np.where(valid, buffer[indices], 0).astype(np.uint8)
+    return matrix.view(f"S{width}").ravel(), lengths == 0
+
+
+def _to_int(values: np.ndarray, nulls: np.ndarray) -> np.ndarray:
+    return np.where(nulls, b"0", values).astype(np.int64)
+
+
+def _to_float(values: np.ndarray, nulls: np.ndarray) -> np.ndarray:
+    numbers = np.where(nulls, b"0", values).astype(np.float64)
+    numbers[nulls] = np.nan
+    return numbers
+
+
+def _to_string(values: np.ndarray, nulls: np.ndarray) -> pd.Series:
+    if values.dtype == object:
+        strings = np.array([value.decode() for value in values], dtype=object)
+    else:
+        strings = np.char.decode(values, "utf-8").astype(object)
+    strings[nulls] = None
+    return pd.Series(strings, dtype=str)
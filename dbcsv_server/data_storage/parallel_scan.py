@@ -0,0 +1,169 @@
+import io
+import os
+import threading
+import pandas as pd
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+from .scan_filter import ScanFilter, filters_mask
+
+__all__ = ["ParallelScanner", "byte_ranges"]
+
+# Ranges in flight per worker, bounds the parsed batches waiting to be consumed
+RANGES_PER_WORKER = 2
+
+
+def byte_ranges(file_path: Path, range_size: int) -> Tuple[int, List[Tuple[int, int]]]:
+    """
+    Split the data lines of a csv file into ranges of about `range_size` bytes,
+    every range starts at the beginning of a line and ends after a newline or at end of file
+    Quoted values holding a newline are not supported
+    Args:
+        file_path (Path): csv data file
+        range_size (int): target bytes per range
+    Returns:
+        (int, List[Tuple[int, int]]): header length, [start, stop) byte ranges in file order
+    """
+    file_size = os.path.getsize(file_path)
+    ranges = []
+    with open(file_path, "rb") as f:
+        header_size = len(f.readline())
+        start = header_size
+        while start < file_size:
+            f.seek(min(start + max(range_size, 1), file_size))
+            f.readline()
+            stop = min(f.tell(), file_size)
+            ranges.append((start, stop))
+            start = stop
+    return header_size, ranges
+
+
+def _parse_range(
+    file_path: str,
+    start: int,
+    stop: int,
+    names: List[str],
+    usecols: Optional[List[str]],
+    dtype: Optional[Dict],
+    filters: Optional[List[ScanFilter]],
+) -> pd.DataFrame:
+    """
+    Worker task, parse and filter one byte range of a csv file
+    """
+    with open(file_path, "rb") as f:
+        f.seek(start)
+        data = f.read(stop - start)
+    batch = pd.read_csv(
+        io.BytesIO(data), header=None, names=names, usecols=usecols, dtype=dtype
+    )
+    if filters and len(batch):
+        batch = batch[filters_mask(batch, filters)]
+    return batch
+
+
+class ParallelScanner:
+    """
+    Parse csv files with a pool of worker processes, each worker parses a newline aligned byte range
+    Pools are created on first use, one per degree of parallelism, and reused by later scans
+    """
+
+    def __init__(self):
+        self._pools: Dict[int, ProcessPoolExecutor] = {}
+        self._lock = threading.Lock()
+
+    def scan(
+        self,
+        file_path: Path,
+        range_size: int,
+        degree: int,
+        names: List[str],
+        usecols: Optional[List[str]] = None,
+        dtype: Optional[Dict] = None,
+        filters: Optional[List[ScanFilter]] = None,
+        ordered: bool = True,
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Stream the parsed ranges of a csv file
+        Args:
+            file_path (Path): csv data file
+            range_size (int): target bytes per range, one range becomes one batch
+            degree (int): number of worker processes
+            names (List[str]): csv header
+            usecols (List[str]): columns to parse, None for all
+            dtype (Dict): pandas dtype per column
+            filters (List[ScanFilter]): conditions evaluated by the workers
+            ordered (bool): yield batches in file order, else as soon as they are parsed
+        Returns:
+            Iterator[pd.DataFrame]
+        """
+        _, ranges = byte_ranges(file_path, range_size)
+        task = (str(Path(file_path).resolve()), names, usecols, dtype, filters)
+        pool = self._pool(degree)
+        in_flight = degree * RANGES_PER_WORKER
+        if ordered:
+            return self._ordered(pool, task, ranges, in_flight)
+        return self._unordered(pool, task, ranges, in_flight)
+
+    def close(self) -> None:
+        with self._lock:
+            pools, self._pools = self._pools, {}
+        for pool in pools.values():
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def _pool(self, degree: int) -> ProcessPoolExecutor:
+        with self._lock:
+            pool = self._pools.get(degree)
+            if pool is None:
+                # Spawned workers do not inherit locks held by the server threads
+                pool = ProcessPoolExecutor(degree, mp_context=get_context("spawn"))
+                self._pools[degree] = pool
+            return pool
+
+    @staticmethod
+    def _submit(pool: ProcessPoolExecutor, task: Tuple, byte_range: Tuple[int, int]) -> Future:
+        file_path, names, usecols, dtype, filters = task
+        return pool.submit(
+            _parse_range, file_path, *byte_range, names, usecols, dtype, filters
+        )
+
+    def _ordered(
+        self, pool: ProcessPoolExecutor, task: Tuple, ranges: List, in_flight: int
+    ) -> Iterator[pd.DataFrame]:
+        pending = deque()
+        try:
+            for byte_range in ranges:
+                pending.append(self._submit(pool, task, byte_range))
+                if len(pending) >= in_flight:
+                    yield from _non_empty(pending.popleft().result())
+            while pending:
+                yield from _non_empty(pending.popleft().result())
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def _unordered(
+        self, pool: ProcessPoolExecutor, task: Tuple, ranges: List, in_flight: int
+    ) -> Iterator[pd.DataFrame]:
+        pending = set()
+        remaining = iter(ranges)
+        try:
+            while True:
+                for byte_range in remaining:
+                    pending.add(self._submit(pool, task, byte_range))
+                    if len(pending) >= in_flight:
+                        break
+                if not pending:
+                    return
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield from _non_empty(future.result())
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def _non_empty(batch: pd.DataFrame) -> Iterator[pd.DataFrame]:
+    if len(batch):
+        yield batch
@@ -0,0 +1,171 @@
+import json
+import os
+import shutil
+import pandas as pd
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import quote, unquote
+from .scan_filter import ScanFilter
+from ..query_engine.token import ReservedWord
+
+__all__ = [
+    "PartitionedTable",
+    "PARTITIONED_STORAGE",
+    "PARTITION_FILE",
+    "partition_name",
+]
+
+# Storage of a table laid out as one folder per value of its partition column
+PARTITIONED_STORAGE = "PARTITIONED"
+# Partition column of a table, kept in the table folder
+PARTITION_FILE = "partition.json"
+PART_PREFIX = "part-"
+# Folder value of the rows whose partition column is null
+NULL_PARTITION = "__NULL__"
+# Part file written by inserts and checkpoints, bulk loads add their own part files
+APPEND_PART = f"{PART_PREFIX}0.csv"
+
+
+def partition_name(value: Any) -> str:
+    """
+    Folder value of a partition, quoted so that any string is a valid file name
+    """
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return NULL_PARTITION
+    if hasattr(value, "item"):
+        value = value.item()
+    return quote(str(value), safe="")
+
+
+class PartitionedTable:
+    """
+    Table stored as `<database>/<table>/<column>=<value>/part-*.csv`, every part file is a csv
+    with a header and every column of the table, so a part is scanned like a plain table
+    Args:
+        folder (Path): `<database>/<table>` folder
+    """
+
+    def __init__(self, folder: Path):
+        self.folder = folder
+
+    @classmethod
+    def create(cls, folder: Path, column: str) -> "PartitionedTable":
+        """
+        Create an empty table
+        Args:
+            folder (Path): `<database>/<table>` folder, removed first when it exists
+            column (str): partition column
+        Returns:
+            PartitionedTable
+        """
+        table = cls(folder)
+        table.drop()
+        folder.mkdir(parents=True)
+        with open(folder / PARTITION_FILE, "w") as f:
+            json.dump({"column": column}, f)
+        return table
+
+    def drop(self) -> None:
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    @property
+    def column(self) -> str:
+        with open(self.folder / PARTITION_FILE) as f:
+            return json.load(f)["column"]
+
+    def partition_folder(self, value: Any) -> Path:
+        return self.folder / f"{self.column}={partition_name(value)}"
+
+    def partitions(self, column_type: Optional[str] = None) -> List[Tuple[Any, Path]]:
+        """
+        Value and folder of every partition, values are converted to the partition column type
+        """
+        prefix = f"{self.column}="
+        partitions = []
+        for folder in sorted(self.folder.iterdir()):
+            if folder.is_dir() and folder.name.startswith(prefix):
+                partitions.append(
+                    (_partition_value(folder.name[len(prefix) :], column_type), folder)
+                )
+        return partitions
+
+    def prune(
+        self, filters: Optional[List[ScanFilter]], column_type: Optional[str] = None
+    ) -> List[Path]:
+        """
+        Part files of the partitions whose value satisfies the filters on the partition column,
+        a null partition only survives when no filter is on the partition column
+        Args:
+            filters (List[ScanFilter]): conditions of the scan
+            column_type (str): declared type of the partition column
+        Returns:
+            List[Path]: part files in partition then file name order
+        """
+        column = self.column
+        partition_filters = [f for f in filters or [] if f.column == column]
+        part_files = []
+        for value, folder in self.partitions(column_type):
+            if partition_filters and (
+                value is None
+                or not all(_value_matches(value, f) for f in partition_filters)
+            ):
+                continue
+            part_files.extend(sorted(folder.glob(f"{PART_PREFIX}*.csv")))
+        return part_files
+
+    def append_path(self, value: Any, header: List[str]) -> Path:
+        """
+        Part file receiving the appends of a partition, created with a header when missing
+        """
+        folder = self.partition_folder(value)
+        folder.mkdir(exist_ok=True)
+        part_path = folder / APPEND_PART
+        if not part_path.exists():
+            pd.DataFrame(columns=header).to_csv(part_path, index=False)
+        return part_path
+
+    def marks(self) -> Dict[str, int]:
+        """
+        Size of every part file by path relative to the table folder
+        """
+        return {
+            str(part.relative_to(self.folder)): part.stat().st_size
+            for _, folder in self.partitions()
+            for part in folder.glob(f"{PART_PREFIX}*.csv")
+        }
+
+    def restore(self, marks: Dict[str, int]) -> None:
+        """
+        Bring back part files to the sizes of `marks`, part files created since are removed
+        """
+        for relative_path, size in self.marks().items():
+            part = self.folder / relative_path
+            if relative_path not in marks:
+                part.unlink()
+            elif size > marks[relative_path]:
+                with open(part, "r+b") as f:
+                    f.truncate(marks[relative_path])
+                    os.fsync(f.fileno())
+
+
+def _partition_value(name: str, column_type: Optional[str]) -> Any:
+    if name == NULL_PARTITION:
+        return None
+    value = unquote(name)
+    try:
+        match column_type:
+            case ReservedWord.INT.value:
+                return int(value)
+            case ReservedWord.FLOAT.value:
+                return float(value)
+    except ValueError:
+        pass
+    return value
+
+
+def _value_matches(value: Any, scan_filter: ScanFilter) -> bool:
+    try:
+        return bool(scan_filter.mask(pd.Series([value]))[0])
+    except TypeError:
+        # Not comparable types, keep the partition and let the scan decide
+        return True
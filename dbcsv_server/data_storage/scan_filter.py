@@ -0,0 +1,73 @@
+import operator
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass
+from typing import Any, List, Literal
+
+__all__ = ["ScanFilter", "filters_mask", "null_mask"]
+
+ComparisionOperator = Literal[">", "<", "=", "<>", ">=", "<=", "IN"]
+
+_OPERATORS = {
+    "=": operator.eq,
+    "<>": operator.ne,
+    ">": operator.gt,
+    "<": operator.lt,
+    ">=": operator.ge,
+    "<=": operator.le,
+    "IN": lambda values, value: pd.Series(values).isin(list(value)),
+}
+
+
+@dataclass
+class ScanFilter:
+    """
+    A `column <operator> value` condition evaluated by the storage while scanning,
+    rows that fail it are dropped before any row object is built, `value` is a tuple for IN
+    """
+
+    column: str
+    operator: ComparisionOperator
+    value: Any
+
+    def mask(self, values) -> np.ndarray:
+        """
+        Evaluate the condition on a column array
+        Args:
+            values (np.ndarray | pd.Series): raw column values
+        Returns:
+            np.ndarray: boolean mask of matched rows, a null value never matches
+        """
+        result = _OPERATORS[self.operator](values, self.value)
+        if isinstance(result, pd.Series):
+            result = result.fillna(False).to_numpy(dtype=bool)
+        return np.asarray(result, dtype=bool) & ~null_mask(values)
+
+
+def null_mask(values) -> np.ndarray:
+    """
+    Rows whose value is null: None, NaN or a missing value of a masked column
+    """
+    return np.asarray(pd.isna(values), dtype=bool)
+
+
+def filters_mask(columns, filters: List[ScanFilter]) -> np.ndarray:
+    """
+    Combine the masks of all filters (AND) over a mapping of column arrays
+    Args:
+        columns: mapping column name -> column array (a DataFrame batch works)
+        filters (List[ScanFilter]): conditions to apply
+    Raises:
+        ValueError: a filter column does not exists
+    Returns:
+        np.ndarray: boolean mask of matched rows
+    """
+    mask = None
+    for scan_filter in filters:
+        if scan_filter.column not in columns:
+            raise ValueError(f"Column {scan_filter.column} does not exists")
+        column_mask = scan_filter.mask(columns[scan_filter.column])
+        mask = column_mask if mask is None else mask & column_mask
+        if not mask.any():
+            break
+    return mask
@@ -0,0 +1,175 @@
+import pandas as pd
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+from ..query_engine.token import ReservedWord
+
+__all__ = [
+    "load_schema",
+    "schema_dtypes",
+    "raise_schema_mismatch",
+    "report_schema_mismatch",
+    "coerce_value",
+    "typed_chunk",
+    "SCHEMA_KINDS",
+]
+
+# Pandas dtype used to parse each declared column type
+SCHEMA_DTYPES = {
+    ReservedWord.INT.value: "Int64",
+    ReservedWord.FLOAT.value: "float64",
+    ReservedWord.STRING.value: str,
+}
+# Column cache kind of each declared column type
+SCHEMA_KINDS = {
+    ReservedWord.INT.value: "int",
+    ReservedWord.FLOAT.value: "float",
+    ReservedWord.STRING.value: "string",
+}
+
+
+def load_schema(meta_path: Path) -> Optional[Dict[str, str]]:
+    """
+    Read the columns definition written by `create_table_file`
+    Args:
+        meta_path (Path): `meta.<table>.csv` file
+    Raises:
+        ValueError: a column has an unknown type
+    Returns:
+        Dict[str, str]: column name -> column type, None when the table has no meta file
+    """
+    if not meta_path.is_file():
+        return None
+    meta_df = pd.read_csv(meta_path, dtype=str)
+    schema = dict(zip(meta_df["column_name"], meta_df["column_type"]))
+    for column_name, column_type in schema.items():
+        if column_type not in SCHEMA_DTYPES:
+            raise ValueError(f"Column {column_name} has unknown type {column_type}")
+    return schema
+
+
+def schema_dtypes(
+    schema: Optional[Dict[str, str]], usecols: Optional[List[str]] = None
+) -> Optional[Dict]:
+    """
+    Explicit dtypes to give to `pd.read_csv` so that no type is inferred
+    Args:
+        schema (Dict[str, str]): column name -> column type, None when not declared
+        usecols (List[str]): only give the dtypes of these columns, None for every column
+    """
+    if not schema:
+        return None
+    return {
+        column_name: SCHEMA_DTYPES[column_type]
+        for column_name, column_type in schema.items()
+        if usecols is None or column_name in usecols
+    }
+
+
+def coerce_value(column_name: str, column_type: Optional[str], value):
+    """
+    Convert a written value to its declared column type
+    Args:
+        column_name (str): column name
+        column_type (str): INT, FLOAT, STRING or None for an undeclared column
+        value: number, string or None
+    Raises:
+        ValueError: the value does not match the column type
+    Returns:
+        int | float | str | None
+    """
+    if value is None or column_type is None:
+        return value
+    is_number = isinstance(value, (int, float)) and not isinstance(value, bool)
+    if column_type == ReservedWord.INT.value and is_number and float(value).is_integer():
+        return int(value)
+    if column_type == ReservedWord.FLOAT.value and is_number:
+        return float(value)
+    if column_type == ReservedWord.STRING.value and isinstance(value, str):
+        return value
+    raise ValueError(f"Column {column_name} expects {column_type} got '{value}'")
+
+
+def raise_schema_mismatch(
+    file_path: Path, schema: Dict[str, str], chunk_size: int
+) -> None:
+    """
+    Locate the first value that does not match its declared column type,
+    called once a typed read failed so that the error names the value instead of a parser message
+    Args:
+        file_path (Path): csv data file
+        schema (Dict[str, str]): column name -> column type
+        chunk_size (int): rows parsed at a time
+    Raises:
+        ValueError: the first mismatched value
+    """
+    header = pd.read_csv(file_path, nrows=0).columns
+    typed_columns = [
+        column_name
+        for column_name, column_type in schema.items()
+        if column_type != ReservedWord.STRING.value and column_name in header
+    ]
+    row_offset = 0
+    with pd.read_csv(
+        file_path, chunksize=chunk_size, usecols=typed_columns, dtype=str
+    ) as reader:
+        for chunk in reader:
+            typed_chunk(chunk, schema, row_offset)
+            row_offset += len(chunk)
+
+
+def report_schema_mismatch(
+    batches: Iterator[pd.DataFrame],
+    file_path: Path,
+    schema: Optional[Dict[str, str]],
+    chunk_size: int,
+) -> Iterator[pd.DataFrame]:
+    """
+    Batches of a typed read of a csv file, a parser error of a table with a schema is
+    reported as the first value that does not match its declared column type
+    Args:
+        batches (Iterator[pd.DataFrame]): typed read of the file
+        file_path (Path): csv data file
+        schema (Dict[str, str]): column name -> column type, None when not declared
+        chunk_size (int): rows parsed at a time
+    Raises:
+        ValueError: the first mismatched value
+    """
+    try:
+        yield from batches
+    except (ValueError, TypeError):
+        if not schema:
+            raise
+        raise_schema_mismatch(file_path, schema, chunk_size)
+        raise
+
+
+def typed_chunk(chunk: pd.DataFrame, schema: Dict[str, str], row_offset: int = 0) -> pd.DataFrame:
+    """
+    Convert a chunk read as strings to the declared column types
+    Args:
+        chunk (pd.DataFrame): raw values, missing values are NaN
+        schema (Dict[str, str]): column name -> column type
+        row_offset (int): rows before the chunk, used in the error message
+    Raises:
+        ValueError: the first mismatched value
+    Returns:
+        pd.DataFrame: chunk with typed columns
+    """
+    chunk = chunk.copy()
+    for column_name in chunk.columns:
+        column_type = schema.get(column_name)
+        if column_type is None or column_type == ReservedWord.STRING.value:
+            continue
+        raw = chunk[column_name]
+        numbers = pd.to_numeric(raw, errors="coerce")
+        invalid = numbers.isna() & raw.notna()
+        if column_type == ReservedWord.INT.value:
+            invalid |= numbers.notna() & (numbers % 1 != 0)
+        if invalid.any():
+            position = int(invalid.to_numpy().argmax())
+            raise ValueError(
+                f"Column {column_name} expects {column_type} "
+                f"got '{raw.iloc[position]}' at row {row_offset + position + 1}"
+            )
+        chunk[column_name] = numbers.astype(SCHEMA_DTYPES[column_type])
+    return chunk
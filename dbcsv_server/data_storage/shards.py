@@ -0,0 +1,178 @@
+import os
+import queue
+import shutil
+import threading
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Iterator, List
+
+__all__ = ["ShardedTable", "scan_shards", "SHARDED_STORAGE", "DEFAULT_SHARD_WORKERS"]
+
+# Storage of a table made of every csv file of its folder, given as `CREATE TABLE ... USING SHARDS`
+SHARDED_STORAGE = "SHARDS"
+SHARD_PATTERN = "*.csv"
+# Shard written by inserts, bulk loads and external writers add their own shards
+APPEND_SHARD = "part-0.csv"
+# Threads scanning the shards of a table at the same time
+DEFAULT_SHARD_WORKERS = 4
+# Batches a shard scan keeps ready before waiting for the consumer
+BATCHES_PER_SHARD = 2
+# Seconds a blocked worker waits before checking whether the scan was abandoned
+PUT_TIMEOUT = 0.1
+
+
+class ShardedTable:
+    """
+    Table stored as `<database>/<table>/*.csv`, every shard is a csv with a header
+    and is scanned like a plain table. Files are added by dropping them in the folder,
+    a hidden file (starting with a dot) is not a shard yet
+    Args:
+        folder (Path): `<database>/<table>` folder
+    """
+
+    def __init__(self, folder: Path):
+        self.folder = folder
+
+    @classmethod
+    def create(cls, folder: Path) -> "ShardedTable":
+        """
+        Create an empty table, the folder is removed first when it exists
+        """
+        table = cls(folder)
+        table.drop()
+        folder.mkdir(parents=True)
+        return table
+
+    def drop(self) -> None:
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def shards(self) -> List[Path]:
+        """
+        Shards in file name order
+        """
+        return sorted(
+            path
+            for path in self.folder.glob(SHARD_PATTERN)
+            if not path.name.startswith(".") and path.is_file()
+        )
+
+    def append_path(self, header: List[str]) -> Path:
+        """
+        Shard receiving the appends of inserts, created with a header when missing
+        """
+        shard_path = self.folder / APPEND_SHARD
+        if not shard_path.exists():
+            pd.DataFrame(columns=header).to_csv(shard_path, index=False)
+        return shard_path
+
+    def mark(self) -> int:
+        """
+        Size of the append shard, 0 when it does not exists
+        """
+        try:
+            return (self.folder / APPEND_SHARD).stat().st_size
+        except FileNotFoundError:
+            return 0
+
+    def restore(self, mark: int) -> None:
+        """
+        Bring back the append shard to the size of `mark`, the only shard a checkpoint writes
+        """
+        shard_path = self.folder / APPEND_SHARD
+        if mark == 0:
+            shard_path.unlink(missing_ok=True)
+            return
+        with open(shard_path, "r+b") as f:
+            f.truncate(mark)
+            os.fsync(f.fileno())
+
+
+class _Failure:
+    def __init__(self, error: Exception):
+        self.error = error
+
+
+# Put by a worker once its shard is fully scanned
+_END = object()
+
+
+def scan_shards(
+    scan: Callable[[Path], Iterator[pd.DataFrame]],
+    shards: List[Path],
+    workers: int = DEFAULT_SHARD_WORKERS,
+    ordered: bool = True,
+) -> Iterator[pd.DataFrame]:
+    """
+    Stream the batches of several shards scanned by a pool of threads
+    A worker keeps at most `BATCHES_PER_SHARD` batches ahead of the consumer
+    Args:
+        scan (Callable): return the batches of one shard
+        shards (List[Path]): shards to scan
+        workers (int): shards scanned at the same time
+        ordered (bool): yield the shards one after the other in list order,
+            else batches as soon as they are scanned
+    Returns:
+        Iterator[pd.DataFrame]
+    """
+    if workers <= 1 or len(shards) <= 1:
+        for shard in shards:
+            yield from scan(shard)
+        return
+    stopped = threading.Event()
+    if ordered:
+        outputs = [queue.Queue(BATCHES_PER_SHARD) for _ in shards]
+    else:
+        shared = queue.Queue(BATCHES_PER_SHARD * workers)
+        outputs = [shared] * len(shards)
+    executor = ThreadPoolExecutor(min(workers, len(shards)))
+    try:
+        for shard, output in zip(shards, outputs):
+            executor.submit(_produce, scan, shard, output, stopped)
+        if ordered:
+            for output in outputs:
+                yield from _consume(output, 1)
+        else:
+            yield from _consume(shared, len(shards))
+    finally:
+        # Workers blocked on a full queue give up once the consumer is gone
+        stopped.set()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _produce(
+    scan: Callable[[Path], Iterator[pd.DataFrame]],
+    shard: Path,
+    output: queue.Queue,
+    stopped: threading.Event,
+) -> None:
+    try:
+        for batch in scan(shard):
+            if not _put(output, batch, stopped):
+                return
+    except Exception as e:
+        _put(output, _Failure(e), stopped)
+        return
+    _put(output, _END, stopped)
+
+
+def _put(output: queue.Queue, item, stopped: threading.Event) -> bool:
+    while not stopped.is_set():
+        try:
+            output.put(item, timeout=PUT_TIMEOUT)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _consume(output: queue.Queue, shard_count: int) -> Iterator[pd.DataFrame]:
+    finished = 0
+    while finished < shard_count:
+        item = output.get()
+        if item is _END:
+            finished += 1
+        elif isinstance(item, _Failure):
+            raise item.error
+        else:
+            yield item
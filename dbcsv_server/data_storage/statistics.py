@@ -0,0 +1,228 @@
+import json
+import os
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+from .scan_filter import ScanFilter
+
+__all__ = [
+    "TableStatistics",
+    "ColumnStatistics",
+    "DEFAULT_SELECTIVITY",
+]
+
+# Rows kept in the uniform sample the histograms are built from
+DEFAULT_SAMPLE_SIZE = 10000
+# Buckets of an equi-depth histogram
+DEFAULT_HISTOGRAM_BUCKETS = 32
+# Smallest hashes kept to estimate the number of distinct values
+DISTINCT_SKETCH_SIZE = 1024
+# Selectivity of a condition the statistics can not estimate
+DEFAULT_SELECTIVITY = 1 / 3
+HASH_SPACE = float(2**64)
+
+
+class ColumnStatistics:
+    """
+    Statistics of a column
+    Args:
+        distinct (int): estimated number of distinct non null values
+        null_fraction (float): share of null values
+        histogram (List): bounds of equi-depth buckets over the non null values, smallest first
+    """
+
+    def __init__(self, distinct: int, null_fraction: float, histogram: List):
+        self.distinct = distinct
+        self.null_fraction = null_fraction
+        self.histogram = histogram
+
+    def selectivity(self, scan_filter: ScanFilter) -> float:
+        """
+        Estimated share of the rows satisfying a condition on the column
+        """
+        not_null = 1 - self.null_fraction
+        if not self.histogram or self.distinct == 0:
+            return 0.0
+        value = scan_filter.value
+        try:
+            match scan_filter.operator:
+                case "=":
+                    return not_null * self._equal(value)
+                case "<>":
+                    return not_null * (1 - self._equal(value))
+                case "IN":
+                    return min(not_null * sum(self._equal(v) for v in value), not_null)
+                case "<":
+                    return not_null * self._below(value, inclusive=False)
+                case "<=":
+                    return not_null * self._below(value, inclusive=True)
+                case ">":
+                    return not_null * (1 - self._below(value, inclusive=True))
+                case ">=":
+                    return not_null * (1 - self._below(value, inclusive=False))
+        except TypeError:
+            pass
+        return DEFAULT_SELECTIVITY
+
+    def _equal(self, value) -> float:
+        if value is None or value < self.histogram[0] or value > self.histogram[-1]:
+            return 0.0
+        return 1 / self.distinct
+
+    def _below(self, value, inclusive: bool) -> float:
+        """
+        Share of the non null values lower than `value`, interpolated inside a bucket
+        """
+        bounds = self.histogram
+        side = "right" if inclusive else "left"
+        position = int(np.searchsorted(np.asarray(bounds, dtype=object), value, side=side))
+        buckets = len(bounds) - 1
+        if position == 0:
+            return 0.0
+        if position > buckets or buckets == 0:
+            return 1.0
+        low, high = bounds[position - 1], bounds[position]
+        within = 0.5
+        if isinstance(value, (int, float)) and isinstance(low, (int, float)) and high > low:
+            within = (value - low) / (high - low)
+        return (position - 1 + within) / buckets
+
+    def to_dict(self) -> Dict:
+        return {
+            "distinct": self.distinct,
+            "null_fraction": self.null_fraction,
+            "histogram": self.histogram,
+        }
+
+
+class TableStatistics:
+    """
+    Statistics of a table computed by ANALYZE, stored in `<database>/stats.<table>.json`
+    They describe the data files in the state given by `version` and are ignored once the table changed
+    Args:
+        row_count (int): number of rows
+        columns (Dict[str, ColumnStatistics]): statistics per column
+        version (Any): size and mtime of the data files when the statistics were computed
+    """
+
+    def __init__(self, row_count: int, columns: Dict[str, ColumnStatistics], version: Any):
+        self.row_count = row_count
+        self.columns = columns
+        self.version = version
+
+    @classmethod
+    def collect(
+        cls,
+        batches: Iterable[pd.DataFrame],
+        version: Any,
+        sample_size: int = DEFAULT_SAMPLE_SIZE,
+        buckets: int = DEFAULT_HISTOGRAM_BUCKETS,
+        seed: Optional[int] = None,
+    ) -> "TableStatistics":
+        """
+        Compute the statistics in one pass over the batches of a table
+        Distinct counts are estimated from the smallest hashes of the values, histograms
+        are built from a uniform sample of the rows
+        Args:
+            batches (Iterable[pd.DataFrame]): every row of the table
+            version (Any): state of the data files the batches were read from
+            sample_size (int): rows kept for the histograms
+            buckets (int): buckets per histogram
+            seed (int): seed of the sample
+        Returns:
+            TableStatistics
+        """
+        random = np.random.default_rng(seed)
+        row_count = 0
+        null_counts: Dict[str, int] = {}
+        sketches: Dict[str, np.ndarray] = {}
+        sample, sample_keys = None, np.empty(0)
+        for batch in batches:
+            row_count += len(batch)
+            for column in batch.columns:
+                values = batch[column]
+                null_counts[column] = null_counts.get(column, 0) + int(values.isna().sum())
+                hashes = pd.util.hash_pandas_object(values.dropna(), index=False).to_numpy()
+                sketch = np.union1d(sketches.get(column, np.empty(0, np.uint64)), hashes)
+                sketches[column] = sketch[:DISTINCT_SKETCH_SIZE]
+            # Keep the rows with the smallest random keys, a uniform sample of the table
+            keys = random.random(len(batch))
+            batch = batch.reset_index(drop=True)
+            sample = batch if sample is None else pd.concat([sample, batch], ignore_index=True)
+            sample_keys = np.concatenate([sample_keys, keys])
+            if len(sample) > sample_size:
+                keep = np.argpartition(sample_keys, sample_size)[:sample_size]
+                sample = sample.iloc[keep].reset_index(drop=True)
+                sample_keys = sample_keys[keep]
+        columns = {}
+        for column, sketch in sketches.items():
+            columns[column] = ColumnStatistics(
+                distinct=_distinct(sketch),
+                null_fraction=null_counts[column] / row_count if row_count else 0.0,
+                histogram=_histogram(sample[column].dropna(), buckets),
+            )
+        return cls(row_count, columns, version)
+
+    def selectivity(self, filters: Optional[List[ScanFilter]]) -> float:
+        """
+        Estimated share of the rows satisfying every filter, filters are taken as independent
+        """
+        selectivity = 1.0
+        for scan_filter in filters or []:
+            column = self.columns.get(scan_filter.column)
+            selectivity *= (
+                DEFAULT_SELECTIVITY if column is None else column.selectivity(scan_filter)
+            )
+        return selectivity
+
+    def estimate_rows(self, filters: Optional[List[ScanFilter]] = None) -> int:
+        """
+        Estimated number of rows satisfying every filter
+        """
+        return int(round(self.row_count * self.selectivity(filters)))
+
+    def save(self, path: Path) -> None:
+        payload = {
+            "row_count": self.row_count,
+            "version": self.version,
+            "columns": {name: column.to_dict() for name, column in self.columns.items()},
+        }
+        # Write then rename so that a reader never loads partial statistics
+        tmp_path = path.with_name(f"{path.name}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(payload, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: Path) -> Optional["TableStatistics"]:
+        try:
+            with open(path) as f:
+                payload = json.load(f)
+        except (OSError, ValueError):
+            return None
+        columns = {
+            name: ColumnStatistics(**column) for name, column in payload["columns"].items()
+        }
+        return cls(payload["row_count"], columns, payload["version"])
+
+
+def _distinct(sketch: np.ndarray) -> int:
+    """
+    Number of distinct values from the smallest hashes, exact below the sketch size
+    """
+    if len(sketch) < DISTINCT_SKETCH_SIZE:
+        return len(sketch)
+    return int((DISTINCT_SKETCH_SIZE - 1) / (float(sketch[-1]) / HASH_SPACE))
+
+
+def _histogram(values: pd.Series, buckets: int) -> List:
+    if len(values) == 0:
+        return []
+    ordered = np.sort(values.to_numpy(dtype=object))
+    positions = np.round(np.linspace(0, len(ordered) - 1, buckets + 1)).astype(int)
+    return [_native(ordered[position]) for position in positions]
+
+
+def _native(value):
+    return value.item() if hasattr(value, "item") else value
@@ -0,0 +1,141 @@
+import bisect
+import numpy as np
+from pathlib import Path
+from typing import Iterable, List, Tuple
+
+__all__ = [
+    "StringArray",
+    "encode_strings",
+    "utf8_size",
+    "save_strings",
+    "load_strings",
+    "offsets_path",
+    "search_strings",
+]
+
+
+class StringArray:
+    """
+    Strings stored as their UTF-8 bytes one after the other with the offset of each one,
+    string i is `data[offsets[i]:offsets[i + 1]]` so the array takes the size of its text
+    whatever its longest value, unlike a fixed width `<U` array
+    Indexing decodes only the selected strings into an object array
+    Args:
+        data (np.ndarray): uint8 bytes of every string
+        offsets (np.ndarray): int64 start of every string, then the total number of bytes
+    """
+
+    dtype = np.dtype(object)
+
+    def __init__(self, data: np.ndarray, offsets: np.ndarray):
+        self.data = data
+        self.offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    @property
+    def shape(self) -> Tuple[int]:
+        return (len(self),)
+
+    def __getitem__(self, rows):
+        if isinstance(rows, (int, np.integer)):
+            row = int(rows) + len(self) if rows < 0 else int(rows)
+            if not 0 <= row < len(self):
+                raise IndexError(f"Row {rows} out of range")
+            return self.data[self.offsets[row] : self.offsets[row + 1]].tobytes().decode()
+        if isinstance(rows, slice):
+            start, stop, step = rows.indices(len(self))
+            if step == 1:
+                # One read of the bytes of consecutive strings
+                offsets = np.asarray(self.offsets[start : max(start, stop) + 1])
+                raw = self.data[offsets[0] : offsets[-1]].tobytes()
+                return _decode(raw, (offsets - offsets[0]).tolist())
+            rows = np.arange(start, stop, step)
+        rows = np.asarray(rows)
+        if rows.dtype == bool:
+            rows = np.flatnonzero(rows)
+        data = self.data
+        starts, stops = self.offsets[rows].tolist(), self.offsets[rows + 1].tolist()
+        return _object_array([data[a:b].tobytes().decode() for a, b in zip(starts, stops)])
+
+    def __array__(self, dtype=None, copy=None) -> np.ndarray:
+        values = self[:]
+        return values if dtype is None else values.astype(dtype)
+
+
+def encode_strings(values: Iterable[str], start: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    UTF-8 bytes and offsets of strings, offsets begin at `start`
+    Returns:
+        (np.ndarray, np.ndarray): uint8 bytes and the len(values) + 1 offsets
+    """
+    values = list(values)
+    text = "".join(values)
+    if text.isascii():
+        # One byte per character, the text is encoded at once
+        data, encoded = text.encode(), values
+    else:
+        encoded = [value.encode() for value in values]
+        data = b"".join(encoded)
+    offsets = np.empty(len(values) + 1, dtype=np.int64)
+    offsets[0] = start
+    np.cumsum(np.fromiter(map(len, encoded), dtype=np.int64, count=len(values)), out=offsets[1:])
+    offsets[1:] += start
+    return np.frombuffer(data, dtype=np.uint8), offsets
+
+
+def utf8_size(values: Iterable[str]) -> int:
+    """
+    Bytes `encode_strings` takes for the strings
+    """
+    text = "".join(values)
+    return len(text) if text.isascii() else len(text.encode())
+
+
+def save_strings(path: Path, values: Iterable[str]) -> None:
+    """
+    Save strings as `<path>` bytes and `<path stem>.offsets.npy` files, without pickle
+    """
+    data, offsets = encode_strings(values)
+    np.save(path, data, allow_pickle=False)
+    np.save(offsets_path(path), offsets, allow_pickle=False)
+
+
+def load_strings(path: Path) -> StringArray:
+    """
+    Memory map strings saved by `save_strings`
+    """
+    return StringArray(
+        np.load(path, mmap_mode="r", allow_pickle=False),
+        np.load(offsets_path(path), mmap_mode="r", allow_pickle=False),
+    )
+
+
+def offsets_path(path: Path) -> Path:
+    return path.with_name(f"{path.stem}.offsets.npy")
+
+
+def search_strings(values: StringArray, value: str, side: str) -> int:
+    """
+    `np.searchsorted` of sorted strings, only the compared strings are decoded
+    """
+    if side == "left":
+        return bisect.bisect_left(values, value)
+    return bisect.bisect_right(values, value)
+
+
+def _decode(raw: bytes, offsets: List[int]) -> np.ndarray:
+    """
+    Strings of consecutive bytes, an ASCII text is decoded once and sliced by the offsets
+    """
+    if raw.isascii():
+        text = raw.decode()
+        return _object_array([text[a:b] for a, b in zip(offsets[:-1], offsets[1:])])
+    return _object_array([raw[a:b].decode() for a, b in zip(offsets[:-1], offsets[1:])])
+
+
+def _object_array(values: List[str]) -> np.ndarray:
+    array = np.empty(len(values), dtype=object)
+    array[:] = values
+    return array
@@ -0,0 +1,231 @@
+import json
+import os
+import struct
+import threading
+import zlib
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+from .group_commit import GroupCommitWriter
+
+__all__ = ["WriteAheadLog", "Checkpointer", "DEFAULT_WAL_FILE", "DEFAULT_CHECKPOINT_INTERVAL"]
+
+# Log file in the data folder
+DEFAULT_WAL_FILE = "dbcsv.wal"
+# Seconds between two checkpoints of the background checkpointer
+DEFAULT_CHECKPOINT_INTERVAL = 1.0
+# Length and crc32 of the payload in front of every record
+RECORD_HEADER = struct.Struct(">II")
+
+COMMIT = "commit"
+BEGIN_APPLY = "begin_apply"
+APPLIED = "applied"
+
+# Rows written by a committed transaction: database, table name, full rows in table column order
+Write = Tuple[str, str, List[List]]
+
+
+class WriteAheadLog:
+    """
+    Append only log of committed transactions, table files are updated later by a checkpoint
+    A commit is one record appended and synced, its writes are then pending until applied.
+    Commits of concurrent transactions are grouped by the group commit writer: the leader
+    of a group gives them their lsn, appends their records and syncs the log once
+
+    Records are `<length><crc32><json payload>`:
+        commit: lsn and the writes of the transaction
+        begin_apply: lsn and the mark of each written table taken before its files are changed
+        applied: lsn, the writes are in the table files
+    A log whose commits are all applied is truncated. A record cut by a crash fails its
+    checksum and is dropped with everything after it
+    Args:
+        path (Path): log file, created on first commit
+        writer (GroupCommitWriter): buffer grouping the commits of concurrent transactions,
+            a private one is created when not given
+    """
+
+    def __init__(
+        self, path: Path = Path(DEFAULT_WAL_FILE), writer: Optional[GroupCommitWriter] = None
+    ):
+        self.path = path
+        self.writer = writer or GroupCommitWriter()
+        self._lock = threading.Lock()
+        self._pending: Dict[int, List[Write]] = {}
+        self._interrupted: Dict[int, Dict[str, int]] = {}
+        self._next_lsn = 1
+        self._fd = None
+        self._load()
+
+    def commit(self, writes: List[Write]) -> int:
+        """
+        Make the writes of a transaction durable, the call returns once its group is synced
+        Args:
+            writes (List[Write]): rows per table in write order
+        Raises:
+            RuntimeError: when the group of the commit could not be written
+        Returns:
+            int: log sequence number of the commit
+        """
+        # Encoded by the committing thread, out of the log lock
+        transaction = _Commit(writes, json.dumps(writes))
+        self.writer.append(
+            self.path, transaction, len(transaction.payload), self._append_commits
+        )
+        return transaction.lsn
+
+    def pending(self) -> List[Tuple[int, List[Write]]]:
+        """
+        Committed transactions not applied yet, in commit order
+        """
+        with self._lock:
+            return sorted(self._pending.items())
+
+    def has_pending(self) -> bool:
+        return bool(self._pending)
+
+    def interrupted(self, lsn: int) -> Optional[Dict[str, int]]:
+        """
+        Table marks of a commit whose apply started before the last shutdown and did not finish
+        """
+        return self._interrupted.get(lsn)
+
+    def begin_apply(self, lsn: int, marks: Dict[str, int]) -> None:
+        """
+        Record the state of the tables a commit writes, synced before any table file is changed
+        Args:
+            lsn (int): commit being applied
+            marks (Dict[str, int]): `<database>.<table>` -> size of the csv or blocks count
+        """
+        with self._lock:
+            self._append({"type": BEGIN_APPLY, "lsn": lsn, "marks": marks}, sync=True)
+
+    def applied(self, lsn: int) -> None:
+        """
+        Record that the writes of a commit are in the table files, the log is truncated
+        once no commit is pending
+        """
+        with self._lock:
+            self._pending.pop(lsn, None)
+            self._interrupted.pop(lsn, None)
+            if self._pending:
+                # Not synced, an apply replayed after a crash restores its marks first
+                self._append({"type": APPLIED, "lsn": lsn}, sync=False)
+                return
+            if self._fd is not None:
+                os.ftruncate(self._fd, 0)
+                os.fsync(self._fd)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+
+    def _append_commits(self, commits: List["_Commit"]) -> None:
+        """
+        Append the records of a group of commits with one write and one sync,
+        lsn follow the order of the records in the log
+        """
+        with self._lock:
+            lsns = range(self._next_lsn, self._next_lsn + len(commits))
+            records = [
+                f'{{"type": "{COMMIT}", "lsn": {lsn}, "writes": {commit.payload}}}'
+                for lsn, commit in zip(lsns, commits)
+            ]
+            self._write(b"".join(_encode(record.encode("utf-8")) for record in records), sync=True)
+            for lsn, commit in zip(lsns, commits):
+                commit.lsn = lsn
+                self._pending[lsn] = commit.writes
+            self._next_lsn += len(commits)
+
+    def _append(self, record: Dict, sync: bool) -> None:
+        self._write(_encode(json.dumps(record).encode("utf-8")), sync)
+
+    def _write(self, data: bytes, sync: bool) -> None:
+        if self._fd is None:
+            self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        os.write(self._fd, data)
+        if sync:
+            os.fsync(self._fd)
+
+    def _load(self) -> None:
+        """
+        Read the records left by the previous run, a torn tail is cut off
+        """
+        try:
+            with open(self.path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return
+        position = 0
+        while position + RECORD_HEADER.size <= len(data):
+            length, checksum = RECORD_HEADER.unpack_from(data, position)
+            start = position + RECORD_HEADER.size
+            payload = data[start : start + length]
+            if len(payload) < length or zlib.crc32(payload) != checksum:
+                break
+            record = json.loads(payload)
+            lsn = record["lsn"]
+            match record["type"]:
+                case "commit":
+                    self._pending[lsn] = [tuple(write) for write in record["writes"]]
+                    self._next_lsn = max(self._next_lsn, lsn + 1)
+                case "begin_apply":
+                    self._interrupted[lsn] = record["marks"]
+                case "applied":
+                    self._pending.pop(lsn, None)
+                    self._interrupted.pop(lsn, None)
+            position = start + length
+        if position < len(data):
+            with open(self.path, "r+b") as f:
+                f.truncate(position)
+                os.fsync(f.fileno())
+
+
+class _Commit:
+    """
+    Transaction waiting in the open group of the log, its lsn is given when the group is written
+    """
+
+    def __init__(self, writes: List[Write], payload: str):
+        self.writes = writes
+        self.payload = payload
+        self.lsn: Optional[int] = None
+
+
+def _encode(payload: bytes) -> bytes:
+    return RECORD_HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+class Checkpointer:
+    """
+    Background thread applying pending commits to the table files every `interval` seconds
+    Args:
+        checkpoint (Callable): apply every pending commit
+        interval (float): seconds between two checkpoints
+    """
+
+    def __init__(
+        self, checkpoint: Callable[[], None], interval: float = DEFAULT_CHECKPOINT_INTERVAL
+    ):
+        if interval <= 0:
+            raise ValueError("Checkpoint interval must be positive")
+        self.checkpoint = checkpoint
+        self.interval = interval
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="checkpointer", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            try:
+                self.checkpoint()
+            except Exception:
+                # The commits stay pending, a reader or the next round retries them
+                pass
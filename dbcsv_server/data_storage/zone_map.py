@@ -0,0 +1,181 @@
+import json
+import os
+import numpy as np
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from .scan_filter import ScanFilter
+
+__all__ = ["ZoneMap", "zone_may_match", "DEFAULT_BLOCK_ROWS"]
+
+# Number of rows summarized by one zone of the map
+DEFAULT_BLOCK_ROWS = 8192
+
+
+class ZoneMap:
+    """
+    Per block statistics of each column: min, max and null count of every `block_rows` rows
+    A scan uses them to skip the blocks that cannot satisfy its filters
+    Args:
+        row_count (int): rows of the table
+        block_rows (int): rows per block
+        zones (Dict[str, List]): column name -> [[min, max, null_count], ...] one item per block
+    """
+
+    def __init__(self, row_count: int, block_rows: int, zones: Dict[str, List]):
+        self.row_count = row_count
+        self.block_rows = block_rows
+        self.zones = zones
+
+    @classmethod
+    def build(
+        cls,
+        row_count: int,
+        block_rows: int,
+        columns: Dict[str, Tuple[np.ndarray, Optional[np.ndarray]]],
+    ) -> "ZoneMap":
+        """
+        Compute the zones of column arrays
+        Args:
+            row_count (int): rows of the table
+            block_rows (int): rows per block
+            columns (Dict): column name -> (values, null mask or None)
+        Returns:
+            ZoneMap
+        """
+        zones = {}
+        for name, (values, nulls) in columns.items():
+            column_zones = []
+            for start in range(0, row_count, block_rows):
+                stop = min(start + block_rows, row_count)
+                block = values[start:stop]
+                if nulls is not None:
+                    block = block[~nulls[start:stop]]
+                elif block.dtype.kind == "f":
+                    block = block[~np.isnan(block)]
+                null_count = (stop - start) - len(block)
+                if len(block) == 0:
+                    column_zones.append([None, None, null_count])
+                    continue
+                column_zones.append([*_min_max(block), null_count])
+            zones[name] = column_zones
+        return cls(row_count, block_rows, zones)
+
+    def extend(
+        self, row_count: int, columns: Dict[str, Tuple[np.ndarray, Optional[np.ndarray]]]
+    ) -> "ZoneMap":
+        """
+        Zones of the table grown to `row_count` rows, only the blocks holding appended rows are computed
+        Args:
+            row_count (int): rows of the grown table
+            columns (Dict): column name -> (values, null mask or None) of the grown table
+        Returns:
+            ZoneMap
+        """
+        first_block = self.row_count // self.block_rows
+        start = first_block * self.block_rows
+        tail = ZoneMap.build(
+            row_count - start,
+            self.block_rows,
+            {
+                name: (values[start:], None if nulls is None else nulls[start:])
+                for name, (values, nulls) in columns.items()
+            },
+        )
+        zones = {
+            name: self.zones.get(name, [])[:first_block] + column_zones
+            for name, column_zones in tail.zones.items()
+        }
+        return ZoneMap(row_count, self.block_rows, zones)
+
+    @classmethod
+    def load(cls, path: Path) -> Optional["ZoneMap"]:
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return cls(data["row_count"], data["block_rows"], data["zones"])
+
+    def save(self, path: Path) -> None:
+        # Write then rename, a zone map is replaced while the cache is read when a table grows
+        tmp_path = path.with_name(f"{path.name}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(
+                {
+                    "row_count": self.row_count,
+                    "block_rows": self.block_rows,
+                    "zones": self.zones,
+                },
+                f,
+            )
+        os.replace(tmp_path, path)
+
+    def candidate_ranges(self, filters: List[ScanFilter]) -> List[Tuple[int, int]]:
+        """
+        Row ranges of the blocks that may hold a row satisfying every filter,
+        adjacent blocks are merged in one range
+        Args:
+            filters (List[ScanFilter]): conditions of the scan
+        Returns:
+            List[Tuple[int, int]]: [start, stop) row ranges
+        """
+        ranges = []
+        for block, start in enumerate(range(0, self.row_count, self.block_rows)):
+            stop = min(start + self.block_rows, self.row_count)
+            if not all(self._may_match(block, f) for f in filters):
+                continue
+            if ranges and ranges[-1][1] == start:
+                ranges[-1] = (ranges[-1][0], stop)
+            else:
+                ranges.append((start, stop))
+        return ranges
+
+    def _may_match(self, block: int, scan_filter: ScanFilter) -> bool:
+        column_zones = self.zones.get(scan_filter.column)
+        if column_zones is None:
+            return True
+        minimum, maximum, _ = column_zones[block]
+        return zone_may_match(minimum, maximum, scan_filter)
+
+
+def zone_may_match(minimum, maximum, scan_filter: ScanFilter) -> bool:
+    """
+    Whether a block whose non null values lie in [minimum, maximum] may satisfy a filter
+    Args:
+        minimum: smallest value of the block, None when the block only has nulls
+        maximum: largest value of the block
+        scan_filter (ScanFilter): condition of the scan
+    Returns:
+        bool: False only when no row of the block can match
+    """
+    if minimum is None:
+        # Only nulls in the block, a comparison never matches
+        return False
+    value = scan_filter.value
+    try:
+        match scan_filter.operator:
+            case "=":
+                return minimum <= value <= maximum
+            case "<>":
+                return not (minimum == maximum == value)
+            case ">":
+                return maximum > value
+            case ">=":
+                return maximum >= value
+            case "<":
+                return minimum < value
+            case "<=":
+                return minimum <= value
+            case "IN":
+                return any(minimum <= v <= maximum for v in value)
+    except TypeError:
+        # Not comparable types, let the scan decide
+        return True
+    return True
+
+
+def _min_max(block: np.ndarray) -> Tuple:
+    if block.dtype.kind in "UO":
+        # No minimum/maximum ufunc loop for strings
+        return str(min(block)), str(max(block))
+    return block.min().item(), block.max().item()
@@ -1,13 +1,25 @@
 from .query_engine.parser import Parser
 from .connection import ConnectionIdentity
 from .transaction_manager import TransactionManager
-from .query_engine.planner import Selection, Production, Projection, TableCreation
-from .query_engine.ast_node import SelectNode, CreateTableNode
-from .data_storage import FileManager
-from typing import TypedDict
+from .query_engine.planner import Planner
+from .data_storage import FileManager, Catalog, DEFAULT_CHUNK_SIZE
+from .data_storage.buffer_pool import BufferPool, DEFAULT_BUFFER_POOL_SIZE
+from .data_storage.shards import DEFAULT_SHARD_WORKERS
+from .data_storage.write_ahead_log import (
+    WriteAheadLog,
+    Checkpointer,
+    DEFAULT_WAL_FILE,
+    DEFAULT_CHECKPOINT_INTERVAL,
+)
+from pathlib import Path
+from typing import BinaryIO, Dict, Optional, TypedDict
 from functools import partial
 
 
+# Seconds the server trusts its catalog before checking the data folder again
+DEFAULT_SERVER_CATALOG_TTL = 1.0
+
+
 class FetchedData(TypedDict):
     data: tuple
     description: tuple
@@ -16,10 +28,45 @@ class FetchedData(TypedDict):
 class DBController:
     """
     This class act as the interface for database
+    Args:
+        chunk_size (int): number of rows per batch when scanning a table
+        chunk_memory (int): optional upper bound in bytes of a scanned batch
+        catalog_ttl (float): seconds tables metadata are served from memory before
+            their files are checked again, changes made through the server are seen immediately
+        parallel_degree (int): worker processes parsing a csv file, a query can ask for another degree
+        wal_path (Path): write ahead log of committed transactions, replayed at startup
+        checkpoint_interval (float): seconds between two background checkpoints of the log
+        buffer_pool_size (int): bytes of decoded table blocks shared by every connection
+        shard_workers (int): threads scanning the shards of a sharded table at the same time
     """
 
-    def __init__(self):
+    def __init__(
+        self,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        chunk_memory: Optional[int] = None,
+        catalog_ttl: float = DEFAULT_SERVER_CATALOG_TTL,
+        parallel_degree: int = 1,
+        wal_path: Path = Path(DEFAULT_WAL_FILE),
+        checkpoint_interval: float = DEFAULT_CHECKPOINT_INTERVAL,
+        buffer_pool_size: int = DEFAULT_BUFFER_POOL_SIZE,
+        shard_workers: int = DEFAULT_SHARD_WORKERS,
+    ):
         self.transaction_manager = TransactionManager()
+        self.catalog = Catalog(ttl=catalog_ttl)
+        self.wal = WriteAheadLog(wal_path)
+        self.file_manager = FileManager(
+            chunk_size=chunk_size,
+            chunk_memory=chunk_memory,
+            catalog=self.catalog,
+            parallel_degree=parallel_degree,
+            wal=self.wal,
+            buffer_pool=BufferPool(buffer_pool_size),
+            shard_workers=shard_workers,
+        )
+        # Recovery, commits left in the log by the previous run are applied before serving
+        self.file_manager.checkpoint()
+        self.checkpointer = Checkpointer(self.file_manager.checkpoint, checkpoint_interval)
+        self.checkpointer.start()
         self._con_list = {}
 
     def connect(self) -> ConnectionIdentity:
@@ -34,76 +81,106 @@ class DBController:
 
     def disconnect(self, con_id: str):
         """
-        Close a connection
+        Close a connection, its open transaction is rolled back
         Args:
             con (ConnectionIdentity):
         """
         con = self._con_list.get(con_id)
+        con.pending_writes = []
         con.close()
         self._con_list.pop(con_id)
 
-    def execute_query(self, con_id: str, sql_str: str) -> str:
+    def commit(self, con_id: str) -> None:
+        """
+        Commit the open transaction of a connection with one append and sync of the write ahead log,
+        its rows reach the table files at the next checkpoint and are seen by every later query
+        Args:
+            con_id (str)
+        """
+        con = self._con_list.get(con_id)
+        if not con or con.closed == True:
+            raise SystemError("Fail to get connection or connection closed")
+        writes, con.pending_writes = con.pending_writes, []
+        if writes:
+            self.wal.commit(writes)
+
+    def rollback(self, con_id: str) -> None:
+        """
+        Discard the open transaction of a connection
+        Args:
+            con_id (str)
+        """
+        con = self._con_list.get(con_id)
+        if not con or con.closed == True:
+            raise SystemError("Fail to get connection or connection closed")
+        con.pending_writes = []
+
+    def buffer_pool_stats(self) -> Dict[str, int]:
+        """
+        Hit, miss and eviction counters of the buffer pool shared by the connections
+        """
+        return self.file_manager.buffer_pool.stats()
+
+    def close(self) -> None:
+        """
+        Stop the checkpointer and apply the commits left in the log
+        """
+        self.checkpointer.stop()
+        self.file_manager.checkpoint()
+        self.file_manager.close()
+        self.wal.close()
+
+    def execute_query(
+        self, con_id: str, sql_str: str, parallel_degree: Optional[int] = None
+    ) -> str:
         """
         Execute a sql string
         Args:
             con (ConnectionIdentity)
             sql_str (str):
+            parallel_degree (int): worker processes scanning the table, the server setting when None
         Returns:
             query_id (str): a query id point to result of the query, it is not guarantee that the query is execute successful or not
         """
         con = self._con_list.get(con_id)
         if not con or con.closed == True:
             raise SystemError("Fail to get connection or connection closed")
+        if parallel_degree is not None and parallel_degree < 1:
+            raise ValueError("Parallel degree must be a positive integer")
         try:
             query_parser = Parser(sql_str)
             ast = query_parser.parse()
-            file_manager = FileManager()
-            # ***Need to implement: add an abstract class to handle all node
-
-            #
-            if isinstance(ast.nodes, SelectNode):
-                if ast.nodes.from_clause:
-                    production = Production(
-                        ast.nodes.from_clause,
-                        partial(file_manager.select_file, con=con),
-                    )
-                    if ast.nodes.where_clause:
-                        selection = Selection(
-                            node=ast.nodes.where_clause.expr, source=production
-                        )
-                        plan = partial(Projection, ast.nodes.column_list, selection)
-                        query_id = self.transaction_manager.add_task_execute(
-                            con, plan, "query"
-                        )
-                    else:
-                        selection = Selection(node=None, source=production)
-                        plan = partial(Projection, ast.nodes.column_list, selection)
-                        query_id = self.transaction_manager.add_task_execute(
-                            con, plan, "query"
-                        )
-                else:
-                    plan = partial(Projection, node=ast.nodes.column_list, source=None)
-                    query_id = self.transaction_manager.add_task_execute(
-                        con, plan, "query"
-                    )
-            elif isinstance(ast.nodes, CreateTableNode):
-                table_creation = TableCreation(ast.nodes)
-                plan = partial(
-                    file_manager.create_table_file,
-                    con,
-                    table_creation.create_database,
-                    table_creation.create_table_name,
-                    table_creation.create_column_list,
-                )
-                query_id = self.transaction_manager.add_task_execute(
-                    con, plan, "create"
-                )
-            else:
-                raise ValueError(f"Not support query: {sql_str}")
+            task, task_type = Planner(self.file_manager, con, parallel_degree).build(ast)
+            query_id = self.transaction_manager.add_task_execute(con, task, task_type)
         except Exception as e:
             raise
         return query_id
 
+    def copy_from(
+        self, con_id: str, database: str, table_name: str, source: BinaryIO
+    ) -> str:
+        """
+        Bulk load an uploaded csv into a table, like `COPY <database>.<table_name> FROM <path>`
+        Args:
+            con_id (str)
+            database (str): database name, upper cased like the names of a query
+            table_name (str): table name, upper cased like the names of a query
+            source (BinaryIO): csv with a header
+        Returns:
+            query_id (str)
+        """
+        con = self._con_list.get(con_id)
+        if not con or con.closed == True:
+            raise SystemError("Fail to get connection or connection closed")
+        plan = partial(
+            self.file_manager.copy_from,
+            con,
+            database.upper(),
+            table_name.upper(),
+            source,
+        )
+        return self.transaction_manager.add_task_execute(con, plan, "create")
+
     def fetch_result(self, con_id: str, query_id: str, num_record: int) -> FetchedData:
         """
         Return a next row of a query result
@@ -122,3 +199,15 @@ class DBController:
             }
         except Exception as e:
             raise
+
+    def fetch_next(self, con_id: str, query_id: str) -> FetchedData:
+        """
+        Return the next row of a query result, rows are produced lazily from the plan
+        Args:
+            con_id (str)
+            query_id (str)
+
+        Returns:
+            FetchedData
+        """
+        return self.fetch_result(con_id, query_id, 1)
@@ -10,10 +10,12 @@ FactorOperator = Literal["*", "/"]
 @dataclass
 class AST:
     """
-        `<root>` :: = `<select>` | `<create>`  
+        `<root>` :: = `<select>` | `<create>` | `<create_index>` | `<insert>` | `<copy>` | `<analyze>`
     """
     type = "AST"
-    nodes: Union["SelectNode"]
+    nodes: Union[
+        "SelectNode", "CreateTableNode", "CreateIndexNode", "InsertNode", "CopyNode", "AnalyzeNode"
+    ]
 
 @dataclass
 class SelectNode:
@@ -29,12 +31,58 @@ class SelectNode:
 class CreateTableNode:
     """
         `<create_table>` ::= CREATE TABLE `database_name`.`<table_name>` `<table_definition_group>`
+            [PARTITION BY (`<column_name>`)] [USING `<storage>`]
     """
     type = "Create"
     database: "DatabaseNode"
     table_name: "TableNameNode"
     table_definition_group: "TableDefinitionGroupNode"
+    storage: str = None
+    partition_by: str = None
     
+@dataclass
+class CreateIndexNode:
+    """
+        `<create_index>` ::= CREATE INDEX `<index_name>` ON `<database>`.`<table_name>` (`<column_name>`) [USING `<method>`]
+    """
+    type = "CreateIndex"
+    index_name: str
+    database: "DatabaseNode"
+    table_name: "TableNameNode"
+    column_name: str
+    method: str = None
+    
+@dataclass
+class InsertNode:
+    """
+        `<insert>` ::= INSERT INTO `<database>`.`<table_name>` [(`<column_name>`, ...)] VALUES `<row>`, ...
+        `<row>` ::= (`<literal>` | NULL, ...)
+    """
+    type = "Insert"
+    database: "DatabaseNode"
+    table_name: "TableNameNode"
+    column_names: Optional[list]
+    rows: list
+
+@dataclass
+class CopyNode:
+    """
+        `<copy>` ::= COPY `<database>`.`<table_name>` FROM `<string_literal>`
+    """
+    type = "Copy"
+    database: "DatabaseNode"
+    table_name: "TableNameNode"
+    path: str
+
+@dataclass
+class AnalyzeNode:
+    """
+        `<analyze>` ::= ANALYZE `<database>`.`<table_name>`
+    """
+    type = "Analyze"
+    database: "DatabaseNode"
+    table_name: "TableNameNode"
+
 @dataclass
 class WhereNode:
     """
@@ -181,11 +229,12 @@ class PredicateCompareNode:
             `<expression>` >  `<expression>` | \n
             `<expression>` <  `<expression>` | \n
             `<expression>` <> `<expression>` | \n
+            `<expression>` IN `<expr_list>` | \n
             `<predicate_parent>`
     """
     type = "PredicateCompare"
     left: Union["ExprNode", "PredicateParentNode"]
-    right: "ExprNode"
+    right: Union["ExprNode", "ExprListNode"]
     operator: Optional[ComparisionOperator]
     
 @dataclass
@@ -204,6 +253,14 @@ class ExprNode:
     type = "Expr"
     expr: Union["ExprAddNode"]
 
+@dataclass
+class ExprListNode:
+    """
+        `<expr_list>` ::= (`<expr>`, ...)
+    """
+    type = "ExprList"
+    items: list
+
 @dataclass
 class ExprAddNode:
     """
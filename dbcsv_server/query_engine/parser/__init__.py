@@ -1,10 +1,15 @@
 import re
+from typing import Tuple
 
 from ..token import ReservedWord, Token
 from ..ast_node import (
     AST,
     SelectNode,
     CreateTableNode,
+    CreateIndexNode,
+    InsertNode,
+    CopyNode,
+    AnalyzeNode,
     ColumnListNode,
     ColumnNode,
     ColumnWildCardNode,
@@ -27,7 +32,10 @@ class Parser:
     def __init__(self, query_string: str):
         if not isinstance(query_string, str):
             raise ValueError("Only accept string argument")
-        self.query_string = str.upper(query_string) + "\r\n"
+        # Keywords and identifiers are upper cased, a character whose upper case is longer keeps
+        # its case so string literals are read in their original case at the same positions
+        self.query_string = "".join(_upper(c) for c in query_string) + "\r\n"
+        self.raw_query_string = query_string + "\r\n"
         self.iter_query_string = iter(self.query_string)
         self.query_string_length = len(query_string)
         self.current_line = 1
@@ -38,18 +46,21 @@ class Parser:
         self.current_character = next(self.iter_query_string)
         self.last_character = None
         self.character_count = 1
+        self.character_index = 0
         self.token_index = 0
 
     def next_character(self):
         try:
             self.last_character = self.current_character
             self.current_character = next(self.iter_query_string)
+            self.character_index += 1
         except StopIteration:
             raise
 
     def peek_next(self, whole_literal: str, regex_end_character) -> str:
         try:
             self.current_character = next(self.iter_query_string)
+            self.character_index += 1
             if regex_end_character.search(self.current_character):
                 return whole_literal
             else:
@@ -59,6 +70,12 @@ class Parser:
         except StopIteration as e:
             raise ValueError("Literal not closed")
 
+    def raw_literal(self, start: int) -> str:
+        """
+        Original case of a literal ending at the current character
+        """
+        return self.raw_query_string[start : self.character_index]
+
     def scan_number(self) -> str:
         """
         Scan number until meet end regex
@@ -156,8 +173,10 @@ class Parser:
                     case "*":
                         self.token.append((Token.ASTERISK,))
                     case "'":  # String literal
+                        start = self.character_index + 1
+                        self.peek_next("", re.compile(r"'"))
                         self.token.append(
-                            (Token.STRING_LITERAL, self.peek_next("", re.compile(r"'")))
+                            (Token.STRING_LITERAL, self.raw_literal(start))
                         )
                     case _:  # Reversed word | Column name | Table name | Not support
                         # Number literal
@@ -252,13 +271,29 @@ class Parser:
             ast = AST(self.parse_select_clause())
         elif self.match_token(ReservedWord.CREATE):
             self.advance_token()
-            if not self.match_token(ReservedWord.TABLE):
-                raise ValueError(f"Expect token CREATE got {self.current_token}")
+            if self.match_token(ReservedWord.TABLE):
+                self.advance_token()
+                ast = AST(self.parse_create_clause())
+            elif self.match_token(ReservedWord.INDEX):
+                self.advance_token()
+                ast = AST(self.parse_create_index_clause())
+            else:
+                raise ValueError(f"Expect token TABLE or INDEX got {self.current_token}")
+        elif self.match_token(ReservedWord.INSERT):
+            self.advance_token()
+            if not self.match_token(ReservedWord.INTO):
+                raise ValueError(f"Expect token INTO got {self.current_token}")
             self.advance_token()
-            ast = AST(self.parse_create_clause())
+            ast = AST(self.parse_insert_clause())
+        elif self.match_token(ReservedWord.COPY):
+            self.advance_token()
+            ast = AST(self.parse_copy_clause())
+        elif self.match_token(ReservedWord.ANALYZE):
+            self.advance_token()
+            ast = AST(self.parse_analyze_clause())
         else:
             raise ValueError(
-                f"Invalid query expect SELECT or CREATE TABLE command got f{self.current_token}"
+                f"Invalid query expect SELECT, CREATE TABLE, CREATE INDEX, INSERT, COPY or ANALYZE command got f{self.current_token}"
             )
         return ast
 
@@ -371,3 +406,49 @@ class Parser:
 
         create_table_parser = CreateTableParser(self)
         return create_table_parser.parse()
+
+    def parse_create_index_clause(self) -> CreateIndexNode:
+        from .create_index_parser import CreateIndexParser
+
+        create_index_parser = CreateIndexParser(self)
+        return create_index_parser.parse()
+
+    def parse_insert_clause(self) -> InsertNode:
+        from .insert_parser import InsertParser
+
+        insert_parser = InsertParser(self)
+        return insert_parser.parse()
+
+    def parse_copy_clause(self) -> CopyNode:
+        from .copy_parser import CopyParser
+
+        copy_parser = CopyParser(self)
+        return copy_parser.parse()
+
+    def parse_analyze_clause(self) -> AnalyzeNode:
+        database, table_name = self.parse_table_name()
+        if self.current_token is not None:
+            raise ValueError(f"Unexpected token {self.current_token}")
+        return AnalyzeNode(database=database, table_name=table_name)
+
+    def parse_table_name(self) -> Tuple[DatabaseNode, TableNameNode]:
+        """
+        Parse `<database>`.`<table_name>`
+        """
+        if self.match_token(Token.IDENTIFIER):
+            database = DatabaseNode(expr=self.current_token)
+            self.advance_token()
+            if self.match_token(Token.DOT):
+                self.advance_token()
+                if self.match_token(Token.IDENTIFIER):
+                    table_name = TableNameNode(expr=self.current_token)
+                    self.advance_token()
+                    return database, table_name
+                raise ValueError(f"Expect table name got {self.current_token}")
+            raise ValueError(f"Unexpect token {self.current_token}")
+        raise ValueError(f"Expect database name got {self.current_token}")
+
+
+def _upper(character: str) -> str:
+    upper = character.upper()
+    return upper if len(upper) == 1 else character
@@ -0,0 +1,27 @@
+from ..token import Token, ReservedWord
+from ..ast_node import CopyNode
+from . import Parser
+
+
+class CopyParser:
+    """
+    A parser to parse COPY statement, the caller already consumed COPY
+    The source path keeps the case it has in the query
+    call parse() -> CopyNode
+    """
+
+    def __init__(self, caller: Parser):
+        self._caller = caller
+
+    def parse(self) -> CopyNode:
+        database, table_name = self._caller.parse_table_name()
+        if not self._caller.match_token(ReservedWord.FROM):
+            raise ValueError(f"Expect FROM got {self._caller.current_token}")
+        self._caller.advance_token()
+        if not self._caller.match_token(Token.STRING_LITERAL):
+            raise ValueError(f"Expect source path got {self._caller.current_token}")
+        path = self._caller.current_token[1]
+        self._caller.advance_token()
+        if self._caller.current_token is not None:
+            raise ValueError(f"Unexpected token {self._caller.current_token}")
+        return CopyNode(database=database, table_name=table_name, path=path)
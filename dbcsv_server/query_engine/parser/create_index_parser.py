@@ -0,0 +1,57 @@
+from ..token import Token, ReservedWord
+from ..ast_node import CreateIndexNode
+from . import Parser
+
+
+class CreateIndexParser:
+    """
+    A parser to parse CREATE INDEX statement, the caller already consumed CREATE INDEX
+    call parse() -> CreateIndexNode
+    """
+
+    def __init__(self, caller: Parser):
+        self._caller = caller
+
+    def parse(self) -> CreateIndexNode:
+        if not self._caller.match_token(Token.IDENTIFIER):
+            raise ValueError(f"Expect index name got {self._caller.current_token}")
+        index_name = self._caller.current_token
+        self._caller.advance_token()
+        if not self._caller.match_token(ReservedWord.ON):
+            raise ValueError(f"Expect ON got {self._caller.current_token}")
+        self._caller.advance_token()
+        database, table_name = self._caller.parse_table_name()
+        column_name = self._parse_column()
+        method = self._parse_method()
+        if self._caller.current_token is not None:
+            raise ValueError(f"Unexpected token {self._caller.current_token}")
+        return CreateIndexNode(
+            index_name=index_name,
+            database=database,
+            table_name=table_name,
+            column_name=column_name,
+            method=method,
+        )
+
+    def _parse_column(self):
+        if not self._caller.match_token(Token.LEFT_PAREN):
+            raise ValueError(f"Expect ( got {self._caller.current_token}")
+        self._caller.advance_token()
+        if not self._caller.match_token(Token.IDENTIFIER):
+            raise ValueError(f"Expect column name got {self._caller.current_token}")
+        column_name = self._caller.current_token
+        self._caller.advance_token()
+        if not self._caller.match_token(Token.RIGHT_PAREN):
+            raise ValueError(f"Expect close ) got {self._caller.current_token}")
+        self._caller.advance_token()
+        return column_name
+
+    def _parse_method(self):
+        if not self._caller.match_token(ReservedWord.USING):
+            return None
+        self._caller.advance_token()
+        if not self._caller.match_token(Token.IDENTIFIER):
+            raise ValueError(f"Expect index method got {self._caller.current_token}")
+        method = self._caller.current_token
+        self._caller.advance_token()
+        return method
@@ -25,7 +25,9 @@ class CreateTableParser:
                     table_name = TableNameNode(expr = self._caller.current_token)
                     self._caller.advance_token()
                     table_definition_group = self._parse_table_definition_group()
-                    return CreateTableNode(database= database, table_name=table_name, table_definition_group=table_definition_group)
+                    partition_by = self._parse_partition_by()
+                    storage = self._parse_storage()
+                    return CreateTableNode(database= database, table_name=table_name, table_definition_group=table_definition_group, storage=storage, partition_by=partition_by)
                 raise ValueError(f"Expect table name got {self._caller.current_token}")
             raise ValueError(f"Unexpect token {self._caller.current_token}")
         raise ValueError(f"Expect database name got {self._caller.current_token}")
@@ -35,6 +37,7 @@ class CreateTableParser:
             self._caller.advance_token()
             table_definition_group = TableDefinitionGroupNode(self._parse_table_definition_list())
             if self._caller.match_token(Token.RIGHT_PAREN):
+                self._caller.advance_token()
                 return table_definition_group
             raise ValueError(f"Expect close ) got {self._caller.current_token}")
         raise ValueError(f"Expect table definition list")
@@ -60,4 +63,33 @@ class CreateTableParser:
             column_definition = ColumnDefinitionNode(type_name=self._caller.current_token)
             self._caller.advance_token()
             return column_definition
-        raise ValueError(f"Expect column type got {self._caller.current_token}")
\ No newline at end of file
+        raise ValueError(f"Expect column type got {self._caller.current_token}")
+
+    def _parse_partition_by(self):
+        if not self._caller.match_token(ReservedWord.PARTITION):
+            return None
+        self._caller.advance_token()
+        if not self._caller.match_token(ReservedWord.BY):
+            raise ValueError(f"Expect BY got {self._caller.current_token}")
+        self._caller.advance_token()
+        if not self._caller.match_token(Token.LEFT_PAREN):
+            raise ValueError(f"Expect ( got {self._caller.current_token}")
+        self._caller.advance_token()
+        if not self._caller.match_token(Token.IDENTIFIER):
+            raise ValueError(f"Expect partition column got {self._caller.current_token}")
+        partition_by = self._caller.current_token
+        self._caller.advance_token()
+        if not self._caller.match_token(Token.RIGHT_PAREN):
+            raise ValueError(f"Expect close ) got {self._caller.current_token}")
+        self._caller.advance_token()
+        return partition_by
+
+    def _parse_storage(self):
+        if not self._caller.match_token(ReservedWord.USING):
+            return None
+        self._caller.advance_token()
+        if not self._caller.match_token(Token.IDENTIFIER):
+            raise ValueError(f"Expect table storage got {self._caller.current_token}")
+        storage = self._caller.current_token
+        self._caller.advance_token()
+        return storage
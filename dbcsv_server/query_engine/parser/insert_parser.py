@@ -0,0 +1,76 @@
+from ..token import Token, ReservedWord
+from ..ast_node import InsertNode
+from . import Parser
+
+
+class InsertParser:
+    """
+    A parser to parse INSERT statement, the caller already consumed INSERT INTO
+    String values keep the case they have in the query
+    call parse() -> InsertNode
+    """
+
+    def __init__(self, caller: Parser):
+        self._caller = caller
+
+    def parse(self) -> InsertNode:
+        database, table_name = self._caller.parse_table_name()
+        column_names = None
+        if self._caller.match_token(Token.LEFT_PAREN):
+            column_names = self._parse_group(self._parse_column_name)
+        if not self._caller.match_token(ReservedWord.VALUES):
+            raise ValueError(f"Expect VALUES got {self._caller.current_token}")
+        self._caller.advance_token()
+        rows = [self._parse_group(self._parse_value)]
+        while self._caller.match_token(Token.COMMA):
+            self._caller.advance_token()
+            rows.append(self._parse_group(self._parse_value))
+        if self._caller.current_token is not None:
+            raise ValueError(f"Unexpected token {self._caller.current_token}")
+        return InsertNode(
+            database=database,
+            table_name=table_name,
+            column_names=column_names,
+            rows=rows,
+        )
+
+    def _parse_group(self, parse_item) -> list:
+        """
+        Parse `(item, ...)`
+        """
+        if not self._caller.match_token(Token.LEFT_PAREN):
+            raise ValueError(f"Expect ( got {self._caller.current_token}")
+        self._caller.advance_token()
+        items = [parse_item()]
+        while self._caller.match_token(Token.COMMA):
+            self._caller.advance_token()
+            items.append(parse_item())
+        if not self._caller.match_token(Token.RIGHT_PAREN):
+            raise ValueError(f"Expect close ) got {self._caller.current_token}")
+        self._caller.advance_token()
+        return items
+
+    def _parse_column_name(self):
+        if not self._caller.match_token(Token.IDENTIFIER):
+            raise ValueError(f"Expect column name got {self._caller.current_token}")
+        column_name = self._caller.current_token
+        self._caller.advance_token()
+        return column_name
+
+    def _parse_value(self):
+        if self._caller.match_token(ReservedWord.NULL):
+            self._caller.advance_token()
+            return (ReservedWord.NULL,)
+        if self._caller.match_token(Token.STRING_LITERAL):
+            value = self._caller.current_token
+            self._caller.advance_token()
+            return value
+        sign = 1
+        if self._caller.match_token(Token.MINUS) or self._caller.match_token(Token.PLUS):
+            sign = -1 if self._caller.match_token(Token.MINUS) else 1
+            self._caller.advance_token()
+        if not self._caller.match_token(Token.NUMBER_LITERAL):
+            raise ValueError(f"Expect literal value got {self._caller.current_token}")
+        value = (Token.NUMBER_LITERAL, sign * self._caller.current_token[1])
+        self._caller.advance_token()
+        return value
@@ -5,6 +5,7 @@ from ..ast_node import (
     PredicateNotNode,
     PredicateCompareNode,
     PredicateParentNode,
+    ExprListNode,
 )
 from . import Parser
 from ..token import Token, ReservedWord
@@ -113,9 +114,34 @@ class PredicateParser:
                 self._caller.advance_token()
                 current_right = self._caller.parse_expr()
                 return PredicateCompareNode(left=current_left, right=current_right, operator=current_operator)
+            elif self._caller.match_token(ReservedWord.IN):
+                current_operator = self._caller.current_token[0]
+                self._caller.advance_token()
+                return PredicateCompareNode(
+                    left=current_left,
+                    right=self._parse_expr_list(),
+                    operator=current_operator,
+                )
             else:
                 raise RuntimeError(f"Missing expression condition")
 
+    def _parse_expr_list(self) -> ExprListNode:
+        """
+        Parse `ExprListNode`
+        Returns: `ExprListNode`
+        """
+        if not self._caller.match_token(Token.LEFT_PAREN):
+            raise ValueError(f"Expected ( got {self._caller.current_token}")
+        self._caller.advance_token()
+        items = [self._caller.parse_expr()]
+        while self._caller.match_token(Token.COMMA):
+            self._caller.advance_token()
+            items.append(self._caller.parse_expr())
+        if not self._caller.match_token(Token.RIGHT_PAREN):
+            raise ValueError(f"Expected close ) got {self._caller.current_token}")
+        self._caller.advance_token()
+        return ExprListNode(items=items)
+
     def _parse_predicate_parent(self) -> PredicateParentNode:
         """
         Parse `PredicateParentNode`
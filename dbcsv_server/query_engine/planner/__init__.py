@@ -1,7 +1,64 @@
-class Planner:
+from .operator import Operator
+from .production import Production, EmptyProduction
+from .selection import Selection
+from .projection import Projection, ProjectedBatch
+from .table_creation import TableCreation
+from .index_creation import IndexCreation
+from .insertion import Insertion
+from .bulk_load import BulkLoad
+from .table_analysis import TableAnalysis
+from .cost import estimate_rows, plan_parallel_degree, plan_index_scan, order_filters
+from .pushdown import split_predicate, referenced_columns, reorder_predicate
+from .expression_compiler import ExpressionCompiler, compile_expression, compile_predicate
+from .vectorized import BatchCompiler, compile_batch_expression, compile_batch_predicate
+from .constant_folding import simplify_predicate, fold_expression, fold_column_list
+from .logical_plan import (
+    LogicalScan,
+    LogicalFilter,
+    LogicalProject,
+    LogicalEmpty,
+    PlanContext,
+    logical_plan,
+    rewrite,
+    REWRITE_RULES,
+)
+from .planner import Planner
 
-    def __init__(self):
-        pass
-
-    def build(self):
-        pass
+__all__ = [
+    "Planner",
+    "Operator",
+    "Production",
+    "EmptyProduction",
+    "Selection",
+    "Projection",
+    "ProjectedBatch",
+    "TableCreation",
+    "IndexCreation",
+    "Insertion",
+    "BulkLoad",
+    "TableAnalysis",
+    "estimate_rows",
+    "plan_parallel_degree",
+    "plan_index_scan",
+    "order_filters",
+    "split_predicate",
+    "referenced_columns",
+    "reorder_predicate",
+    "ExpressionCompiler",
+    "compile_expression",
+    "compile_predicate",
+    "BatchCompiler",
+    "compile_batch_expression",
+    "compile_batch_predicate",
+    "LogicalScan",
+    "LogicalFilter",
+    "LogicalProject",
+    "LogicalEmpty",
+    "PlanContext",
+    "logical_plan",
+    "rewrite",
+    "REWRITE_RULES",
+    "simplify_predicate",
+    "fold_expression",
+    "fold_column_list",
+]
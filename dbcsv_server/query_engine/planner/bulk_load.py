@@ -0,0 +1,16 @@
+from pathlib import Path
+from ..ast_node import CopyNode
+
+
+class BulkLoad:
+    """
+    Resolve the target table and source file of a COPY statement
+    Args:
+        node (CopyNode)
+    """
+
+    def __init__(self, node: CopyNode):
+        self.node = node
+        self.load_database = node.database.expr[1]
+        self.load_table_name = node.table_name.expr[1]
+        self.load_path = Path(node.path)
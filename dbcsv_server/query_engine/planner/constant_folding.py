@@ -0,0 +1,269 @@
+import operator
+from dataclasses import replace
+from typing import List, Optional, Union
+from ..ast_node import (
+    ColumnListNode,
+    PredicateNode,
+    PredicateOrNode,
+    PredicateAndNode,
+    PredicateNotNode,
+    PredicateCompareNode,
+    PredicateParentNode,
+    ExprNode,
+    ExprAddNode,
+    ExprMultiNode,
+    ExprValueNode,
+    ValueNode,
+    ExprParentNode,
+)
+from ..token import Token, ReservedWord
+from .expression_compiler import COMPARE_HELPERS
+
+__all__ = ["simplify_predicate", "fold_expression", "fold_column_list"]
+
+# Folded operators, others are left for the evaluation to report
+_ARITHMETIC_OPERATORS = {
+    Token.PLUS: operator.add,
+    Token.MINUS: operator.sub,
+    Token.ASTERISK: operator.mul,
+    Token.DIVIDE: operator.truediv,
+}
+
+
+class _Literal:
+    """
+    Value of an expression known without any row
+    """
+
+    def __init__(self, value):
+        self.value = value
+
+
+def simplify_predicate(node: Optional[PredicateNode]) -> Union[PredicateNode, bool, None]:
+    """
+    Fold the literal arithmetic and comparisons of a predicate, drop the conditions always
+    true of an AND and those always false of an OR, remove double negations and parentheses
+    around a single condition. The tree keeps the shape the parser gives
+    Comparisons raising an error on their literals are kept so the evaluation reports it
+    Args:
+        node (PredicateNode): where clause predicate
+    Returns:
+        PredicateNode | bool: simplified predicate, True when every row satisfies it,
+            False when none does, None without predicate
+    """
+    if node is None:
+        return None
+    disjuncts = _simplify_disjuncts(node)
+    if isinstance(disjuncts, bool):
+        return disjuncts
+    return _predicate(disjuncts)
+
+
+def fold_expression(node: ExprNode) -> ExprNode:
+    """
+    Replace the literal arithmetic of an expression by its value, `(value)` by the value
+    """
+    return _expr(_fold_expr(node))
+
+
+def fold_column_list(node: ColumnListNode) -> ColumnListNode:
+    """
+    Fold every column expression of a column list, result column names are kept
+    """
+    if node.type == "Column":
+        if node.expr.type != "Expr":
+            return node
+        return replace(node, expr=fold_expression(node.expr))
+    return replace(
+        node,
+        left=fold_column_list(node.left),
+        right=fold_column_list(node.right) if node.right else node.right,
+    )
+
+
+def _simplify_disjuncts(node: PredicateNode) -> Union[List[List[PredicateNotNode]], bool]:
+    """
+    OR of AND conditions of a predicate, or its value when it is known
+    """
+    disjuncts = []
+    for conjuncts in _chain(node.expr, "PredicateOr"):
+        simplified = _simplify_conjuncts(conjuncts)
+        if simplified is True:
+            return True
+        if simplified is False:
+            continue
+        # (a OR b) OR c -> a OR b OR c
+        if len(simplified) == 1 and (nested := _parenthesized(simplified[0])) is not None:
+            disjuncts.extend(nested)
+        else:
+            disjuncts.append(simplified)
+    return disjuncts or False
+
+
+def _simplify_conjuncts(node: PredicateAndNode) -> Union[List[PredicateNotNode], bool]:
+    conjuncts = []
+    for conjunct in _chain(node, "PredicateAnd"):
+        simplified = _simplify_not(conjunct)
+        if simplified is False:
+            return False
+        if simplified is True:
+            continue
+        # (a AND b) AND c -> a AND b AND c
+        nested = _parenthesized(simplified)
+        if nested is not None and len(nested) == 1:
+            conjuncts.extend(nested[0])
+        else:
+            conjuncts.append(simplified)
+    return conjuncts or True
+
+
+def _simplify_not(node: PredicateNotNode) -> Union[PredicateNotNode, bool]:
+    compare = node.expr
+    negated = bool(node.operator)
+    if compare.operator:
+        value = _simplify_compare(compare)
+        if isinstance(value, bool):
+            return value != negated
+        return replace(node, expr=value)
+    # Parenthesized predicate
+    disjuncts = _simplify_disjuncts(compare.left.expr)
+    if isinstance(disjuncts, bool):
+        return disjuncts != negated
+    if len(disjuncts) == 1 and len(disjuncts[0]) == 1:
+        # NOT (NOT a) -> a, (a) -> a
+        inner = disjuncts[0][0]
+        return replace(inner, operator=None if bool(inner.operator) == negated else ReservedWord.NOT)
+    return replace(node, expr=_parent(disjuncts))
+
+
+def _simplify_compare(node: PredicateCompareNode) -> Union[PredicateCompareNode, bool]:
+    left = _fold_expr(node.left)
+    if node.operator == ReservedWord.IN:
+        items = [_fold_expr(item) for item in node.right.items]
+        if isinstance(left, _Literal) and all(isinstance(i, _Literal) for i in items):
+            return bool(COMPARE_HELPERS[node.operator](left.value, [i.value for i in items]))
+        return replace(
+            node, left=_expr(left), right=replace(node.right, items=[_expr(i) for i in items])
+        )
+    right = _fold_expr(node.right)
+    helper = COMPARE_HELPERS.get(node.operator)
+    if helper is not None and isinstance(left, _Literal) and isinstance(right, _Literal):
+        try:
+            return bool(helper(left.value, right.value))
+        except TypeError:
+            pass
+    return replace(node, left=_expr(left), right=_expr(right))
+
+
+def _fold_expr(node: ExprNode) -> Union[ExprAddNode, ExprMultiNode, ExprValueNode, _Literal]:
+    return _fold_binary(node.expr)
+
+
+def _fold_binary(node) -> Union[ExprAddNode, ExprMultiNode, ExprValueNode, _Literal]:
+    """
+    Fold an `ExprAddNode` or `ExprMultiNode`, a node without operator becomes its operand
+    """
+    if node.type == "ExprValue":
+        return _fold_value(node)
+    left = _fold_binary(node.left)
+    if not node.operator:
+        return left
+    right = _fold_binary(node.right)
+    arithmetic_operator = _ARITHMETIC_OPERATORS.get(node.operator)
+    if arithmetic_operator is not None and isinstance(left, _Literal) and isinstance(right, _Literal):
+        try:
+            return _Literal(arithmetic_operator(left.value, right.value))
+        except (TypeError, ZeroDivisionError):
+            pass
+    if node.type == "ExprAdd":
+        return replace(node, left=_add(left), right=_multi(right))
+    return replace(node, left=_multi(left), right=_value(right))
+
+
+def _fold_value(node: ExprValueNode) -> Union[ExprValueNode, _Literal]:
+    if isinstance(node.expr, tuple):
+        return _Literal(node.expr[1])
+    value = node.expr
+    if isinstance(value.expr, tuple):
+        return node
+    # (expr) -> expr when it is a single value
+    inner = _fold_expr(value.expr.expr)
+    if isinstance(inner, _Literal) or inner.type == "ExprValue":
+        return inner
+    return _parenthesized_value(inner)
+
+
+def _literal_node(literal: _Literal) -> ExprValueNode:
+    token = Token.STRING_LITERAL if isinstance(literal.value, str) else Token.NUMBER_LITERAL
+    return ExprValueNode(expr=(token, literal.value))
+
+
+def _value(node) -> ExprValueNode:
+    if isinstance(node, _Literal):
+        return _literal_node(node)
+    if node.type == "ExprValue":
+        return node
+    # An operation as operand of a higher priority one stays in parentheses
+    return _parenthesized_value(node)
+
+
+def _multi(node) -> ExprMultiNode:
+    if not isinstance(node, _Literal) and node.type == "ExprMulti":
+        return node
+    return ExprMultiNode(left=_value(node), right=None, operator=None)
+
+
+def _add(node) -> ExprAddNode:
+    if not isinstance(node, _Literal) and node.type == "ExprAdd":
+        return node
+    return ExprAddNode(left=_multi(node), right=None, operator=None)
+
+
+def _expr(node) -> ExprNode:
+    return ExprNode(expr=_add(node))
+
+
+def _parenthesized_value(node) -> ExprValueNode:
+    return ExprValueNode(expr=ValueNode(expr=ExprParentNode(expr=_expr(node))))
+
+
+def _chain(node, node_type: str) -> List:
+    """
+    Operands of a left recursive OR or AND chain in query order
+    """
+    operands = []
+    while node.type == node_type:
+        if node.right is not None:
+            operands.append(node.right)
+        node = node.left
+    operands.append(node)
+    operands.reverse()
+    return operands
+
+
+def _parenthesized(conjunct: PredicateNotNode) -> Optional[List[List[PredicateNotNode]]]:
+    """
+    Disjuncts of a condition which is a predicate in parentheses without NOT
+    """
+    if conjunct.operator or conjunct.expr.operator:
+        return None
+    return _simplify_disjuncts(conjunct.expr.left.expr)
+
+
+def _predicate(disjuncts: List[List[PredicateNotNode]]) -> PredicateNode:
+    current_or = None
+    for conjuncts in disjuncts:
+        current_and = PredicateAndNode(left=conjuncts[0], right=None, operator=None)
+        for conjunct in conjuncts[1:]:
+            current_and = PredicateAndNode(left=current_and, right=conjunct, operator=ReservedWord.AND)
+        if current_or is None:
+            current_or = PredicateOrNode(left=current_and, right=None, operator=None)
+        else:
+            current_or = PredicateOrNode(left=current_or, right=current_and, operator=ReservedWord.OR)
+    return PredicateNode(expr=current_or)
+
+
+def _parent(disjuncts: List[List[PredicateNotNode]]) -> PredicateCompareNode:
+    return PredicateCompareNode(
+        left=PredicateParentNode(expr=_predicate(disjuncts)), right=None, operator=None
+    )
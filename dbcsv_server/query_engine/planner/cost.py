@@ -0,0 +1,99 @@
+from typing import List, Optional
+from ...data_storage.scan_filter import ScanFilter
+from ...data_storage.statistics import TableStatistics
+
+__all__ = [
+    "estimate_rows",
+    "plan_parallel_degree",
+    "plan_index_scan",
+    "order_filters",
+    "scan_cost",
+    "index_scan_cost",
+    "PARALLEL_MIN_ROWS_PER_WORKER",
+]
+
+# Rows a worker process has to parse for a parallel scan to pay for its start up and transfers
+PARALLEL_MIN_ROWS_PER_WORKER = 50000
+# Cost of reading and filtering one row of a full scan, the unit of every cost
+SCAN_ROW_COST = 1.0
+# Cost of fetching one row by position through an index, an index scan is cheaper
+# than a full scan below a selectivity of SCAN_ROW_COST / INDEX_ROW_COST
+INDEX_ROW_COST = 4.0
+
+
+def estimate_rows(
+    statistics: Optional[TableStatistics], filters: Optional[List[ScanFilter]] = None
+) -> Optional[int]:
+    """
+    Estimated rows returned by a scan, None without statistics
+    """
+    if statistics is None:
+        return None
+    return statistics.estimate_rows(filters)
+
+
+def plan_parallel_degree(statistics: Optional[TableStatistics], max_degree: int) -> int:
+    """
+    Worker processes of a scan: one per `PARALLEL_MIN_ROWS_PER_WORKER` rows of the table,
+    at most `max_degree`, `max_degree` when the table was not analyzed
+    Args:
+        statistics (TableStatistics): statistics of the scanned table
+        max_degree (int): server degree of parallelism
+    Returns:
+        int
+    """
+    if statistics is None:
+        return max_degree
+    return max(1, min(max_degree, statistics.row_count // PARALLEL_MIN_ROWS_PER_WORKER))
+
+
+def order_filters(
+    statistics: Optional[TableStatistics], filters: List[ScanFilter]
+) -> List[ScanFilter]:
+    """
+    Filters from the most selective, a batch stops being filtered once no row is left
+    The order is kept when the table was not analyzed
+    """
+    if statistics is None:
+        return list(filters)
+    return sorted(filters, key=lambda scan_filter: statistics.selectivity([scan_filter]))
+
+
+def scan_cost(row_count: int, parallel_degree: int = 1) -> float:
+    """
+    Cost of reading every row of a table with `parallel_degree` worker processes
+    """
+    return row_count * SCAN_ROW_COST / max(1, parallel_degree)
+
+
+def index_scan_cost(matched_rows: int) -> float:
+    """
+    Cost of fetching the rows matched by an index
+    """
+    return matched_rows * INDEX_ROW_COST
+
+
+def plan_index_scan(
+    statistics: Optional[TableStatistics],
+    filters: List[ScanFilter],
+    indexes: List,
+    parallel_degree: int = 1,
+) -> Optional[bool]:
+    """
+    Whether the filters of a scan should be answered by an index: the most selective
+    filter an index supports is compared with a full scan of the table
+    Args:
+        statistics (TableStatistics): statistics of the scanned table
+        filters (List[ScanFilter]): conditions pushed down to the scan
+        indexes (List): indexes of the table, each with `supports(scan_filter)`
+        parallel_degree (int): worker processes of a full scan
+    Returns:
+        bool: None when the table was not analyzed, the storage then decides
+    """
+    supported = [f for f in filters if any(index.supports(f) for index in indexes)]
+    if not supported:
+        return False
+    if statistics is None:
+        return None
+    matched_rows = min(statistics.estimate_rows([f]) for f in supported)
+    return index_scan_cost(matched_rows) < scan_cost(statistics.row_count, parallel_degree)
@@ -0,0 +1,222 @@
+import math
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional
+from .node_handler.base_handler import BaseHandler
+from ..token import Token, ReservedWord
+
+__all__ = ["ExpressionCompiler", "compile_expression", "compile_predicate"]
+
+# Function of the row each compiled expression becomes
+COMPILED_FUNCTION = "evaluate"
+
+
+def _is_null(value) -> bool:
+    """
+    None or NaN, the null of a row like `scan_filter.null_mask`
+    """
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+def _equal(left, right) -> bool:
+    return not _is_null(left) and not _is_null(right) and left == right
+
+
+def _different(left, right) -> bool:
+    return not _is_null(left) and not _is_null(right) and left != right
+
+
+def _greater_than(left, right) -> bool:
+    return not _is_null(left) and not _is_null(right) and left > right
+
+
+def _less_than(left, right) -> bool:
+    return not _is_null(left) and not _is_null(right) and left < right
+
+
+def _greater_than_equal(left, right) -> bool:
+    return not _is_null(left) and not _is_null(right) and left >= right
+
+
+def _less_than_equal(left, right) -> bool:
+    return not _is_null(left) and not _is_null(right) and left <= right
+
+
+def _in(left, right) -> bool:
+    if _is_null(left) or right is None:
+        return False
+    return any(not _is_null(value) and left == value for value in right)
+
+
+def _unsupported(message: str):
+    raise ValueError(message)
+
+
+# Helper called for each comparison operator, a null never satisfies a comparison
+COMPARE_HELPERS = {
+    Token.EQUAL: _equal,
+    Token.DIFFERENT: _different,
+    Token.GREATER_THAN: _greater_than,
+    Token.LESS_THAN: _less_than,
+    Token.GREATER_THAN_EQUAL: _greater_than_equal,
+    Token.LESS_THAN_EQUAL: _less_than_equal,
+    ReservedWord.IN: _in,
+}
+HELPERS = {
+    **{helper.__name__: helper for helper in COMPARE_HELPERS.values()},
+    _unsupported.__name__: _unsupported,
+}
+
+
+class ExpressionCompiler(BaseHandler):
+    """
+    Translate an `ExprNode` or `PredicateNode` tree into the source of one Python expression,
+    compiled once into a function of the row. Evaluating a row is then one call instead of
+    a walk of the tree
+    Columns are read with a constant key of the row, literals are inlined in the source
+    and the code of a source already compiled is reused
+    call compile(node) -> Callable[[Optional[Dict]], Any]
+    """
+
+    def __init__(self):
+        self._columns: List[str] = []
+        self._constants: Dict[str, Any] = {}
+
+    def compile(self, node) -> Callable[[Optional[Dict]], Any]:
+        self._columns, self._constants = [], {}
+        source = _function_source(self.handle(node), self._columns)
+        namespace = {**HELPERS, **self._constants}
+        exec(_compiled_code(source), namespace)
+        return namespace[COMPILED_FUNCTION]
+
+    def handle(self, node) -> str:
+        handler = self.get_node_handler(node.type)
+        return handler(node)
+
+    def get_node_handler(self, node_type):
+        match node_type:
+            case "Where" | "Predicate" | "PredicateParent" | "Expr" | "ExprParent":
+                return self.handle_wrapper_node
+            case "PredicateOr":
+                return self.handle_predicate_or_node
+            case "PredicateAnd":
+                return self.handle_predicate_and_node
+            case "PredicateNot":
+                return self.handle_predicate_not_node
+            case "PredicateCompare":
+                return self.handle_predicate_compare_node
+            case "ExprAdd" | "ExprMulti":
+                return self.handle_expr_binary_node
+            case "ExprValue" | "Value":
+                return self.handle_value_node
+            case "ExprList":
+                return self.handle_expr_list_node
+            case _:
+                raise ValueError(f"Not support expression node {node_type}")
+
+    def handle_wrapper_node(self, node) -> str:
+        return self.handle(node.expr)
+
+    def handle_predicate_or_node(self, node) -> str:
+        left = self.handle(node.left)
+        if not node.right:
+            return left
+        return f"({left} or {self.handle(node.right)})"
+
+    def handle_predicate_and_node(self, node) -> str:
+        left = self.handle(node.left)
+        if not node.right:
+            return left
+        return f"({left} and {self.handle(node.right)})"
+
+    def handle_predicate_not_node(self, node) -> str:
+        expr = self.handle(node.expr)
+        return f"(not {expr})" if node.operator else expr
+
+    def handle_predicate_compare_node(self, node) -> str:
+        # Without operator the left side is a `PredicateParentNode`
+        if not node.operator:
+            return self.handle(node.left)
+        left, right = self.handle(node.left), self.handle(node.right)
+        helper = COMPARE_HELPERS.get(node.operator)
+        if helper is None:
+            return self._unsupported(f"Not support operator {node.operator}")
+        return f"{helper.__name__}({left}, {right})"
+
+    def handle_expr_binary_node(self, node) -> str:
+        left = self.handle(node.left)
+        if not node.operator:
+            return left
+        right = self.handle(node.right)
+        match node.operator:
+            case Token.PLUS:
+                return f"({left} + {right})"
+            case Token.MINUS:
+                return f"({left} - {right})"
+            case Token.ASTERISK:
+                return f"({left} * {right})"
+            case Token.DIVIDE:
+                return f"({left} / {right})"
+        # Raised when a row is evaluated, not when the query is planned
+        return self._unsupported(f"Not support operator {node.operator}")
+
+    def handle_value_node(self, node) -> str:
+        if not isinstance(node.expr, tuple):
+            return self.handle(node.expr)
+        # A literal is kept as its token (Token.NUMBER_LITERAL, value), a column as (Token.IDENTIFIER, name)
+        if node.type == "ExprValue":
+            return self._literal(node.expr[1])
+        self._columns.append(node.expr[1])
+        return f"row[{node.expr[1]!r}]"
+
+    def handle_expr_list_node(self, node) -> str:
+        return f"[{', '.join(self.handle(item) for item in node.items)}]"
+
+    def _literal(self, value) -> str:
+        if value is None or isinstance(value, (bool, int, str)):
+            return repr(value)
+        if isinstance(value, float) and math.isfinite(value):
+            return repr(value)
+        name = f"_constant_{len(self._constants)}"
+        self._constants[name] = value
+        return name
+
+    def _unsupported(self, message: str) -> str:
+        return f"{_unsupported.__name__}({self._literal(message)})"
+
+
+def compile_expression(node) -> Callable[[Optional[Dict]], Any]:
+    """
+    Function of a row returning the value of an `ExprNode`
+    """
+    return ExpressionCompiler().compile(node)
+
+
+def compile_predicate(node) -> Callable[[Optional[Dict]], bool]:
+    """
+    Function of a row returning whether it satisfies a `WhereNode` or `PredicateNode`
+    """
+    return ExpressionCompiler().compile(node)
+
+
+def _function_source(body: str, columns: List[str]) -> str:
+    lines = [f"def {COMPILED_FUNCTION}(row):"]
+    if not columns:
+        lines.append(f"    return {body}")
+        return "\n".join(lines)
+    # Missing columns are reported by name
+    lines += [
+        "    try:",
+        f"        return {body}",
+        "    except KeyError as e:",
+        "        raise ValueError(f'Column {e.args[0]} does not exists') from None",
+        "    except TypeError:",
+        "        if row is None:",
+        f"            raise ValueError({f'Column {columns[0]} does not exists'!r}) from None",
+        "        raise",
+    ]
+    return "\n".join(lines)
+
+
+@lru_cache(maxsize=1024)
+def _compiled_code(source: str):
+    return compile(source, "<expression>", "exec")
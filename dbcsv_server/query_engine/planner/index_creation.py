@@ -0,0 +1,22 @@
+from ..ast_node import CreateIndexNode
+from ...data_storage.index import INDEX_METHODS, HashIndex
+
+
+class IndexCreation:
+    """
+    Resolve the names and method of a CREATE INDEX statement, HASH when no method is given
+    Args:
+        node (CreateIndexNode)
+    Raises:
+        ValueError: if the method is unknown
+    """
+
+    def __init__(self, node: CreateIndexNode):
+        self.node = node
+        self.create_index_name = node.index_name[1]
+        self.create_database = node.database.expr[1]
+        self.create_table_name = node.table_name.expr[1]
+        self.create_column_name = node.column_name[1]
+        self.create_method = node.method[1] if node.method else HashIndex.method
+        if self.create_method not in INDEX_METHODS:
+            raise ValueError(f"Unknown index method {self.create_method}")
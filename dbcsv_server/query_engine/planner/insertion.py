@@ -0,0 +1,25 @@
+from ..ast_node import InsertNode
+from ..token import ReservedWord
+
+
+class Insertion:
+    """
+    Resolve the target table, columns and values of an INSERT statement
+    Args:
+        node (InsertNode)
+    """
+
+    def __init__(self, node: InsertNode):
+        self.node = node
+        self.insert_database = node.database.expr[1]
+        self.insert_table_name = node.table_name.expr[1]
+        self.insert_column_names = (
+            [column[1] for column in node.column_names] if node.column_names else None
+        )
+        self.insert_rows = [tuple(self.value(token) for token in row) for row in node.rows]
+
+    @staticmethod
+    def value(token: tuple):
+        if token[0] == ReservedWord.NULL:
+            return None
+        return token[1]
@@ -0,0 +1,182 @@
+from dataclasses import dataclass, field, replace
+from typing import Callable, List, Optional, Union
+from ..ast_node import ColumnListNode, FromNode, PredicateNode, SelectNode
+from ...data_storage.scan_filter import ScanFilter
+from ...data_storage.statistics import TableStatistics
+from .cost import order_filters
+from .pushdown import split_predicate, referenced_columns, reorder_predicate
+from .constant_folding import simplify_predicate, fold_column_list
+
+__all__ = [
+    "LogicalScan",
+    "LogicalFilter",
+    "LogicalProject",
+    "LogicalEmpty",
+    "LogicalPlan",
+    "PlanContext",
+    "logical_plan",
+    "rewrite",
+    "transform",
+    "REWRITE_RULES",
+]
+
+
+@dataclass
+class LogicalScan:
+    """
+    Read a table, `filters` and `columns` are evaluated by the storage scan
+    """
+    type = "LogicalScan"
+    from_clause: FromNode
+    filters: List[ScanFilter] = field(default_factory=list)
+    columns: Optional[List[str]] = None
+
+
+@dataclass
+class LogicalFilter:
+    """
+    Keep the rows of the child satisfying a predicate
+    """
+    type = "LogicalFilter"
+    predicate: PredicateNode
+    child: "LogicalPlan"
+
+
+@dataclass
+class LogicalProject:
+    """
+    Evaluate the column list on the rows of the child, a query without FROM has no child
+    """
+    type = "LogicalProject"
+    column_list: ColumnListNode
+    child: Optional["LogicalPlan"] = None
+
+
+@dataclass
+class LogicalEmpty:
+    """
+    No row, the where clause can never be satisfied so the table is not read
+    """
+    type = "LogicalEmpty"
+
+
+LogicalPlan = Union[LogicalScan, LogicalFilter, LogicalProject, LogicalEmpty]
+
+
+@dataclass
+class PlanContext:
+    """
+    What rewrite rules know of the queried table
+    """
+    statistics: Optional[TableStatistics] = None
+
+
+def logical_plan(select: SelectNode) -> LogicalPlan:
+    """
+    Plan of a SELECT as written: scan every column, filter by the where clause then project
+    """
+    if not select.from_clause:
+        return LogicalProject(select.column_list)
+    plan = LogicalScan(select.from_clause)
+    if select.where_clause:
+        plan = LogicalFilter(select.where_clause.expr, plan)
+    return LogicalProject(select.column_list, plan)
+
+
+def transform(
+    plan: Optional[LogicalPlan], rule: Callable[[LogicalPlan], LogicalPlan]
+) -> Optional[LogicalPlan]:
+    """
+    Apply a rule to every node of a plan, children first
+    """
+    if plan is None:
+        return None
+    if getattr(plan, "child", None) is not None:
+        plan = replace(plan, child=transform(plan.child, rule))
+    return rule(plan)
+
+
+def fold_constants(plan: LogicalPlan, context: PlanContext) -> LogicalPlan:
+    """
+    Fold the literal parts of predicates and column expressions, a filter always true
+    is removed and one never true empties its input
+    """
+    match plan.type:
+        case "LogicalFilter":
+            predicate = simplify_predicate(plan.predicate)
+            if predicate is True:
+                return plan.child
+            if predicate is False:
+                return LogicalEmpty()
+            return replace(plan, predicate=predicate)
+        case "LogicalProject":
+            return replace(plan, column_list=fold_column_list(plan.column_list))
+    return plan
+
+
+def prune_columns(plan: LogicalPlan, context: PlanContext) -> LogicalPlan:
+    """
+    Scan only the columns the column list and the predicates above the scan reference
+    """
+    if plan.type != "LogicalProject" or plan.child is None:
+        return plan
+    predicates = []
+    node = plan.child
+    while node.type == "LogicalFilter":
+        predicates.append(node.predicate)
+        node = node.child
+    columns = referenced_columns(plan.column_list)
+    for predicate in predicates:
+        if columns is not None:
+            columns = _merge_columns(columns, referenced_columns(predicate))
+    return transform(
+        plan,
+        lambda node: replace(node, columns=columns) if node.type == "LogicalScan" else node,
+    )
+
+
+def push_down_filters(plan: LogicalPlan, context: PlanContext) -> LogicalPlan:
+    """
+    Move the conditions the storage evaluates from a filter into the scan below it,
+    the filter is removed when nothing is left
+    """
+    if plan.type != "LogicalFilter" or plan.child.type != "LogicalScan":
+        return plan
+    filters, residual = split_predicate(plan.predicate)
+    scan = replace(plan.child, filters=plan.child.filters + filters)
+    return scan if residual is None else LogicalFilter(residual, scan)
+
+
+def reorder_predicates(plan: LogicalPlan, context: PlanContext) -> LogicalPlan:
+    """
+    Evaluate the most selective scan filters and the cheapest row conditions first
+    """
+    match plan.type:
+        case "LogicalScan":
+            return replace(plan, filters=order_filters(context.statistics, plan.filters))
+        case "LogicalFilter":
+            return replace(plan, predicate=reorder_predicate(plan.predicate))
+    return plan
+
+
+# Rules applied in order to the whole plan
+REWRITE_RULES = [fold_constants, prune_columns, push_down_filters, reorder_predicates]
+
+
+def rewrite(
+    plan: LogicalPlan,
+    context: PlanContext,
+    rules: Optional[List[Callable[[LogicalPlan, PlanContext], LogicalPlan]]] = None,
+) -> LogicalPlan:
+    """
+    Apply every rewrite rule to each node of the plan
+    """
+    for rule in REWRITE_RULES if rules is None else rules:
+        plan = transform(plan, lambda node: rule(node, context))
+    return plan
+
+
+def _merge_columns(columns: List[str], others: Optional[List[str]]) -> Optional[List[str]]:
+    if others is None:
+        return None
+    return columns + [column for column in others if column not in columns]
@@ -1,7 +1,7 @@
 from abc import ABC, abstractmethod
 
 
-def BaseHandler(ABC):
+class BaseHandler(ABC):
 
     def __init__(self):
         pass
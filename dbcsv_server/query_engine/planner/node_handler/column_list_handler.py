@@ -0,0 +1,26 @@
+from typing import List
+from .base_handler import BaseHandler
+
+
+class ColumnListHandler(BaseHandler):
+    """
+    Flatten a left recursive `ColumnListNode` to a list of `ColumnNode`
+    call handle(node) -> List[ColumnNode]
+    """
+
+    def handle(self, node) -> List:
+        if node.type == "Column":
+            return [node]
+        columns = self.handle(node.left)
+        if node.right:
+            columns.append(node.right)
+        return columns
+
+    @staticmethod
+    def column_name(column_node) -> str:
+        """
+        Name of a column in the result description, alias first
+        """
+        if column_node.alias:
+            return column_node.alias[1]
+        return column_node.name
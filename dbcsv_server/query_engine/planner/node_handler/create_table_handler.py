@@ -0,0 +1,22 @@
+from typing import Dict, List
+from .base_handler import BaseHandler
+
+
+class CreateTableHandler(BaseHandler):
+    """
+    Flatten a `TableDefinitionListNode` to a list of columns definition
+    call handle(node) -> [{"column_name": str, "column_type": str}]
+    """
+
+    def handle(self, node) -> List[Dict]:
+        if node.type == "TableDefinitionNode":
+            return [
+                {
+                    "column_name": node.column_name[1],
+                    "column_type": node.column_definition.type_name[0].value,
+                }
+            ]
+        cols_def = self.handle(node.left)
+        if node.right:
+            cols_def.extend(self.handle(node.right))
+        return cols_def
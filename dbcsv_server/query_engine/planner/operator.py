@@ -0,0 +1,74 @@
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+__all__ = ["Operator"]
+
+
+class Operator(ABC):
+    """
+    Physical operator of a query plan in the iterator model, operators exchange batches
+    of rows instead of single rows so the work of an operator is done once per batch
+    `open` prepares the operator and its children, `next_batch` returns the next batch or None
+    once exhausted and `close` releases the table scans. Only one batch per operator is alive
+    at a time, a plan streams a table with bounded memory
+    Rows of the batches are also iterated one by one, as consumed by `DataResult`
+    Args:
+        children (List[Operator]): input operators
+    """
+
+    def __init__(self, children: Optional[List["Operator"]] = None):
+        self.children = children or []
+        self.opened = False
+        self.closed = False
+        self._rows: Iterator = iter(())
+
+    def open(self) -> "Operator":
+        """
+        Open the children then the operator, returns the operator
+        """
+        if not self.opened:
+            for child in self.children:
+                child.open()
+            self.opened = True
+        return self
+
+    @abstractmethod
+    def next_batch(self) -> Optional[Any]:
+        raise NotImplementedError(f"Must implement {self.next_batch.__name__}")
+
+    def close(self) -> None:
+        if not self.closed:
+            self.closed = True
+            for child in self.children:
+                child.close()
+
+    def batches(self) -> Iterator[Any]:
+        """
+        Remaining batches, the operator is closed once they are exhausted
+        """
+        self.open()
+        try:
+            while (batch := self.next_batch()) is not None:
+                yield batch
+        finally:
+            self.close()
+
+    def batch_rows(self, batch) -> Iterable[Dict]:
+        return batch.to_dict(orient="records")
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> Dict:
+        for row in self._rows:
+            return row
+        self.open()
+        while not self.closed:
+            batch = self.next_batch()
+            if batch is None:
+                self.close()
+                break
+            self._rows = iter(self.batch_rows(batch))
+            for row in self._rows:
+                return row
+        raise StopIteration
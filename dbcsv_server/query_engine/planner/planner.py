@@ -0,0 +1,183 @@
+from functools import partial
+from typing import Callable, Optional, Tuple
+from ..ast_node import AST, FromNode
+from ...connection import ConnectionIdentity
+from ...data_storage.statistics import TableStatistics
+from .operator import Operator
+from .production import Production, EmptyProduction
+from .selection import Selection
+from .projection import Projection
+from .table_creation import TableCreation
+from .index_creation import IndexCreation
+from .insertion import Insertion
+from .bulk_load import BulkLoad
+from .table_analysis import TableAnalysis
+from .cost import plan_index_scan, plan_parallel_degree
+from .logical_plan import LogicalPlan, PlanContext, logical_plan, rewrite
+
+__all__ = ["Planner"]
+
+
+class Planner:
+    """
+    Turn the AST of a statement into the task executing it
+    A SELECT becomes a logical plan rewritten by `REWRITE_RULES` (constant folding, column pruning,
+    filter pushdown, predicate reordering) then physical operators chosen from the table statistics:
+    the parallel degree of the scan and whether its filters are answered by an index
+    Args:
+        file_manager (FileManager): storage of the server
+        con (ConnectionIdentity): connection executing the statement
+        parallel_degree (int): worker processes of scans, planned from the statistics when None
+    """
+
+    def __init__(
+        self,
+        file_manager,
+        con: ConnectionIdentity,
+        parallel_degree: Optional[int] = None,
+    ):
+        self.file_manager = file_manager
+        self.con = con
+        self.parallel_degree = parallel_degree
+
+    def build(self, ast: AST) -> Tuple[Callable, str]:
+        """
+        Args:
+            ast (AST): parsed statement
+        Raises:
+            ValueError: if the statement is not supported
+        Returns:
+            (Callable, str): task and its type for `TransactionManager.add_task_execute`
+        """
+        node = ast.nodes
+        file_manager, con = self.file_manager, self.con
+        match node.type:
+            case "Select":
+                return self.build_select(node).open, "query"
+            case "Create":
+                table_creation = TableCreation(node)
+                plan = partial(
+                    file_manager.create_table_file,
+                    con,
+                    table_creation.create_database,
+                    table_creation.create_table_name,
+                    table_creation.create_column_list,
+                    table_creation.create_storage,
+                    table_creation.create_partition_by,
+                )
+            case "CreateIndex":
+                index_creation = IndexCreation(node)
+                plan = partial(
+                    file_manager.create_index,
+                    con,
+                    index_creation.create_database,
+                    index_creation.create_table_name,
+                    index_creation.create_index_name,
+                    index_creation.create_column_name,
+                    index_creation.create_method,
+                )
+            case "Insert":
+                insertion = Insertion(node)
+                # Rows are validated now and written when the connection commits
+                plan = partial(
+                    _stage_write,
+                    con,
+                    partial(
+                        file_manager.prepare_insert,
+                        con,
+                        insertion.insert_database,
+                        insertion.insert_table_name,
+                        insertion.insert_column_names,
+                        insertion.insert_rows,
+                    ),
+                )
+            case "Analyze":
+                table_analysis = TableAnalysis(node)
+                plan = partial(
+                    file_manager.analyze_table,
+                    con,
+                    table_analysis.analyze_database,
+                    table_analysis.analyze_table_name,
+                )
+            case "Copy":
+                bulk_load = BulkLoad(node)
+                plan = partial(
+                    file_manager.copy_from,
+                    con,
+                    bulk_load.load_database,
+                    bulk_load.load_table_name,
+                    bulk_load.load_path,
+                )
+            case _:
+                raise ValueError(f"Not support statement {node.type}")
+        return plan, "create"
+
+    def build_select(self, select) -> Operator:
+        """
+        Physical operators of a `SelectNode`
+        """
+        statistics = self.table_statistics(select.from_clause) if select.from_clause else None
+        return self.physical(self.optimize(select, statistics), statistics)
+
+    def optimize(self, select, statistics: Optional[TableStatistics] = None) -> LogicalPlan:
+        """
+        Logical plan of a `SelectNode` after the rewrite rules
+        """
+        return rewrite(logical_plan(select), PlanContext(statistics))
+
+    def physical(self, plan: Optional[LogicalPlan], statistics: Optional[TableStatistics]):
+        if plan is None:
+            return None
+        match plan.type:
+            case "LogicalScan":
+                return self.physical_scan(plan, statistics)
+            case "LogicalFilter":
+                return Selection(plan.predicate, self.physical(plan.child, statistics))
+            case "LogicalProject":
+                return Projection(plan.column_list, self.physical(plan.child, statistics))
+            case "LogicalEmpty":
+                return EmptyProduction()
+        raise ValueError(f"Not support plan node {plan.type}")
+
+    def physical_scan(self, scan, statistics: Optional[TableStatistics]) -> Production:
+        parallel_degree = self.parallel_degree or plan_parallel_degree(
+            statistics, self.file_manager.parallel_degree
+        )
+        use_index = False
+        if scan.filters:
+            indexes = self.table_indexes(scan.from_clause)
+            use_index = plan_index_scan(statistics, scan.filters, indexes, parallel_degree)
+        return Production(
+            scan.from_clause,
+            partial(
+                self.file_manager.scan_file,
+                con=self.con,
+                parallel_degree=parallel_degree,
+                use_index=use_index,
+            ),
+            filters=scan.filters,
+            columns=scan.columns,
+        )
+
+    def table_statistics(self, from_node: FromNode) -> Optional[TableStatistics]:
+        """
+        Statistics of the table in a FROM clause, None when it was not analyzed or does not exists
+        """
+        try:
+            return self.file_manager.table_statistics(
+                from_node.database.expr[1], from_node.table_name.expr[1]
+            )
+        except FileNotFoundError:
+            return None
+
+    def table_indexes(self, from_node: FromNode):
+        try:
+            return self.file_manager.table_indexes(
+                from_node.database.expr[1], from_node.table_name.expr[1]
+            )
+        except FileNotFoundError:
+            return []
+
+
+def _stage_write(con: ConnectionIdentity, prepare: Callable) -> None:
+    con.pending_writes.append(prepare())
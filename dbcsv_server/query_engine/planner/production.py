@@ -0,0 +1,65 @@
+import pandas as pd
+from typing import Callable, Iterator, List, Optional
+from ..ast_node import FromNode
+from ...data_storage.scan_filter import ScanFilter
+from .operator import Operator
+
+
+class Production(Operator):
+    """
+    Leaf of a query plan, stream batches of the table in the FROM clause
+    The table is scanned from `open`, `close` stops a scan left unfinished
+    Args:
+        node (FromNode): from clause
+        source (Callable): storage scan returning batches, called with database, table_name and filters
+        filters (List[ScanFilter]): where clause conditions pushed down to the storage scan
+        columns (List[str]): columns referenced by the query, None reads every column
+    """
+
+    def __init__(
+        self,
+        node: FromNode,
+        source: Callable[..., Iterator[pd.DataFrame]],
+        filters: Optional[List[ScanFilter]] = None,
+        columns: Optional[List[str]] = None,
+    ):
+        super().__init__()
+        self.node = node
+        self.source = source
+        self.database = node.database.expr[1]
+        self.table_name = node.table_name.expr[1]
+        self.filters = filters or []
+        self.columns = columns
+        self._batches: Optional[Iterator[pd.DataFrame]] = None
+
+    def open(self) -> "Production":
+        if not self.opened:
+            self._batches = self.source(
+                database=self.database,
+                table_name=self.table_name,
+                filters=self.filters,
+                columns=self.columns,
+            )
+        return super().open()
+
+    def next_batch(self) -> Optional[pd.DataFrame]:
+        if self._batches is None or self.closed:
+            return None
+        return next(self._batches, None)
+
+    def close(self) -> None:
+        # Scans of worker processes and shard threads stop with their generator
+        close_scan = getattr(self._batches, "close", None)
+        if close_scan is not None:
+            close_scan()
+        self._batches = None
+        super().close()
+
+
+class EmptyProduction(Operator):
+    """
+    Leaf of a query plan whose where clause can never be satisfied, the table is not read
+    """
+
+    def next_batch(self) -> Optional[pd.DataFrame]:
+        return None
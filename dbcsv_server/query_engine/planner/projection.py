@@ -1 +1,96 @@
+import pandas as pd
+from typing import Dict, Iterator, List, Optional, Tuple
+from ..ast_node import ColumnListNode
+from .node_handler.column_list_handler import ColumnListHandler
+from .operator import Operator
+from .expression_compiler import compile_expression
+from .vectorized import compile_batch_expression
 
+
+class ProjectedBatch:
+    """
+    Columnar batch of query results, one list of Python values per result column
+    Args:
+        columns (Tuple[str]): result column names
+        values (List[List]): values of each column
+    """
+
+    def __init__(self, columns: Tuple[str, ...], values: List[List]):
+        self.columns = columns
+        self.values = values
+
+    def __len__(self) -> int:
+        return len(self.values[0]) if self.values else 0
+
+    def rows(self) -> Iterator[Dict]:
+        """
+        Rows as {"data": tuple, "columns": tuple} consumed by `DataResult`
+        """
+        return ({"data": data, "columns": self.columns} for data in zip(*self.values))
+
+
+class Projection(Operator):
+    """
+    Evaluate the column list against each source batch, every column expression is computed
+    on whole columns into a `ProjectedBatch`
+    Each row is {"data": tuple, "columns": tuple} as consumed by `DataResult`
+    Args:
+        node (ColumnListNode): select column list
+        source (Operator): upstream batches, None for a query without FROM
+    """
+
+    def __init__(self, node: ColumnListNode, source: Optional[Operator]):
+        super().__init__([source] if source is not None else None)
+        self.node = node
+        self.source = source
+        self.columns = ColumnListHandler().handle(node)
+        compile_column = compile_expression if source is None else compile_batch_expression
+        self.expressions = [
+            None if column.expr.type == "ColumnWildCard" else compile_column(column.expr)
+            for column in self.columns
+        ]
+        self._exhausted = False
+
+    def next_batch(self) -> Optional[ProjectedBatch]:
+        if self.source is None:
+            # Without FROM clause there is exactly one row
+            if self._exhausted:
+                return None
+            self._exhausted = True
+            row = self.project(None)
+            return ProjectedBatch(row["columns"], [[value] for value in row["data"]])
+        batch = self.source.next_batch()
+        if batch is None:
+            return None
+        return self.project_batch(batch)
+
+    def batch_rows(self, batch: ProjectedBatch) -> Iterator[Dict]:
+        return batch.rows()
+
+    def project_batch(self, batch: pd.DataFrame) -> ProjectedBatch:
+        columns = []
+        values = []
+        for column, expression in zip(self.columns, self.expressions):
+            if expression is None:
+                # Same Python values as the rows of the batch
+                for name, column_values in batch.to_dict(orient="list").items():
+                    columns.append(name)
+                    values.append(column_values)
+                continue
+            columns.append(ColumnListHandler.column_name(column))
+            values.append(expression(batch))
+        return ProjectedBatch(tuple(columns), values)
+
+    def project(self, row: Optional[Dict]) -> Dict:
+        data = []
+        columns = []
+        for column, expression in zip(self.columns, self.expressions):
+            if expression is None:
+                if row is None:
+                    raise ValueError("Cannot select * without FROM clause")
+                data.extend(row.values())
+                columns.extend(row.keys())
+                continue
+            data.append(expression(row))
+            columns.append(ColumnListHandler.column_name(column))
+        return {"data": tuple(data), "columns": tuple(columns)}
@@ -0,0 +1,222 @@
+from dataclasses import fields, is_dataclass
+from typing import List, Optional, Tuple
+from ..ast_node import (
+    ColumnListNode,
+    WhereNode,
+    PredicateNode,
+    PredicateOrNode,
+    PredicateAndNode,
+    PredicateNotNode,
+    ExprNode,
+    ExprValueNode,
+)
+from ..token import Token, ReservedWord
+from ...data_storage.scan_filter import ScanFilter
+
+__all__ = ["split_predicate", "referenced_columns", "reorder_predicate", "predicate_cost"]
+
+# Operator to use when the identifier is on the right side: 3 < col -> col > 3
+_FLIPPED_OPERATORS = {
+    Token.EQUAL: Token.EQUAL,
+    Token.DIFFERENT: Token.DIFFERENT,
+    Token.GREATER_THAN: Token.LESS_THAN,
+    Token.LESS_THAN: Token.GREATER_THAN,
+    Token.GREATER_THAN_EQUAL: Token.LESS_THAN_EQUAL,
+    Token.LESS_THAN_EQUAL: Token.GREATER_THAN_EQUAL,
+}
+# Cost of a condition with a division, evaluated after the conditions that may guard it
+DIVISION_COST = 1000
+
+
+def split_predicate(
+    node: Optional[PredicateNode],
+) -> Tuple[List[ScanFilter], Optional[PredicateNode]]:
+    """
+    Split a where clause predicate into the conditions the storage scan can evaluate
+    and the remaining predicate that has to be evaluated on rows.
+    Only top level AND conditions of the form `identifier <op> literal`
+    and `identifier IN (literal, ...)` are pushed down.
+    Args:
+        node (PredicateNode): where clause predicate
+    Returns:
+        (List[ScanFilter], PredicateNode): pushed filters, residual predicate or None
+    """
+    if node is None:
+        return [], None
+    conjuncts = _conjuncts(node)
+    if conjuncts is None:
+        return [], node
+    filters = []
+    residual = []
+    for conjunct in conjuncts:
+        scan_filter = _scan_filter(conjunct)
+        if scan_filter:
+            filters.append(scan_filter)
+        else:
+            residual.append(conjunct)
+    return filters, _conjunction(residual)
+
+
+def referenced_columns(
+    column_list: ColumnListNode, where_clause: Optional[WhereNode] = None
+) -> Optional[List[str]]:
+    """
+    Collect the identifiers used by the column list and the where clause
+    so that the storage scan only parses those columns
+    Args:
+        column_list (ColumnListNode): select column list
+        where_clause (WhereNode): where clause
+    Returns:
+        List[str]: referenced columns in order of appearance, None when the column list has a `*`
+    """
+    columns = []
+    for node in (column_list, where_clause):
+        if node is not None and not _collect_identifiers(node, columns):
+            return None
+    return columns
+
+
+def reorder_predicate(node: Optional[PredicateNode]) -> Optional[PredicateNode]:
+    """
+    Sort the top level AND conditions of a predicate from the cheapest to evaluate,
+    a row failing a cheap condition skips the others. Conditions of equal cost keep
+    their order and a condition with a division stays after those without one
+    Args:
+        node (PredicateNode): where clause predicate
+    Returns:
+        PredicateNode: same conditions, the predicate itself when it has an OR at the top level
+    """
+    if node is None:
+        return None
+    conjuncts = _conjuncts(node)
+    if conjuncts is None or len(conjuncts) < 2:
+        return node
+    return _conjunction(sorted(conjuncts, key=predicate_cost))
+
+
+def predicate_cost(node) -> int:
+    """
+    Estimated cost of evaluating a node tree: its number of nodes, divisions weigh `DIVISION_COST`
+    """
+    cost = 1
+    if node.type == "ExprMulti" and node.operator == Token.DIVIDE:
+        cost += DIVISION_COST
+    for field in fields(node):
+        child = getattr(node, field.name)
+        children = child if isinstance(child, list) else [child]
+        cost += sum(predicate_cost(c) for c in children if is_dataclass(c))
+    return cost
+
+
+def _collect_identifiers(node, columns: List[str]) -> bool:
+    """
+    Append identifiers of a node tree to `columns`, False when a wild card is met
+    """
+    if node.type == "ColumnWildCard":
+        return False
+    if node.type == "Value" and isinstance(node.expr, tuple):
+        if node.expr[1] not in columns:
+            columns.append(node.expr[1])
+        return True
+    for field in fields(node):
+        child = getattr(node, field.name)
+        if is_dataclass(child) and not _collect_identifiers(child, columns):
+            return False
+    return True
+
+
+def _conjuncts(node: PredicateNode) -> Optional[List[PredicateNotNode]]:
+    """
+    Flatten the AND chain of a predicate, None when the predicate has an OR at the top level
+    """
+    predicate_or = node.expr
+    if predicate_or.right is not None:
+        return None
+    conjuncts = []
+    predicate_and = predicate_or.left
+    while predicate_and.type == "PredicateAnd":
+        if predicate_and.right is not None:
+            conjuncts.append(predicate_and.right)
+        predicate_and = predicate_and.left
+    conjuncts.append(predicate_and)
+    conjuncts.reverse()
+    return conjuncts
+
+
+def _conjunction(conjuncts: List[PredicateNotNode]) -> Optional[PredicateNode]:
+    if not conjuncts:
+        return None
+    current_left = PredicateAndNode(left=conjuncts[0], right=None, operator=None)
+    for conjunct in conjuncts[1:]:
+        current_left = PredicateAndNode(
+            left=current_left, right=conjunct, operator=ReservedWord.AND
+        )
+    return PredicateNode(
+        expr=PredicateOrNode(left=current_left, right=None, operator=None)
+    )
+
+
+def _scan_filter(conjunct: PredicateNotNode) -> Optional[ScanFilter]:
+    if conjunct.type != "PredicateNot" or conjunct.operator:
+        return None
+    compare = conjunct.expr
+    if not compare.operator:
+        return None
+    if compare.operator == ReservedWord.IN:
+        return _in_filter(compare)
+    left = _expr_value(compare.left)
+    right = _expr_value(compare.right)
+    if left is None or right is None:
+        return None
+    if _is_identifier(left) and _is_literal(right):
+        return ScanFilter(left.expr.expr[1], compare.operator.value, right.expr[1])
+    if _is_literal(left) and _is_identifier(right):
+        operator = _FLIPPED_OPERATORS[compare.operator]
+        return ScanFilter(right.expr.expr[1], operator.value, left.expr[1])
+    return None
+
+
+def _in_filter(compare) -> Optional[ScanFilter]:
+    """
+    `identifier IN (literal, ...)`, nulls of the list never match and are left out
+    """
+    left = _expr_value(compare.left)
+    if left is None or not _is_identifier(left):
+        return None
+    values = []
+    for item in compare.right.items:
+        value = _expr_value(item)
+        if value is None or not _is_literal(value):
+            return None
+        values.append(value.expr[1])
+    return ScanFilter(left.expr.expr[1], ReservedWord.IN.value, tuple(values))
+
+
+def _expr_value(expr_node: ExprNode) -> Optional[ExprValueNode]:
+    """
+    Return the single `ExprValueNode` of an expression without operator
+    """
+    if expr_node.type != "Expr":
+        return None
+    expr_add = expr_node.expr
+    if expr_add.operator:
+        return None
+    expr_multi = expr_add.left
+    if expr_multi.type != "ExprMulti" or expr_multi.operator:
+        return None
+    return expr_multi.left
+
+
+def _is_literal(expr_value: ExprValueNode) -> bool:
+    return isinstance(expr_value.expr, tuple) and expr_value.expr[0] in (
+        Token.NUMBER_LITERAL,
+        Token.STRING_LITERAL,
+    )
+
+
+def _is_identifier(expr_value: ExprValueNode) -> bool:
+    return (
+        not isinstance(expr_value.expr, tuple)
+        and isinstance(expr_value.expr.expr, tuple)
+        and expr_value.expr.expr[0] == Token.IDENTIFIER
+    )
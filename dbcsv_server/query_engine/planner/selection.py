@@ -1,10 +1,31 @@
-class SelectionPlan:
+import pandas as pd
+from typing import Optional
+from ..ast_node import PredicateNode
+from .operator import Operator
+from .vectorized import compile_batch_predicate
 
-    def __init__(self):
-        pass
 
-    def __iter__(self):
-        return self
+class Selection(Operator):
+    """
+    Filter batches of the source by the where clause predicate, evaluated on whole columns
+    into a mask of the batch rows. Batches without any selected row are skipped
+    Args:
+        node (PredicateNode): where clause predicate, None keeps every row
+        source (Operator): upstream batches
+    """
 
-    def __next__(self, num):
-        pass
+    def __init__(self, node: Optional[PredicateNode], source: Operator):
+        super().__init__([source])
+        self.node = node
+        self.source = source
+        self.predicate = compile_batch_predicate(node) if node is not None else None
+
+    def next_batch(self) -> Optional[pd.DataFrame]:
+        while (batch := self.source.next_batch()) is not None:
+            if self.predicate is not None and len(batch):
+                mask = self.predicate(batch)
+                if not mask.all():
+                    batch = batch[mask]
+            if len(batch):
+                return batch
+        return None
@@ -0,0 +1,14 @@
+from ..ast_node import AnalyzeNode
+
+
+class TableAnalysis:
+    """
+    Resolve the target table of an ANALYZE statement
+    Args:
+        node (AnalyzeNode)
+    """
+
+    def __init__(self, node: AnalyzeNode):
+        self.node = node
+        self.analyze_database = node.database.expr[1]
+        self.analyze_table_name = node.table_name.expr[1]
@@ -0,0 +1,38 @@
+from ..ast_node import CreateTableNode
+from .node_handler.create_table_handler import CreateTableHandler
+from ...data_storage.block_storage import CODECS, CSV_STORAGE
+from ...data_storage.shards import SHARDED_STORAGE
+
+
+class TableCreation:
+    """
+    Resolve the names, columns definition, partition column and storage of a CREATE TABLE statement,
+    CSV when no storage is given
+    Args:
+        node (CreateTableNode)
+    Raises:
+        ValueError: if the storage is unknown, the partition column is not a column of the table
+            or a partitioned table is compressed
+    """
+
+    def __init__(self, node: CreateTableNode):
+        self.node = node
+        self.create_database = node.database.expr[1]
+        self.create_table_name = node.table_name.expr[1]
+        self.create_column_list = CreateTableHandler().handle(
+            node.table_definition_group.table_definition_list
+        )
+        self.create_storage = node.storage[1] if node.storage else CSV_STORAGE
+        if (
+            self.create_storage not in (CSV_STORAGE, SHARDED_STORAGE)
+            and self.create_storage not in CODECS
+        ):
+            raise ValueError(f"Unknown table storage {self.create_storage}")
+        self.create_partition_by = node.partition_by[1] if node.partition_by else None
+        if self.create_partition_by is not None:
+            if self.create_partition_by not in [
+                column["column_name"] for column in self.create_column_list
+            ]:
+                raise ValueError(f"Column {self.create_partition_by} does not exists")
+            if self.create_storage != CSV_STORAGE:
+                raise ValueError("A partitioned table is stored as csv files")
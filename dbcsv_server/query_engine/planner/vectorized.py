@@ -0,0 +1,276 @@
+import operator
+import numpy as np
+import pandas as pd
+from typing import Any, Callable, List, Optional
+from .node_handler.base_handler import BaseHandler
+from .expression_compiler import compile_expression, compile_predicate, COMPARE_HELPERS
+from ..token import Token, ReservedWord
+from ...data_storage.scan_filter import null_mask
+
+__all__ = [
+    "BatchCompiler",
+    "compile_batch_expression",
+    "compile_batch_predicate",
+]
+
+# Column operator of each comparison, IN is an OR of equalities
+COMPARE_OPERATORS = {
+    Token.EQUAL: operator.eq,
+    Token.DIFFERENT: operator.ne,
+    Token.GREATER_THAN: operator.gt,
+    Token.LESS_THAN: operator.lt,
+    Token.GREATER_THAN_EQUAL: operator.ge,
+    Token.LESS_THAN_EQUAL: operator.le,
+}
+ARITHMETIC_OPERATORS = {
+    Token.PLUS: operator.add,
+    Token.MINUS: operator.sub,
+    Token.ASTERISK: operator.mul,
+    Token.DIVIDE: operator.truediv,
+}
+
+# Value of a node for a batch: a column, a scalar for the whole batch or a list for IN
+BatchValue = Any
+
+
+class _RowFallback(Exception):
+    """
+    The batch can not be evaluated on arrays with the results of the row evaluation
+    """
+
+
+class BatchCompiler(BaseHandler):
+    """
+    Compose an `ExprNode` or `PredicateNode` tree into a function of a whole batch,
+    columns are evaluated as pandas series: comparisons and AND, OR, NOT give boolean masks,
+    arithmetic gives result columns
+    Values are those the row evaluation returns on the same rows: a null (None or NaN) never
+    satisfies a comparison, as in the storage scan filters. Arithmetic is only done on number
+    columns without null and without division by zero, other batches raise `_RowFallback`
+    call compile(node) -> Callable[[pd.DataFrame], BatchValue], None when the tree has
+    a node only the row evaluation supports
+    """
+
+    def compile(self, node) -> Optional[Callable[[pd.DataFrame], BatchValue]]:
+        try:
+            return self.handle(node)
+        except _RowFallback:
+            return None
+
+    def handle(self, node) -> Callable[[pd.DataFrame], BatchValue]:
+        handler = self.get_node_handler(node.type)
+        return handler(node)
+
+    def get_node_handler(self, node_type):
+        match node_type:
+            case "Where" | "Predicate" | "PredicateParent" | "Expr" | "ExprParent":
+                return self.handle_wrapper_node
+            case "PredicateOr":
+                return self.handle_predicate_or_node
+            case "PredicateAnd":
+                return self.handle_predicate_and_node
+            case "PredicateNot":
+                return self.handle_predicate_not_node
+            case "PredicateCompare":
+                return self.handle_predicate_compare_node
+            case "ExprAdd" | "ExprMulti":
+                return self.handle_expr_binary_node
+            case "ExprValue" | "Value":
+                return self.handle_value_node
+            case "ExprList":
+                return self.handle_expr_list_node
+            case _:
+                raise _RowFallback(node_type)
+
+    def handle_wrapper_node(self, node):
+        return self.handle(node.expr)
+
+    def handle_predicate_or_node(self, node):
+        left = self.handle(node.left)
+        if not node.right:
+            return left
+        right = self.handle(node.right)
+        return lambda batch: _mask(left(batch), batch) | _mask(right(batch), batch)
+
+    def handle_predicate_and_node(self, node):
+        left = self.handle(node.left)
+        if not node.right:
+            return left
+        right = self.handle(node.right)
+        return lambda batch: _mask(left(batch), batch) & _mask(right(batch), batch)
+
+    def handle_predicate_not_node(self, node):
+        expr = self.handle(node.expr)
+        if not node.operator:
+            return expr
+        return lambda batch: ~_mask(expr(batch), batch)
+
+    def handle_predicate_compare_node(self, node):
+        # Without operator the left side is a `PredicateParentNode`
+        if not node.operator:
+            return self.handle(node.left)
+        left, right = self.handle(node.left), self.handle(node.right)
+        if node.operator == ReservedWord.IN:
+            return lambda batch: _is_in(left(batch), right(batch), batch)
+        column_operator = COMPARE_OPERATORS.get(node.operator)
+        if column_operator is None:
+            raise _RowFallback(node.operator)
+        row_helper = COMPARE_HELPERS[node.operator]
+        return lambda batch: _compare(
+            column_operator, row_helper, left(batch), right(batch), batch
+        )
+
+    def handle_expr_binary_node(self, node):
+        left = self.handle(node.left)
+        if not node.operator:
+            return left
+        right = self.handle(node.right)
+        arithmetic_operator = ARITHMETIC_OPERATORS.get(node.operator)
+        if arithmetic_operator is None:
+            raise _RowFallback(node.operator)
+        return lambda batch: _arithmetic(
+            arithmetic_operator, left(batch), right(batch)
+        )
+
+    def handle_value_node(self, node):
+        if not isinstance(node.expr, tuple):
+            return self.handle(node.expr)
+        value = node.expr[1]
+        # A literal is kept as its token (Token.NUMBER_LITERAL, value), a column as (Token.IDENTIFIER, name)
+        if node.type == "ExprValue":
+            return lambda batch: value
+        return lambda batch: _column(batch, value)
+
+    def handle_expr_list_node(self, node):
+        items = [self.handle(item) for item in node.items]
+        return lambda batch: [item(batch) for item in items]
+
+
+def compile_batch_predicate(node) -> Callable[[pd.DataFrame], np.ndarray]:
+    """
+    Function of a batch returning the boolean mask of the rows satisfying a `WhereNode`
+    or `PredicateNode`, rows are evaluated one by one when the batch can not be vectorized
+    """
+    vectorized = BatchCompiler().compile(node)
+    row_predicate = compile_predicate(node)
+
+    def evaluate(batch: pd.DataFrame) -> np.ndarray:
+        if vectorized is not None:
+            try:
+                return _mask(vectorized(batch), batch)
+            except (_RowFallback, TypeError, ZeroDivisionError):
+                pass
+        return np.fromiter(
+            (bool(row_predicate(row)) for row in batch.to_dict(orient="records")),
+            dtype=bool,
+            count=len(batch),
+        )
+
+    return evaluate
+
+
+def compile_batch_expression(node) -> Callable[[pd.DataFrame], List]:
+    """
+    Function of a batch returning the value of an `ExprNode` for every row as Python values,
+    rows are evaluated one by one when the batch can not be vectorized
+    """
+    vectorized = BatchCompiler().compile(node)
+    row_expression = compile_expression(node)
+
+    def evaluate(batch: pd.DataFrame) -> List:
+        if vectorized is not None:
+            try:
+                return _values(vectorized(batch), batch)
+            except (_RowFallback, TypeError, ZeroDivisionError):
+                pass
+        return [row_expression(row) for row in batch.to_dict(orient="records")]
+
+    return evaluate
+
+
+def _column(batch: pd.DataFrame, name: str) -> pd.Series:
+    if name not in batch.columns:
+        raise ValueError(f"Column {name} does not exists")
+    return batch[name]
+
+
+def _mask(value: BatchValue, batch: pd.DataFrame) -> np.ndarray:
+    if isinstance(value, np.ndarray):
+        return value
+    if isinstance(value, pd.Series):
+        # A value which is not a comparison is tested for truth like a row value
+        return np.fromiter((bool(v) for v in value), dtype=bool, count=len(value))
+    return np.full(len(batch), bool(value))
+
+
+def _values(value: BatchValue, batch: pd.DataFrame) -> List:
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, pd.Series):
+        # Same Python values as the rows of the batch, a masked null becomes None
+        return pd.DataFrame({"value": value}).to_dict(orient="list")["value"]
+    if isinstance(value, list):
+        raise _RowFallback("list")
+    return [value] * len(batch)
+
+
+def _none_mask(value: BatchValue) -> Optional[np.ndarray]:
+    """
+    Rows whose value is None in a row, arithmetic on them raises a TypeError
+    """
+    if not isinstance(value, pd.Series):
+        return None
+    if isinstance(value.dtype, pd.api.extensions.ExtensionDtype) and value.dtype.na_value is pd.NA:
+        return value.isna().to_numpy()
+    if value.dtype == object:
+        return np.equal(value.to_numpy(), None)
+    return None
+
+
+def _compare(column_operator, row_helper, left: BatchValue, right: BatchValue, batch) -> np.ndarray:
+    if isinstance(left, list) or isinstance(right, list):
+        raise _RowFallback("list")
+    if not isinstance(left, pd.Series) and not isinstance(right, pd.Series):
+        return np.full(len(batch), bool(row_helper(left, right)))
+    if left is None or right is None:
+        return np.zeros(len(batch), dtype=bool)
+    result = column_operator(left, right)
+    if isinstance(result.dtype, pd.api.extensions.ExtensionDtype):
+        result = result.fillna(False)
+    mask = result.to_numpy(dtype=bool, copy=True)
+    for value in (left, right):
+        if isinstance(value, pd.Series):
+            mask &= ~null_mask(value)
+    return mask
+
+
+def _is_in(left: BatchValue, items: BatchValue, batch) -> np.ndarray:
+    if not isinstance(items, list):
+        raise _RowFallback("IN")
+    mask = np.zeros(len(batch), dtype=bool)
+    for item in items:
+        mask |= _compare(operator.eq, COMPARE_HELPERS[Token.EQUAL], left, item, batch)
+    return mask
+
+
+def _arithmetic(arithmetic_operator, left: BatchValue, right: BatchValue) -> BatchValue:
+    if not isinstance(left, pd.Series) and not isinstance(right, pd.Series):
+        return arithmetic_operator(left, right)
+    for value in (left, right):
+        if not _is_number(value):
+            raise _RowFallback("not a number")
+    if arithmetic_operator is operator.truediv and np.any(np.asarray(right == 0)):
+        raise _RowFallback("division by zero")
+    return arithmetic_operator(left, right)
+
+
+def _is_number(value: BatchValue) -> bool:
+    """
+    Number column without None or number literal, a float NaN is a number
+    """
+    if isinstance(value, pd.Series):
+        if value.dtype.kind not in "iuf":
+            return False
+        nulls = _none_mask(value)
+        return nulls is None or not nulls.any()
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
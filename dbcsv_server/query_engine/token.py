@@ -14,6 +14,17 @@ class ReservedWord(Enum):
     INT = "INT"
     STRING = "STRING"
     FLOAT = "FLOAT"
+    INDEX = "INDEX"
+    ON = "ON"
+    USING = "USING"
+    INSERT = "INSERT"
+    INTO = "INTO"
+    VALUES = "VALUES"
+    COPY = "COPY"
+    IN = "IN"
+    PARTITION = "PARTITION"
+    BY = "BY"
+    ANALYZE = "ANALYZE"
 
 class Token(Enum):
     DOT = "."
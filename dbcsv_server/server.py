@@ -1,16 +1,44 @@
-from fastapi import FastAPI, HTTPException, Response
+import os
+import tempfile
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Optional
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import JSONResponse
 from .db_controller import DBController
+from .data_storage.write_ahead_log import DEFAULT_WAL_FILE
 from pydantic import BaseModel
 
-app = FastAPI()
-db_controller = DBController()
+# Environment variable of the write ahead log path, `dbcsv.wal` of the working directory when unset
+WAL_PATH_ENV = "DBCSV_WAL_PATH"
+
+db_controller: Optional[DBController] = None
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Open the database when the server starts, the commits left in its log are replayed,
+    and close it on shutdown
+    """
+    global db_controller
+    db_controller = DBController(wal_path=Path(os.environ.get(WAL_PATH_ENV, DEFAULT_WAL_FILE)))
+    try:
+        yield
+    finally:
+        db_controller.close()
+        db_controller = None
+
+
+app = FastAPI(lifespan=lifespan)
 
 
 class RequestBody(BaseModel):
     connection_id: str
     query: str = None
     query_id: str = None
+    parallel_degree: int = None
 
 
 @app.get("/connect")
@@ -24,11 +52,46 @@ def execute(query_request: RequestBody):
     if not query_request.query:
         raise HTTPException(400, "No query provided")
     query_id = db_controller.execute_query(
-        query_request.connection_id, query_request.query
+        query_request.connection_id,
+        query_request.query,
+        parallel_degree=query_request.parallel_degree,
     )
     return JSONResponse(status_code=200, content={"query_id": query_id})
 
 
+@app.post("/copy/{database}/{table_name}")
+async def copy(database: str, table_name: str, connection_id: str, request: Request):
+    """
+    Bulk load the csv sent as request body, the body is spooled to a temporary file
+    as it arrives then validated and appended chunk by chunk
+    """
+    with tempfile.TemporaryFile() as upload:
+        async for data in request.stream():
+            upload.write(data)
+        upload.seek(0)
+        query_id = await run_in_threadpool(
+            db_controller.copy_from, connection_id, database, table_name, upload
+        )
+    return JSONResponse(status_code=200, content={"query_id": query_id})
+
+
+@app.post("/commit")
+def commit(request_body: RequestBody):
+    db_controller.commit(request_body.connection_id)
+    return Response(status_code=200)
+
+
+@app.post("/rollback")
+def rollback(request_body: RequestBody):
+    db_controller.rollback(request_body.connection_id)
+    return Response(status_code=200)
+
+
+@app.get("/buffer_pool")
+def buffer_pool():
+    return JSONResponse(status_code=200, content=db_controller.buffer_pool_stats())
+
+
 @app.get("/close")
 def close(query_request: RequestBody):
     if not query_request.connection_id:
@@ -33,7 +33,7 @@ class DataResult:
         except StopIteration:
             if self.current_row_return == 0:
                 return ()
-            raise(f"Stop iteration")
+            raise StopIteration
         
 class TransactionManager:
     """
@@ -62,12 +62,11 @@ class TransactionManager:
             if task_type == "query":
                 con.query_result.update({query_id: {"result": DataResult(result)}})
             elif task_type == "create":
-                con.query_result.update({query_id: {"result": iter()}})
+                con.query_result.update({query_id: {"result": iter(())}})
         except Exception as e:
-            self._task_list.update({query_id: {"status": "Fail", "reason": e.args[0]}})
-            raise 
-        finally:
-            return query_id
+            self._task_list.update({query_id: {"status": "Fail", "reason": e.args[0] if e.args else repr(e)}})
+            raise
+        return query_id
 
     def cancel(self, con: ConnectionIdentity, query_id: str):
         pass